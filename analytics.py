@@ -0,0 +1,53 @@
+"""Daily sales rollups for the admin dashboard.
+
+Order lines are folded into per-day totals three ways: the whole store,
+each section and each item. Days are calendar days in the shop's time
+zone, given as a UTC offset because order times are stored in UTC.
+
+rollup() only adds up lines it is given, so the app can feed it each
+batch of new orders once and add the result onto the stored totals.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+DEFAULT_UTC_OFFSET_MINUTES = 330  # India Standard Time
+
+# rollup name -> key columns besides day
+ROLLUP_KEYS = {
+    'store': (),
+    'section': ('section',),
+    'item': ('item_id', 'section')
+}
+MEASURES = ('orders', 'units', 'revenue_paise')
+
+def local_day(created_at, utc_offset_minutes=DEFAULT_UTC_OFFSET_MINUTES):
+    return (created_at + timedelta(minutes=utc_offset_minutes)).date()
+
+def line_revenue_paise(price, quantity):
+    """Order lines keep a float rupee price; revenue is summed in whole paise"""
+    return int(round((price or 0) * 100)) * (quantity or 0)
+
+def rollup(lines, utc_offset_minutes=DEFAULT_UTC_OFFSET_MINUTES):
+    """Daily totals of order lines, as {rollup name: [row dict, ...]}.
+
+    lines are (order id, created_at, item id, section, quantity, price)
+    tuples. An order counts once per day, section and item it touches,
+    however many of its lines do.
+    """
+    totals = {name: defaultdict(lambda: {'units': 0, 'revenue_paise': 0, 'orders': set()}) for name in ROLLUP_KEYS}
+    for order_id, created_at, item_id, section, quantity, price in lines:
+        day = local_day(created_at, utc_offset_minutes)
+        revenue = line_revenue_paise(price, quantity)
+        for name, key in (('store', (day,)), ('section', (day, section)), ('item', (day, item_id, section))):
+            entry = totals[name][key]
+            entry['units'] += quantity or 0
+            entry['revenue_paise'] += revenue
+            entry['orders'].add(order_id)
+
+    rows = {}
+    for name, entries in totals.items():
+        columns = ('day',) + ROLLUP_KEYS[name]
+        rows[name] = [dict(zip(columns, key), orders=len(entry['orders']), units=entry['units'],
+                           revenue_paise=entry['revenue_paise'])
+                      for key, entry in entries.items()]
+    return rows
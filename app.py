@@ -1,32 +1,96 @@
+import io
 import os
 import re
+import json
+import time
+import mimetypes
+import hashlib
+import uuid
+import threading
+import base64
+import random
+import click
 from functools import wraps
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask import Flask, render_template, request, redirect, flash, url_for, session, jsonify
+from flask import (Flask, render_template, request, redirect, flash, url_for, session, jsonify,
+                   send_from_directory, make_response, g, abort, before_render_template, template_rendered,
+                   stream_with_context)
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.mysql import match as mysql_match, insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, selectinload
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from pricing import parse_price, format_price, format_amount, paise_to_rupees
+from migrations import run_migrations, pending_migrations
+from search_index import SearchIndex, SuggestionIndex, mysql_boolean_query
+from cache import TTLCache
+from query_budget import QUERY_BUDGETS, run_query_budgets
+from images import (generate_variants, process_image, smallest_variant, images_supported, store_upload,
+                    is_managed_upload, delete_image_files, file_digest, variant_prefix)
+from jobs import JobRunner
+from assets import build_assets, load_manifest, stale_files, brotli_supported, BUNDLES, PRECOMPRESSED
+from instrumentation import Instrumentation, Profiler
+from config import load_config
+from replicas import RoutingSession, replica_keys
+from sessions import (ServerSideSessionInterface, SessionStore, DatabaseSessionStore, MemorySessionStore,
+                      session_metadata)
+from catalog_io import (FORMATS, EXPORT_COLUMNS, ImportRowError, detect_format, read_rows, update_columns,
+                        validate_row, batched, export_chunks)
+from recommendations import cooccurring, top_neighbours, vectorized as recommendations_vectorized
+from analytics import rollup, local_day
 
+# Routes below register on this app; create_app() at the end of the module
+# configures it from the environment (see config.py) and connects the database
 app = Flask(__name__, template_folder="templates")
-app.secret_key = "yoursecretkey"
 app.config['UPLOAD_FOLDER'] = 'static/images'
 app.config['ALLOWED_EXTENSIONS'] = {'jpg', 'jpeg', 'png'}
 
-# Configure MySQL database
-app.config['SQLALCHEMY_DATABASE_URI'] = 'mysql+mysqlconnector://root:@localhost/shaheen_atier'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+app.jinja_env.filters['inr'] = format_price
+app.jinja_env.filters['amount'] = format_amount
 
 # Database Models
 class Item(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    price = db.Column(db.String(20), nullable=False)
+    price = db.Column(db.String(20), nullable=False)  # display string, kept in sync with price_paise
+    price_paise = db.Column(db.Integer, nullable=False, default=0)
     image = db.Column(db.String(100), nullable=False)
+    image_variants = db.Column(db.JSON(none_as_null=True), nullable=True)  # {format: [[width, path], ...]} from images.py
     section = db.Column(db.String(50), nullable=False)
     description = db.Column(db.Text, nullable=True)
+    sku = db.Column(db.String(64), nullable=True)  # supplier reference; the key for bulk imports
     in_stock = db.Column(db.Boolean, default=True)
+    stock_quantity = db.Column(db.Integer, nullable=True)  # None: not counted, in_stock alone decides
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Indexes backing the catalog listing sort orders and section / price filters
+    __table_args__ = (
+        db.Index('ix_item_created_id', 'created_at', 'id'),
+        db.Index('ix_item_section_created_id', 'section', 'created_at', 'id'),
+        db.Index('ix_item_title_id', 'title', 'id'),
+        db.Index('ix_item_price_paise_id', 'price_paise', 'id'),
+        db.Index('ix_item_section_price_paise_id', 'section', 'price_paise', 'id'),
+        db.Index('ix_item_updated_at', 'updated_at'),
+        db.Index('uq_item_sku', 'sku', unique=True),
+    )
+
+    def set_price(self, paise):
+        self.price_paise = paise
+        self.price = format_price(paise)
+
+    def set_stock(self, quantity):
+        self.stock_quantity = quantity
+        self.in_stock = quantity is None or quantity > 0
 
 class User(db.Model): 
     id = db.Column(db.Integer, primary_key=True)
@@ -34,10 +98,15 @@ class User(db.Model):
     email = db.Column(db.String(100), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
     profile_image = db.Column(db.String(100), nullable=True)
+    profile_image_variants = db.Column(db.JSON(none_as_null=True), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False)
 
+    @property
+    def profile_thumbnail(self):
+        return smallest_variant(self.profile_image_variants)
+
 class Cart(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -48,6 +117,10 @@ class Cart(db.Model):
     user = db.relationship('User', backref='cart_items')
     item = db.relationship('Item')
 
+    __table_args__ = (
+        db.Index('uq_cart_user_item', 'user_id', 'item_id', unique=True),
+    )
+
 class Wishlist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -57,9 +130,13 @@ class Wishlist(db.Model):
     user = db.relationship('User', backref='wishlist_items')
     item = db.relationship('Item')
 
+    __table_args__ = (
+        db.Index('uq_wishlist_user_item', 'user_id', 'item_id', unique=True),
+    )
+
 class Address(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(15), nullable=False)
     address_line1 = db.Column(db.String(200), nullable=False)
@@ -81,33 +158,173 @@ class Order(db.Model):
     total_amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='pending')
     payment_status = db.Column(db.String(20), default='pending')
+    idempotency_key = db.Column(db.String(64), nullable=True)  # one order per checkout form
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     user = db.relationship('User', backref='orders')
     address = db.relationship('Address')
     order_items = db.relationship('OrderItem', backref='order')
 
+    # Order history is listed newest first per user
+    __table_args__ = (
+        db.Index('ix_order_user_created_id', 'user_id', 'created_at', 'id'),
+        db.Index('uq_order_user_idempotency_key', 'user_id', 'idempotency_key', unique=True),
+    )
+
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
     item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
     
     item = db.relationship('Item')
 
+class ImageJob(db.Model):
+    """Queued variant generation for an uploaded product or profile image"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # key of IMAGE_JOB_TARGETS
+    target_id = db.Column(db.Integer, nullable=False)
+    image_path = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    content_hash = db.Column(db.String(64), nullable=True)
+    duplicate = db.Column(db.Boolean, default=False)  # variants already existed for identical content
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_image_job_status_id', 'status', 'id'),
+        db.Index('ix_image_job_kind_target', 'kind', 'target_id'),
+    )
+
+class ItemRecommendation(db.Model):
+    """Precomputed "customers also bought" list of an item, from recommendations.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, nullable=False)
+    position = db.Column(db.Integer, nullable=False)  # 0 is the best match
+    recommended_item_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.Index('uq_item_recommendation_item_position', 'item_id', 'position', unique=True),
+    )
+
+class RecommendationBuild(db.Model):
+    """One run of `flask recommendations-build`; the newest says which orders are counted"""
+    id = db.Column(db.Integer, primary_key=True)
+    full = db.Column(db.Boolean, nullable=False)
+    last_order_id = db.Column(db.Integer, nullable=False)
+    items_updated = db.Column(db.Integer, nullable=False)
+    vectorized = db.Column(db.Boolean, nullable=False)
+    duration_ms = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class SalesDaily(db.Model):
+    """Store-wide sales per day, maintained by `flask analytics-rollup`; see analytics.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue_paise = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('uq_sales_daily_day', 'day', unique=True),
+    )
+
+class SalesDailySection(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    section = db.Column(db.String(50), nullable=False)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue_paise = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('uq_sales_daily_section_day_section', 'day', 'section', unique=True),
+    )
+
+class SalesDailyItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    section = db.Column(db.String(50), nullable=False)  # the item's section when its first sale that day was rolled up
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue_paise = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('uq_sales_daily_item_day_item', 'day', 'item_id', unique=True),
+    )
+
+class SalesRollupState(db.Model):
+    """Single row: the highest order id already added into the sales rollups"""
+    id = db.Column(db.Integer, primary_key=True)
+    last_order_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class CatalogRevision(db.Model):
+    """Single row: counts catalog changes; bumped in the same transaction as each one"""
+    id = db.Column(db.Integer, primary_key=True)
+    revision = db.Column(db.BigInteger, nullable=False, default=0)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Eager-loading strategies for pages that walk these relationships in their templates
+CART_WITH_ITEM = joinedload(Cart.item)
+WISHLIST_WITH_ITEM = joinedload(Wishlist.item)
+ORDER_WITH_DETAILS = (
+    joinedload(Order.address),
+    selectinload(Order.order_items).joinedload(OrderItem.item)
+)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+def insert_if_absent(model, **values):
+    """Single INSERT that skips rows clashing with a unique index; True if a row was added"""
+    if db.engine.dialect.name == 'mysql':
+        statement = db.insert(model).values(**values).prefix_with('IGNORE')
+    else:
+        statement = sqlite_insert(model).values(**values).on_conflict_do_nothing()
+    return db.session.execute(statement).rowcount == 1
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', (text or '').lower()).strip('-') or 'product'
+
+@app.template_global()
+def product_url(item_id, title):
+    """Canonical id-based product page URL; the slug is cosmetic"""
+    return url_for('product', item_id=item_id, slug=slugify(title))
+
+def save_upload(file):
+    """Store an upload under its content hash and return its static path.
+
+    Identical uploads share one file; see release_image() for removal.
+    """
+    extension = os.path.splitext(secure_filename(file.filename))[1]
+    filename, _ = store_upload(file.stream, app.config['UPLOAD_FOLDER'], extension)
+    return f'images/{filename}'
+
+def image_variants(image_path, force=False):
+    """Resized JPEG / WebP / AVIF copies of a static image, or None if they cannot be made"""
+    try:
+        return generate_variants(app.static_folder, image_path, force=force)
+    except OSError as e:
+        print(f"Could not create variants of {image_path}: {e}")
+        return None
+
+@app.template_filter('srcset')
+def srcset_filter(variants):
+    return ', '.join(f"{url_for('static', filename=path)} {width}w" for width, path in variants)
+
 def is_valid_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
 def is_admin():
-    if 'user' not in session:
-        return False
-    user = User.query.get(session['user']['id'])
-    return user and user.is_admin
+    return bool(session.get('user', {}).get('is_admin'))
 
 def admin_required(f):
     @wraps(f)
@@ -118,6 +335,33 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def user_session_data(user):
+    """The user dict found in session['user']; the session store itself only keeps the id"""
+    return {
+        'id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'profile_image': user.profile_image,
+        'profile_thumbnail': user.profile_thumbnail,
+        'is_admin': user.is_admin
+    }
+
+# Session Principals
+PRINCIPAL_CACHE_TTL = 60  # seconds another process's change to a user can go unnoticed
+
+# user id -> user_session_data(), or None for a deleted / deactivated user
+principal_cache = TTLCache(default_ttl=PRINCIPAL_CACHE_TTL, max_entries=10000)
+
+def load_principal(user_id):
+    def load():
+        user = db.session.get(User, user_id)
+        return user_session_data(user) if user and user.is_active else None
+    return principal_cache.get_or_set(user_id, load)
+
+def user_changed(user_id):
+    """Call after committing a change to a user's profile, status or admin flag"""
+    principal_cache.delete(user_id)
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -127,6 +371,1273 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Read Replicas
+def read_replica(f):
+    """Serve a read-only view's plain SELECTs from a replica, when any are configured"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        keys = replica_keys(app.config['SQLALCHEMY_BINDS'])
+        # Just after a write the user reads from the primary, where that write already is
+        if keys and session.get('primary_until', 0) < time.time():
+            db.session.info['replica_bind'] = random.choice(keys)
+        return f(*args, **kwargs)
+    return decorated_function
+
+@app.after_request
+def stick_to_primary_after_write(response):
+    if db.session.info.get('wrote') and replica_keys(app.config['SQLALCHEMY_BINDS']):
+        session['primary_until'] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+# Static Assets
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# source path -> fingerprinted dist/ path; empty until `flask assets-build` has run
+asset_manifest = load_manifest(app.static_folder)
+fingerprinted_assets = set(asset_manifest.values())
+
+def set_asset_manifest(manifest):
+    global asset_manifest, fingerprinted_assets
+    asset_manifest = manifest
+    fingerprinted_assets = set(manifest.values())
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    """Make url_for('static', filename=...) point at the built, hashed copy"""
+    if endpoint == 'static':
+        built = asset_manifest.get(values.get('filename'))
+        if built:
+            values['filename'] = built
+
+@app.template_global()
+def asset_urls(bundle):
+    """URLs to load a bundle: the built file, or its separate sources before a build"""
+    if bundle in asset_manifest:
+        return [url_for('static', filename=bundle)]
+    return [url_for('static', filename=member) for member in BUNDLES[bundle]]
+
+def serve_static(filename):
+    """Flask's static view, plus precompressed, immutable responses for built assets"""
+    if filename not in fingerprinted_assets:
+        return app.send_static_file(filename)
+
+    for encoding, suffix in PRECOMPRESSED:
+        if request.accept_encodings[encoding] and os.path.exists(os.path.join(app.static_folder, filename + suffix)):
+            response = send_from_directory(app.static_folder, filename + suffix,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = app.send_static_file(filename)
+    # The name changes whenever the content does, so it can be cached for good
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = ASSET_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+app.view_functions['static'] = serve_static
+
+# Instrumentation
+instrumentation = Instrumentation()
+
+def has_instrumentation_token():
+    token = app.config['INSTRUMENTATION_TOKEN']
+    return bool(token) and request.headers.get('Authorization') == f'Bearer {token}'
+
+def profile_requested():
+    """Profiler kind for this request: asked for with an X-Profile header, or sampled"""
+    kind = request.headers.get('X-Profile')
+    if kind and (has_instrumentation_token() or is_admin()):
+        return kind
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < rate:
+        return 'cprofile'
+    return None
+
+def start_request_instrumentation():
+    instrumentation.begin(request.method, request.path)
+    kind = profile_requested()
+    if kind:
+        g.profiler = Profiler(kind)
+        g.profiler.start()
+
+def finish_request_instrumentation(response):
+    profiler = g.pop('profiler', None)
+    report = profiler.stop() if profiler else None
+    record = instrumentation.finish(request.endpoint, response.status_code)
+    if record and report:
+        instrumentation.add_profile(record, profiler.kind, report)
+        response.headers['X-Profile-Id'] = str(record.profile_id)
+    return response
+
+def abandon_request_instrumentation(error):
+    # after_request does not run when the view raised
+    profiler = g.pop('profiler', None)
+    if profiler:
+        profiler.stop()
+    if error is not None:
+        instrumentation.finish(request.endpoint, 500)
+
+def install_instrumentation():
+    instrumentation.slow_query_seconds = app.config['SLOW_QUERY_MS'] / 1000
+    if start_request_instrumentation in app.before_request_funcs.get(None, []):
+        return
+    app.before_request(start_request_instrumentation)
+    app.after_request(finish_request_instrumentation)
+    app.teardown_request(abandon_request_instrumentation)
+    event.listen(Engine, 'before_cursor_execute', instrumentation.before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', instrumentation.after_cursor_execute)
+    event.listen(Engine, 'handle_error', instrumentation.handle_error)
+    before_render_template.connect(instrumentation.before_render_template, app)
+    template_rendered.connect(instrumentation.template_rendered, app)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint for the instrumentation token or an admin session.
+
+    There is no localhost exemption: behind a reverse proxy every request
+    comes from 127.0.0.1.
+    """
+    if not app.config['INSTRUMENTATION']:
+        abort(404)
+    if not (has_instrumentation_token() or is_admin()):
+        abort(403)
+    return app.response_class(instrumentation.prometheus(), mimetype='text/plain; version=0.0.4')
+
+# Catalog Listing
+CATALOG_PAGE_SIZE = 24
+CATALOG_MAX_PAGE_SIZE = 96
+
+CATALOG_FILTERS = {
+    'popular': 'Popular Items',
+    'new': 'New Arrivals',
+    'deals': 'Best Deals'
+}
+
+# sort name -> (sort key column, descending)
+CATALOG_SORTS = {
+    'newest': (Item.created_at, True),
+    'price-low': (Item.price_paise, False),
+    'price-high': (Item.price_paise, True),
+    'name': (Item.title, False)
+}
+
+def encode_cursor(sort, key, item_id):
+    """Opaque keyset cursor holding the last row's sort key and id"""
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    payload = json.dumps([sort, key, item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+# sort name -> parser for the key stored in its cursors
+CURSOR_KEY_TYPES = {
+    'newest': datetime.fromisoformat,
+    'price-low': int,
+    'price-high': int,
+    'name': str,
+    'orders': datetime.fromisoformat
+}
+
+def decode_cursor(cursor, sort):
+    """Return (key, id) from a cursor, or None if it is missing or invalid"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, key, item_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if cursor_sort != sort:
+            return None
+        if key is not None:
+            key = CURSOR_KEY_TYPES[sort](key)
+        return key, int(item_id)
+    except (ValueError, TypeError, KeyError):
+        return None
+
+def catalog_params(args):
+    """Normalize listing query-string arguments"""
+    sort = args.get('sort', 'newest')
+    if sort not in CATALOG_SORTS:
+        sort = 'newest'
+
+    filter_type = args.get('filter', '')
+    section = CATALOG_FILTERS.get(filter_type)
+    if not section and args.get('section') in CATALOG_FILTERS.values():
+        section = args.get('section')
+
+    try:
+        limit = min(max(int(args.get('limit', CATALOG_PAGE_SIZE)), 1), CATALOG_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = CATALOG_PAGE_SIZE
+
+    return {
+        'section': section,
+        'sort': sort,
+        'min_price': parse_price(args.get('min_price') or None),
+        'max_price': parse_price(args.get('max_price') or None),
+        'in_stock': args.get('in_stock') in ('1', 'true', 'on'),
+        'cursor': args.get('cursor'),
+        'limit': limit
+    }
+
+def filtered_catalog(section=None, min_price=None, max_price=None, in_stock=False):
+    query = Item.query
+    if section:
+        query = query.filter(Item.section == section)
+    if in_stock:
+        query = query.filter(Item.in_stock.is_(True))
+    if min_price is not None:
+        query = query.filter(Item.price_paise >= min_price)
+    if max_price is not None:
+        query = query.filter(Item.price_paise <= max_price)
+    return query
+
+def query_catalog(section=None, sort='newest', min_price=None, max_price=None,
+                  in_stock=False, cursor=None, limit=CATALOG_PAGE_SIZE):
+    """One keyset-paginated page of products.
+
+    Prices are in paise. Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    key, descending = CATALOG_SORTS[sort]
+
+    query = filtered_catalog(section, min_price, max_price, in_stock).add_columns(key)
+
+    position = decode_cursor(cursor, sort)
+    if position:
+        last_key, last_id = position
+        if descending:
+            query = query.filter(db.or_(key < last_key, db.and_(key == last_key, Item.id < last_id)))
+        else:
+            query = query.filter(db.or_(key > last_key, db.and_(key == last_key, Item.id > last_id)))
+
+    if descending:
+        query = query.order_by(key.desc(), Item.id.desc())
+    else:
+        query = query.order_by(key.asc(), Item.id.asc())
+
+    rows = query.limit(limit + 1).all()
+    items = [item for item, _ in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last_item, last_key = rows[limit - 1]
+        next_cursor = encode_cursor(sort, last_key, last_item.id)
+    return items, next_cursor
+
+# Order History
+ORDERS_PAGE_SIZE = 10
+
+def order_summaries(user_id, cursor=None, limit=ORDERS_PAGE_SIZE):
+    """Newest-first page of (id, created_at, status, total_amount, item_count) rows.
+
+    Keyset-paginated over the (user_id, created_at, id) index; returns (rows, next_cursor).
+    """
+    item_count = db.select(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)) \
+        .where(OrderItem.order_id == Order.id).scalar_subquery()
+    query = db.session.query(Order.id, Order.created_at, Order.status, Order.total_amount,
+                             item_count.label('item_count')).filter(Order.user_id == user_id)
+
+    position = decode_cursor(cursor, 'orders')
+    if position:
+        last_created, last_id = position
+        query = query.filter(db.or_(Order.created_at < last_created,
+                                    db.and_(Order.created_at == last_created, Order.id < last_id)))
+
+    rows = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor('orders', last.created_at, last.id)
+    return rows[:limit], next_cursor
+
+def item_to_dict(item):
+    return {
+        'id': item.id,
+        'title': item.title,
+        'price': format_price(item.price_paise),
+        'price_paise': item.price_paise,
+        'image': url_for('static', filename=item.image),
+        'image_srcset': {fmt: srcset_filter(variants) for fmt, variants in (item.image_variants or {}).items()},
+        'section': item.section,
+        'description': item.description,
+        'in_stock': item.in_stock,
+        'url': product_url(item.id, item.title)
+    }
+
+# Product Search
+SEARCH_PAGE_SIZE = 24
+
+# In-process fallback for databases without FULLTEXT support (SQLite in development).
+# Built lazily on the first search, kept current by the admin product routes in this
+# process and rebuilt when the catalog version shows another process changed the catalog.
+# Rebuilds fill a new index and swap it in, so searches never see a partial one.
+search_index = SearchIndex()
+search_index_lock = threading.Lock()  # one rebuild at a time
+
+# Autocomplete phrases (titles and sections); rebuilt when stale or the catalog version moves
+suggestion_index = SuggestionIndex()
+SUGGESTION_LIMIT = 8
+
+def use_fulltext_search():
+    return db.engine.dialect.name == 'mysql'
+
+def build_search_index(version):
+    """Index the whole catalog into a new SearchIndex, swap it in and return it"""
+    global search_index
+    with search_index_lock:
+        if search_index.built and search_index.catalog_version == version:
+            return search_index  # built by a request that held the lock first
+        index = SearchIndex()
+        rows = db.session.query(Item.id, Item.title, Item.description, Item.section).yield_per(1000)
+        for item_id, title, description, section in rows:
+            index.add(item_id, title, description, section)
+        index.built = True
+        index.catalog_version = version
+        search_index = index
+        return index
+
+def index_item(item):
+    """Add or refresh a product in the search indexes after it is committed"""
+    if search_index.built:
+        search_index.add(item.id, item.title, item.description, item.section)
+    suggestion_index.stale = True
+
+def unindex_item(item_id):
+    search_index.remove(item_id)
+    suggestion_index.stale = True
+
+def refresh_suggestions():
+    version = catalog_version()
+    if suggestion_index.stale or suggestion_index.catalog_version != version:
+        products = db.session.query(Item.id, Item.title).all()
+        sections = [section for (section,) in db.session.query(Item.section).distinct()]
+        suggestion_index.rebuild(products, sections)
+        suggestion_index.catalog_version = version
+
+def search_products(query, page=1, per_page=SEARCH_PAGE_SIZE):
+    """Relevance-ranked page of products matching query. Returns (items, total)"""
+    offset = (page - 1) * per_page
+
+    if use_fulltext_search():
+        terms = mysql_boolean_query(query)
+        if not terms:
+            return [], 0
+        relevance = mysql_match(Item.title, Item.description, Item.section, against=terms).in_boolean_mode()
+        matches = Item.query.filter(relevance)
+        total = matches.count()
+        items = matches.order_by(relevance.desc(), Item.id.desc()).offset(offset).limit(per_page).all()
+        return items, total
+
+    version = catalog_version()
+    index = search_index
+    if not index.built or index.catalog_version != version:
+        index = build_search_index(version)
+    ids, total = index.search(query, limit=per_page, offset=offset)
+    if not ids:
+        return [], total
+    by_id = {item.id: item for item in Item.query.filter(Item.id.in_(ids))}
+    return [by_id[item_id] for item_id in ids if item_id in by_id], total
+
+# Catalog Cache
+HOME_SECTIONS = ["Popular Items", "New Arrivals", "Best Deals"]
+HOME_SECTION_SIZE = 6
+HOME_CACHE_TTL = 300
+
+# Read-mostly catalog data shared across requests; invalidated by the admin product routes
+catalog_cache = TTLCache(default_ttl=HOME_CACHE_TTL)
+
+def item_snapshot(item):
+    """Plain dict copy of an item that is safe to cache outside the request session"""
+    return {column.name: getattr(item, column.name) for column in Item.__table__.columns}
+
+def product_saved(item, previous_section=None):
+    """Refresh search indexes and cached catalog data after an item is committed"""
+    index_item(item)
+    catalog_cache.invalidate()
+    invalidate_item_caches([item.id], sections=(item.section, previous_section))
+
+def product_deleted(item_id, section=None):
+    unindex_item(item_id)
+    catalog_cache.invalidate()
+    invalidate_item_caches([item_id], sections=(section,))
+
+def load_home_sections():
+    """First HOME_SECTION_SIZE items and the item count of every home section in one query"""
+    ranked = db.session.query(
+        Item,
+        db.func.row_number().over(partition_by=Item.section, order_by=Item.id).label('position'),
+        db.func.count().over(partition_by=Item.section).label('section_count')
+    ).filter(Item.section.in_(HOME_SECTIONS)).subquery()
+    ranked_item = db.aliased(Item, ranked)
+
+    rows = db.session.query(ranked_item, ranked.c.section_count) \
+        .filter(ranked.c.position <= HOME_SECTION_SIZE) \
+        .order_by(ranked.c.section, ranked.c.position).all()
+
+    sections = {title: {"title": title, "cards": [], "total_count": 0} for title in HOME_SECTIONS}
+    for item, section_count in rows:
+        sections[item.section]["cards"].append(item_snapshot(item))
+        sections[item.section]["total_count"] = section_count
+    return [sections[title] for title in HOME_SECTIONS]
+
+def home_sections():
+    return catalog_cache.get_or_set(('home_sections', catalog_version()), load_home_sections)
+
+# Product Card Fragments
+CARD_CACHE_TTL = 600
+
+# (item id, catalog version, signed in, sizes, compact) -> rendered card HTML, tagged with the
+# item. catalog_version() moves on every product change in any process, so stale cards are
+# never read again; any change re-renders every card, as it changes every page's ETag.
+card_cache = TTLCache(default_ttl=CARD_CACHE_TTL, max_entries=5000)
+
+@app.template_global()
+def product_card(item, sizes=None, compact=False):
+    """An item's card from product_card.html, rendered once per catalog version"""
+    item_id = item['id'] if isinstance(item, dict) else item.id
+    signed_in = 'user' in session
+    options = {'signed_in': signed_in, 'compact': compact}
+    if sizes:
+        options['sizes'] = sizes
+
+    def render():
+        macro = app.jinja_env.get_template('product_card.html').module.product_card
+        return str(macro(item, **options))
+    key = ('card', item_id, catalog_version(), signed_in, sizes, compact)
+    return Markup(card_cache.get_or_set(key, render, tags=[('item', item_id)]))
+
+# Product Detail Cache
+PRODUCT_CACHE_TTL = 600
+SIMILAR_ITEMS_LIMIT = 4
+
+# (item id, catalog version) -> {'item', 'similar_items'} snapshots, tagged with every item
+# shown and the section so this process's own changes free the entries straight away
+product_cache = TTLCache(default_ttl=PRODUCT_CACHE_TTL, max_entries=5000)
+
+def invalidate_item_caches(item_ids, sections=()):
+    """Drop this process's cached cards and product pages that show any of item_ids,
+    and product pages of sections"""
+    tags = [('item', item_id) for item_id in item_ids]
+    card_cache.invalidate_tags(*tags)
+    product_cache.invalidate_tags(*tags, *(('section', section) for section in sections))
+
+def load_similar_items(item):
+    """Precomputed recommendations, topped up from the item's section while it has too few"""
+    similar_items = Item.query.join(ItemRecommendation, ItemRecommendation.recommended_item_id == Item.id) \
+        .filter(ItemRecommendation.item_id == item.id).order_by(ItemRecommendation.position) \
+        .limit(SIMILAR_ITEMS_LIMIT).all()
+    if len(similar_items) < SIMILAR_ITEMS_LIMIT:
+        shown = [item.id] + [similar_item.id for similar_item in similar_items]
+        similar_items += Item.query.filter_by(section=item.section).filter(Item.id.notin_(shown)) \
+            .order_by(Item.id).limit(SIMILAR_ITEMS_LIMIT - len(similar_items)).all()
+    return similar_items
+
+def product_detail(item_id):
+    """Cached item and similar items snapshots for a product page, or None"""
+    key = (item_id, catalog_version())
+    detail = product_cache.get(key)
+    if detail is None:
+        item = db.session.get(Item, item_id)
+        if not item:
+            return None
+        similar_items = load_similar_items(item)
+        detail = {
+            'item': item_snapshot(item),
+            'similar_items': [item_snapshot(similar_item) for similar_item in similar_items]
+        }
+        tags = [('item', item.id), ('section', item.section)]
+        tags += [('item', similar_item.id) for similar_item in similar_items]
+        product_cache.set(key, detail, tags=tags)
+    return detail
+
+# Recommendations
+RECOMMENDATIONS_PER_ITEM = 12
+CART_RECOMMENDATIONS_LIMIT = 4
+RECOMMENDATION_INSERT_BATCH = 5000
+
+def purchase_history():
+    """(signal, basket, item id) rows for recommendations.top_neighbours"""
+    for order_id, item_id in db.session.query(OrderItem.order_id, OrderItem.item_id):
+        yield 'order', order_id, item_id
+    for user_id, item_id in db.session.query(Wishlist.user_id, Wishlist.item_id):
+        yield 'wishlist', user_id, item_id
+    for user_id, item_id in db.session.query(Cart.user_id, Cart.item_id):
+        yield 'cart', user_id, item_id
+
+def build_recommendations(full=False):
+    """Recompute stored recommendations; returns the RecommendationBuild recorded.
+
+    After a first full build, only the lists new orders can change are
+    recomputed (against the whole history): those of items on orders placed
+    since the last build, and of every item sharing a basket with one of
+    them, whose scores against it moved. Wishlist and cart changes alone
+    wait for the next full build.
+    """
+    started = time.perf_counter()
+    last_build = RecommendationBuild.query.order_by(RecommendationBuild.id.desc()).first()
+    # Read before the history, so an order placed meanwhile is counted again next time
+    last_order_id = db.session.query(db.func.max(Order.id)).scalar() or 0
+    full = full or last_build is None
+
+    items = None
+    if not full:
+        ordered = {item_id for (item_id,) in db.session.query(OrderItem.item_id)
+                   .filter(OrderItem.order_id > last_build.last_order_id).distinct()}
+        items = cooccurring(purchase_history(), ordered) if ordered else set()
+    neighbours = {}
+    if items is None or items:
+        neighbours = top_neighbours(purchase_history(), items, RECOMMENDATIONS_PER_ITEM)
+
+    if full:
+        db.session.execute(db.delete(ItemRecommendation))
+    else:
+        for batch in batched(sorted(items), RECOMMENDATION_INSERT_BATCH):
+            db.session.execute(db.delete(ItemRecommendation).where(ItemRecommendation.item_id.in_(batch)))
+    rows = ({'item_id': item_id, 'position': position, 'recommended_item_id': other, 'score': score}
+            for item_id, others in neighbours.items() for position, (other, score) in enumerate(others))
+    for batch in batched(rows, RECOMMENDATION_INSERT_BATCH):
+        db.session.execute(db.insert(ItemRecommendation), batch)
+
+    build = RecommendationBuild(full=full, last_order_id=last_order_id, items_updated=len(neighbours),
+                                vectorized=recommendations_vectorized(),
+                                duration_ms=int((time.perf_counter() - started) * 1000))
+    db.session.add(build)
+    bump_catalog_revision()  # product pages show the new lists
+    db.session.commit()
+    if full:
+        product_cache.invalidate()
+    else:
+        invalidate_item_caches(items)
+    return build
+
+def cart_recommendations(item_ids, limit=CART_RECOMMENDATIONS_LIMIT):
+    """In-stock items most recommended alongside the given ones, excluding them"""
+    if not item_ids:
+        return []
+    ranked = db.session.query(ItemRecommendation.recommended_item_id,
+                              db.func.sum(ItemRecommendation.score).label('score')) \
+        .filter(ItemRecommendation.item_id.in_(item_ids), ItemRecommendation.recommended_item_id.notin_(item_ids)) \
+        .group_by(ItemRecommendation.recommended_item_id).subquery()
+    return Item.query.join(ranked, ranked.c.recommended_item_id == Item.id) \
+        .filter(Item.in_stock.is_(True)).order_by(ranked.c.score.desc(), Item.id).limit(limit).all()
+
+# Sales Analytics
+SALES_ROLLUP_BATCH_ORDERS = 1000
+SALES_ROLLUP_SETTLE_SECONDS = 60  # newer orders may still be committing, so they wait for the next run
+SALES_REPORT_DAYS = (7, 30, 90)
+TOP_SELLERS_LIMIT = 10
+
+# rollup name in analytics.py -> (model, unique key columns)
+SALES_ROLLUPS = {
+    'store': (SalesDaily, ('day',)),
+    'section': (SalesDailySection, ('day', 'section')),
+    'item': (SalesDailyItem, ('day', 'item_id'))
+}
+
+def add_to_rollup(model, key_columns, rows):
+    """Add rows' measures onto the stored ones in a single upsert"""
+    measures = ('orders', 'units', 'revenue_paise')
+    if db.engine.dialect.name == 'mysql':
+        statement = mysql_insert(model)
+        statement = statement.on_duplicate_key_update(
+            {column: getattr(model, column) + statement.inserted[column] for column in measures})
+    else:
+        statement = sqlite_insert(model)
+        statement = statement.on_conflict_do_update(
+            index_elements=[getattr(model, column) for column in key_columns],
+            set_={column: getattr(model, column) + statement.excluded[column] for column in measures})
+    db.session.execute(statement, rows)
+
+def roll_up_sales(rebuild=False):
+    """Add orders placed since the last run into the daily rollups; returns the number of orders added.
+
+    Each batch of orders is added in the same transaction that moves the
+    watermark, and only if no other run moved it first, so an order is
+    counted exactly once even when runs overlap or fail halfway.
+    """
+    insert_if_absent(SalesRollupState, id=1, last_order_id=0)
+    if rebuild:
+        for model, _ in SALES_ROLLUPS.values():
+            db.session.execute(db.delete(model))
+        db.session.execute(db.update(SalesRollupState).where(SalesRollupState.id == 1).values(last_order_id=0))
+    db.session.commit()
+
+    utc_offset = app.config['ANALYTICS_UTC_OFFSET_MINUTES']
+    settled = datetime.utcnow() - timedelta(seconds=SALES_ROLLUP_SETTLE_SECONDS)
+    added = 0
+    while True:
+        last_order_id = db.session.get(SalesRollupState, 1, populate_existing=True).last_order_id
+        candidates = db.session.query(Order.id, Order.created_at).filter(Order.id > last_order_id) \
+            .order_by(Order.id).limit(SALES_ROLLUP_BATCH_ORDERS).all()
+        order_ids = []
+        for order_id, created_at in candidates:
+            if created_at > settled:
+                break
+            order_ids.append(order_id)
+        if not order_ids:
+            return added
+
+        claimed = db.session.execute(
+            db.update(SalesRollupState)
+            .where(SalesRollupState.id == 1, SalesRollupState.last_order_id == last_order_id)
+            .values(last_order_id=order_ids[-1], updated_at=datetime.utcnow())
+        ).rowcount
+        if not claimed:
+            db.session.rollback()  # another run added these orders
+            continue
+        lines = db.session.query(Order.id, Order.created_at, OrderItem.item_id, Item.section,
+                                 OrderItem.quantity, OrderItem.price) \
+            .join(OrderItem, OrderItem.order_id == Order.id).join(Item, Item.id == OrderItem.item_id) \
+            .filter(Order.id.in_(order_ids))
+        for name, rows in rollup(lines, utc_offset).items():
+            if rows:
+                model, key_columns = SALES_ROLLUPS[name]
+                add_to_rollup(model, key_columns, rows)
+        db.session.commit()
+        added += len(order_ids)
+
+def sales_report(days):
+    """Dashboard figures for the last days days, read from the rollup tables only"""
+    last_day = local_day(datetime.utcnow(), app.config['ANALYTICS_UTC_OFFSET_MINUTES'])
+    first_day = last_day - timedelta(days=days - 1)
+
+    by_day = {row.day: row for row in SalesDaily.query.filter(SalesDaily.day.between(first_day, last_day))}
+    daily = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        row = by_day.get(day)
+        daily.append({'day': day.isoformat(), 'orders': row.orders if row else 0, 'units': row.units if row else 0,
+                      'revenue_paise': row.revenue_paise if row else 0})
+
+    measures = (db.func.sum(SalesDailySection.orders), db.func.sum(SalesDailySection.units),
+                db.func.sum(SalesDailySection.revenue_paise))
+    sections = [{'section': section, 'orders': int(orders), 'units': int(units), 'revenue_paise': int(revenue)}
+                for section, orders, units, revenue in db.session.query(SalesDailySection.section, *measures)
+                .filter(SalesDailySection.day.between(first_day, last_day))
+                .group_by(SalesDailySection.section).order_by(measures[2].desc())]
+
+    units = db.func.sum(SalesDailyItem.units)
+    top = db.session.query(SalesDailyItem.item_id, db.func.max(SalesDailyItem.section), units,
+                           db.func.sum(SalesDailyItem.revenue_paise)) \
+        .filter(SalesDailyItem.day.between(first_day, last_day)) \
+        .group_by(SalesDailyItem.item_id).order_by(units.desc(), SalesDailyItem.item_id).limit(TOP_SELLERS_LIMIT).all()
+    titles = dict(db.session.query(Item.id, Item.title).filter(Item.id.in_([row[0] for row in top]))) if top else {}
+    top_sellers = [{'item_id': item_id, 'title': titles.get(item_id, f'Item {item_id}'), 'section': section,
+                    'units': int(units), 'revenue_paise': int(revenue)}
+                   for item_id, section, units, revenue in top]
+
+    orders = sum(day['orders'] for day in daily)
+    revenue = sum(day['revenue_paise'] for day in daily)
+    state = db.session.get(SalesRollupState, 1)
+    return {
+        'days': days,
+        'first_day': first_day.isoformat(),
+        'last_day': last_day.isoformat(),
+        'totals': {'orders': orders, 'units': sum(day['units'] for day in daily), 'revenue_paise': revenue,
+                   'average_order_paise': revenue // orders if orders else 0},
+        'daily': daily,
+        'sections': sections,
+        'top_sellers': top_sellers,
+        'rolled_up_at': state.updated_at.isoformat() if state and state.updated_at else None
+    }
+
+# Header State
+HEADER_CACHE_TTL = 300
+
+# Per-user cart / wishlist badge counts, written through by the cart, wishlist and order routes
+header_cache = TTLCache(default_ttl=HEADER_CACHE_TTL, max_entries=10000)
+
+def header_counts(user_id):
+    def load():
+        cart_count, wishlist_count = db.session.query(
+            db.select(db.func.count(Cart.id)).where(Cart.user_id == user_id).scalar_subquery(),
+            db.select(db.func.count(Wishlist.id)).where(Wishlist.user_id == user_id).scalar_subquery()
+        ).one()
+        return {'cart_count': cart_count, 'wishlist_count': wishlist_count}
+    return header_cache.get_or_set(user_id, load)
+
+def update_header_counts(user_id, **deltas):
+    """Adjust cached counts by deltas, e.g. cart_count=1; uncached users load on next read"""
+    counts = header_cache.get(user_id)
+    if counts is not None:
+        header_cache.set(user_id, {key: max(value + deltas.get(key, 0), 0) for key, value in counts.items()})
+
+def set_header_counts(user_id, **values):
+    """Store counts the caller already knows exactly, e.g. cart_count=len(cart_items)"""
+    counts = header_cache.get(user_id)
+    if counts is not None:
+        header_cache.set(user_id, {**counts, **values})
+
+@app.context_processor
+def inject_header_state():
+    if 'user' not in session:
+        return {'cart_count': 0, 'wishlist_count': 0}
+    return header_counts(session['user']['id'])
+
+# Conditional Requests
+CATALOG_SHARED_MAX_AGE = 60   # seconds a reverse proxy may serve an anonymous page unchecked
+
+# Templates and assets can change on restart, so validators from an older process never match
+APP_STARTED_AT = datetime.utcnow().replace(microsecond=0)
+
+def bump_catalog_revision():
+    """Count a catalog change; call inside the transaction that makes it, before the commit.
+
+    The row lock this takes is held until that commit, so concurrent
+    changes each get their own revision and none can be missed.
+    """
+    bump = db.update(CatalogRevision).where(CatalogRevision.id == 1) \
+        .values(revision=CatalogRevision.revision + 1, changed_at=datetime.utcnow())
+    if not db.session.execute(bump).rowcount:
+        insert_if_absent(CatalogRevision, id=1, revision=0)  # first change since the table was created
+        db.session.execute(bump)
+    g.pop('catalog_state', None)
+
+def catalog_state():
+    """ETag and Last-Modified for pages built from the catalog.
+
+    Derived from the catalog revision, which every product change moves
+    in its own transaction, so the ETag changes exactly when the catalog
+    does. Read once per request.
+    """
+    state = g.get('catalog_state')
+    if state is None:
+        revision, changed_at = db.session.query(CatalogRevision.revision, CatalogRevision.changed_at) \
+            .filter_by(id=1).one_or_none() or (0, None)
+        last_modified = max(changed_at or APP_STARTED_AT, APP_STARTED_AT).replace(microsecond=0)
+        digest = hashlib.sha256(f'{revision}:{APP_STARTED_AT}'.encode()).hexdigest()
+        state = g.catalog_state = {'etag': digest[:32], 'last_modified': last_modified}
+    return state
+
+@app.before_request
+def forget_catalog_state():
+    # Requests can share an app context (tests, CLI); each one reads the revision afresh
+    g.pop('catalog_state', None)
+
+def catalog_version():
+    """Changes whenever any process adds, edits or deletes a product"""
+    return catalog_state()['etag']
+
+def is_cacheable_request():
+    """Anonymous GET without pending flash messages: the page is the same for everyone"""
+    return request.method == 'GET' and 'user' not in session and '_flashes' not in session
+
+def not_modified(state):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(state['etag'])
+    if request.if_modified_since:
+        return state['last_modified'].replace(tzinfo=timezone.utc) <= request.if_modified_since
+    return False
+
+def catalog_page(f):
+    """Answer anonymous catalog page requests with 304 while the catalog is unchanged.
+
+    Signed-in users get personalised pages (cart counts, wishlist), so
+    those are only marked Vary: Cookie and never validated.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not is_cacheable_request():
+            response = make_response(f(*args, **kwargs))
+            response.vary.add('Cookie')
+            return response
+
+        state = catalog_state()
+        if not_modified(state):
+            response = make_response('', 304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(state['etag'])
+        response.last_modified = state['last_modified'].replace(tzinfo=timezone.utc)
+        response.cache_control.public = True
+        response.cache_control.max_age = 0
+        response.cache_control.s_maxage = CATALOG_SHARED_MAX_AGE
+        response.cache_control.must_revalidate = True
+        response.vary.add('Cookie')
+        return response
+    return decorated_function
+
+# Image Storage
+def image_ref_count(image_path):
+    """Products and profiles using an image file"""
+    return (Item.query.filter_by(image=image_path).count()
+            + User.query.filter_by(profile_image=image_path).count())
+
+def release_image(image_path):
+    """Delete an uploaded image (and its variants) once nothing references it.
+
+    Call after the commit that dropped the reference. Site artwork in the
+    same folder is never deleted.
+    """
+    if not image_path or not is_managed_upload(image_path) or image_ref_count(image_path):
+        return 0
+    prefix = variant_prefix(image_path)
+    # An identical file under another name (say a legacy upload) may still use the variants
+    keep_variants = bool(prefix) and variants_ref_count(prefix) > 0
+    return delete_image_files(app.static_folder, image_path, keep_variants=keep_variants)
+
+def variants_ref_count(prefix):
+    """Products and profiles whose stored variants include paths starting with prefix"""
+    return sum(
+        db.session.execute(
+            db.select(db.func.count()).select_from(model)
+            .where(db.cast(getattr(model, variants_column), db.Text).contains(prefix))
+        ).scalar()
+        for model, _, variants_column in IMAGE_JOB_TARGETS.values()
+    )
+
+def known_variants(image_path):
+    """Variants already made for a stored image, e.g. by an identical earlier upload"""
+    for model, image_column, variants_column in IMAGE_JOB_TARGETS.values():
+        variants = db.session.execute(
+            db.select(getattr(model, variants_column))
+            .where(getattr(model, image_column) == image_path, getattr(model, variants_column).isnot(None))
+            .limit(1)
+        ).scalar()
+        if variants:
+            return variants
+    return None
+
+# Image Processing Jobs
+IMAGE_JOB_MAX_ATTEMPTS = 3
+IMAGE_JOB_TIMEOUT = 600  # seconds a job may stay running before it is assumed lost
+
+# job kind -> (model, image column, variants column)
+IMAGE_JOB_TARGETS = {
+    'item': (Item, 'image', 'image_variants'),
+    'user': (User, 'profile_image', 'profile_image_variants')
+}
+
+def attach_image(kind, target, image_path):
+    """Point a product / user at an uploaded image and queue its variants.
+
+    Reuses the variants of an identical earlier upload instead. Returns
+    True if a job was queued; call start_image_jobs() after committing.
+    """
+    _, image_column, variants_column = IMAGE_JOB_TARGETS[kind]
+    setattr(target, image_column, image_path)
+    variants = known_variants(image_path)
+    setattr(target, variants_column, variants)
+    if variants:
+        return False
+    db.session.flush()
+    enqueue_image_job(kind, target.id, image_path)
+    return True
+
+def enqueue_image_job(kind, target_id, image_path):
+    """Add a job to the session; call start_image_jobs() once it is committed"""
+    job = ImageJob(kind=kind, target_id=target_id, image_path=image_path)
+    db.session.add(job)
+    return job
+
+def claim_image_jobs(limit):
+    """Mark up to limit queued jobs as running and return their (id, worker args)"""
+    with app.app_context():
+        candidates = db.session.execute(
+            db.select(ImageJob.id, ImageJob.image_path)
+            .filter_by(status='queued').order_by(ImageJob.id).limit(limit)
+        ).all()
+        claimed = []
+        for job_id, image_path in candidates:
+            # Conditional update: another process may have claimed the job first
+            result = db.session.execute(
+                db.update(ImageJob)
+                .where(ImageJob.id == job_id, ImageJob.status == 'queued')
+                .values(status='running', started_at=datetime.utcnow(), attempts=ImageJob.attempts + 1)
+            )
+            if result.rowcount == 1:
+                claimed.append((job_id, (app.static_folder, image_path)))
+        db.session.commit()
+        return claimed
+
+def complete_image_job(job_id, result, error):
+    with app.app_context():
+        job = db.session.get(ImageJob, job_id)
+        job.finished_at = datetime.utcnow()
+        if error is not None:
+            print(f"Image job {job_id} ({job.image_path}) failed: {error}")
+            job.error = str(error)
+            job.status = 'queued' if job.attempts < IMAGE_JOB_MAX_ATTEMPTS else 'failed'
+            db.session.commit()
+            return
+
+        job.status = 'done'
+        job.error = None
+        job.content_hash = result['content_hash']
+        job.duplicate = result['duplicate']
+        model, image_column, variants_column = IMAGE_JOB_TARGETS[job.kind]
+        target = db.session.get(model, job.target_id)
+        # Skip targets deleted or given a newer image while the job ran
+        updated = target is not None and getattr(target, image_column) == job.image_path
+        if updated:
+            setattr(target, variants_column, result['variants'])
+            if job.kind == 'item':
+                bump_catalog_revision()
+        db.session.commit()
+
+        if updated and job.kind == 'item':
+            catalog_cache.invalidate()
+            invalidate_item_caches([target.id], sections=(target.section,))
+        elif updated and job.kind == 'user':
+            user_changed(target.id)
+
+def recover_image_jobs():
+    """Requeue jobs left running by a process that stopped mid-job"""
+    with app.app_context():
+        cutoff = datetime.utcnow() - timedelta(seconds=IMAGE_JOB_TIMEOUT)
+        result = db.session.execute(
+            db.update(ImageJob)
+            .where(ImageJob.status == 'running', ImageJob.started_at < cutoff)
+            .values(status='queued')
+        )
+        db.session.commit()
+        if result.rowcount:
+            print(f"Requeued {result.rowcount} interrupted image job(s)")
+
+def new_image_job_runner():
+    return JobRunner(claim_image_jobs, process_image, complete_image_job, recover_image_jobs,
+                     workers=max(app.config['IMAGE_JOB_WORKERS'], 1))
+
+image_jobs = None  # set by create_app()
+
+def start_image_jobs():
+    """Make sure this process is draining the queue, and check it now"""
+    if app.config['IMAGE_JOB_WORKERS']:
+        image_jobs.start()
+        image_jobs.wake()
+
+def image_job_to_dict(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'target_id': job.target_id,
+        'status': job.status,
+        'attempts': job.attempts,
+        'duplicate': job.duplicate,
+        'error': job.error,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+# Admin Product Grid
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 200
+ADMIN_BULK_MAX_IDS = 1000
+PRICE_ADJUST_LIMITS = (Decimal(-90), Decimal(500))  # percent
+PRICE_ADJUST_STEP = Decimal('0.01')  # percent; keeps the SQL multiplier a whole number
+
+# sort name -> column; every sort breaks ties on id in the same direction
+ADMIN_SORTS = {
+    'id': Item.id,
+    'title': Item.title,
+    'price': Item.price_paise,
+    'section': Item.section,
+    'stock': Item.stock_quantity,
+    'updated': Item.updated_at
+}
+
+def admin_grid_params(args):
+    """Normalize the admin grid's query-string (or bulk form) arguments"""
+    sort = args.get('sort', 'id')
+    if sort not in ADMIN_SORTS:
+        sort = 'id'
+    try:
+        page = max(int(args.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    try:
+        per_page = min(max(int(args.get('per_page', ADMIN_PAGE_SIZE)), 1), ADMIN_MAX_PAGE_SIZE)
+    except ValueError:
+        per_page = ADMIN_PAGE_SIZE
+    return {
+        'q': (args.get('q') or '').strip(),
+        'section': args.get('section') or None,
+        'stock': args.get('stock') if args.get('stock') in ('in', 'out') else None,
+        'sort': sort,
+        'descending': args.get('order', 'desc' if sort in ('id', 'updated') else 'asc') == 'desc',
+        'page': page,
+        'per_page': per_page
+    }
+
+def admin_grid_conditions(q=None, section=None, stock=None, **_):
+    conditions = []
+    if q:
+        conditions.append(db.or_(Item.title.contains(q, autoescape=True), Item.sku.contains(q, autoescape=True)))
+    if section:
+        conditions.append(Item.section == section)
+    if stock:
+        conditions.append(Item.in_stock.is_(stock == 'in'))
+    return conditions
+
+def admin_grid_page(params):
+    """One offset page of products for the admin grid. Returns (items, total).
+
+    Offset paging (unlike the storefront's keyset cursors) so admins can
+    jump to any page and sort by any column; the grid is admin-only and
+    pages stay small.
+    """
+    conditions = admin_grid_conditions(**params)
+    total = db.session.query(db.func.count(Item.id)).filter(*conditions).scalar()
+    key = ADMIN_SORTS[params['sort']]
+    order = (key.desc(), Item.id.desc()) if params['descending'] else (key.asc(), Item.id.asc())
+    items = Item.query.filter(*conditions).order_by(*order) \
+        .offset((params['page'] - 1) * params['per_page']).limit(params['per_page']).all()
+    return items, total
+
+def admin_item_to_dict(item, image_job_id=None):
+    return {
+        'id': item.id,
+        'sku': item.sku,
+        'title': item.title,
+        'price': format_price(item.price_paise),
+        'price_paise': item.price_paise,
+        'section': item.section,
+        'in_stock': item.in_stock,
+        'stock_quantity': item.stock_quantity,
+        'image': url_for('static', filename=smallest_variant(item.image_variants) or item.image),
+        'image_job_id': image_job_id,
+        'updated_at': item.updated_at.isoformat() if item.updated_at else None,
+        'url': product_url(item.id, item.title),
+        'edit_url': url_for('edit_product', product_id=item.id),
+        'delete_url': url_for('delete_product', product_id=item.id)
+    }
+
+def parse_bulk_value(action, value):
+    """The checked value for a bulk action; raises ValueError"""
+    if action == 'delete':
+        return None
+    if action == 'section':
+        if value not in HOME_SECTIONS:
+            raise ValueError('Please choose a section.')
+        return value
+    if action == 'in_stock':
+        if value not in ('1', '0'):
+            raise ValueError('Please choose in stock or out of stock.')
+        return value == '1'
+    if action == 'price':
+        try:
+            percent = Decimal((value or '').strip().rstrip('%'))
+            if not percent.is_finite():
+                raise InvalidOperation
+            percent = percent.quantize(PRICE_ADJUST_STEP, rounding=ROUND_HALF_UP)
+        except ArithmeticError:
+            raise ValueError('Please enter a percentage, e.g. -10 for 10% off.')
+        low, high = PRICE_ADJUST_LIMITS
+        if not low <= percent <= high or percent == 0:
+            raise ValueError(f'The price change must be between {low}% and {high}%, and not zero.')
+        return percent
+    raise ValueError('Unknown action.')
+
+def adjusted_price(column, percent):
+    """SQL for column changed by percent and rounded half up, in whole-number arithmetic.
+
+    percent has at most two decimals, so the new price is
+    (paise * (10000 + 100 * percent) + 5000) DIV 10000 with no floats involved.
+    """
+    scale = int(100 / PRICE_ADJUST_STEP)
+    multiplier = int((100 + percent) / PRICE_ADJUST_STEP)
+    return (column * multiplier + scale // 2) // scale
+
+def bulk_update_products(condition, action, value):
+    """Apply a bulk action to every product matching condition in set-based statements.
+
+    Returns (changed, skipped). Caches and search indexes are refreshed
+    once for the whole batch.
+    """
+    targets = db.session.query(Item).filter(condition)
+    # Product pages recommend items from other sections too, so entries go by item as well
+    affected = targets.with_entities(Item.id, Item.section).all()
+    sections = {section for _, section in affected}
+    now = datetime.utcnow().replace(microsecond=0)  # as MySQL DATETIME stores it, so it can be matched
+    skipped = 0
+    reindex = False
+
+    if action == 'delete':
+        # Products on past orders stay, so order history keeps its line items
+        ordered = db.exists().where(OrderItem.item_id == Item.id)
+        doomed = targets.filter(~ordered)
+        rows = doomed.with_entities(Item.id, Item.image).all()
+        skipped = targets.filter(ordered).count()
+        doomed_ids = doomed.with_entities(Item.id).scalar_subquery()
+        removed = db.session.execute(db.delete(Cart).where(Cart.item_id.in_(doomed_ids))).rowcount
+        removed += db.session.execute(db.delete(Wishlist).where(Wishlist.item_id.in_(doomed_ids))).rowcount
+        db.session.execute(db.delete(Item).where(condition, ~ordered).execution_options(synchronize_session=False))
+        bump_catalog_revision()
+        db.session.commit()
+        if removed:
+            header_cache.invalidate()
+        for item_id, _ in rows:
+            search_index.remove(item_id)
+        for image in {image for _, image in rows}:
+            release_image(image)
+        changed = len(rows)
+    elif action == 'section':
+        changed = db.session.execute(db.update(Item).where(condition).values(section=value, updated_at=now)
+                                     .execution_options(synchronize_session=False)).rowcount
+        sections.add(value)
+        reindex = True
+    elif action == 'in_stock':
+        statement = db.update(Item).where(condition).values(in_stock=value, updated_at=now)
+        if value:
+            # Counted stock at zero stays sold out until it is restocked
+            statement = statement.where(db.or_(Item.stock_quantity.is_(None), Item.stock_quantity > 0))
+            skipped = targets.filter(Item.stock_quantity == 0).count()
+        changed = db.session.execute(statement.execution_options(synchronize_session=False)).rowcount
+    else:
+        # One set-based UPDATE, so concurrent edits cannot be overwritten with stale prices
+        changed = db.session.execute(
+            db.update(Item).where(condition)
+            .values(price_paise=adjusted_price(Item.price_paise, value), updated_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        # The display string is formatted in Python from the stored paise. Each row is only
+        # written if its paise still match, so a newer change is never overwritten.
+        rows = [{'item_id': item_id, 'paise': paise, 'price': format_price(paise)}
+                for item_id, paise in db.session.query(Item.id, Item.price_paise).filter(Item.updated_at == now)]
+        if rows:
+            table = Item.__table__
+            db.session.execute(
+                db.update(table).where(table.c.id == db.bindparam('item_id'),
+                                       table.c.price_paise == db.bindparam('paise'))
+                .values(price=db.bindparam('price')),
+                rows
+            )
+
+    if action != 'delete':
+        bump_catalog_revision()
+        db.session.commit()
+    if reindex:
+        search_index.built = False
+    suggestion_index.stale = True
+    catalog_cache.invalidate()
+    invalidate_item_caches([item_id for item_id, _ in affected], sections)
+    return changed, skipped
+
+# Bulk Import / Export
+IMPORT_BATCH_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 100  # row errors reported back; later ones are only counted
+
+def import_update_columns(columns):
+    """Item columns an import writes over an existing product, given the optional columns present"""
+    updated_columns = ['title', 'price', 'price_paise', 'section', 'image', 'updated_at', *columns]
+    if 'stock_quantity' in columns:
+        updated_columns.append('in_stock')
+    return updated_columns
+
+def upsert_items(rows, columns):
+    """Insert or update a batch of validated rows by sku in one statement.
+
+    Returns (inserted, updated). Only the given optional columns are
+    written over an existing product's values.
+    """
+    if not rows:
+        return 0, 0
+    rows = list({row['sku']: row for row in rows}.values())  # last row wins within a batch
+    existing = {sku for (sku,) in db.session.query(Item.sku).filter(Item.sku.in_([row['sku'] for row in rows]))}
+    now = datetime.utcnow()
+    rows = [dict(row, created_at=now, updated_at=now) for row in rows]
+
+    updated_columns = import_update_columns(columns)
+    if db.engine.dialect.name == 'mysql':
+        statement = mysql_insert(Item)
+        statement = statement.on_duplicate_key_update({column: statement.inserted[column] for column in updated_columns})
+    else:
+        statement = sqlite_insert(Item)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Item.sku], set_={column: statement.excluded[column] for column in updated_columns})
+    db.session.execute(statement, rows)
+    return len(rows) - len(existing), len(existing)
+
+def update_items_by_id(rows, columns):
+    """Update existing products from validated rows without a sku, matched on id, in one executemany.
+
+    Returns (updated, ids of rows that match no product).
+    """
+    if not rows:
+        return 0, []
+    rows = list({row['id']: row for row in rows}.values())
+    existing = {item_id for (item_id,) in db.session.query(Item.id).filter(Item.id.in_([row['id'] for row in rows]))}
+    now = datetime.utcnow()
+    updated_columns = import_update_columns(columns)
+    matched = [dict({column: row[column] for column in updated_columns if column in row}, id=row['id'], updated_at=now)
+               for row in rows if row['id'] in existing]
+    if matched:
+        db.session.execute(db.update(Item), matched)
+    return len(matched), [row['id'] for row in rows if row['id'] not in existing]
+
+def catalog_imported():
+    """Drop everything derived from the catalog after a bulk change"""
+    catalog_cache.invalidate()
+    card_cache.invalidate()
+    product_cache.invalidate()
+    search_index.built = False
+    suggestion_index.stale = True
+
+def import_products(stream, fmt):
+    """Import a CSV / JSONL stream batch by batch, yielding a progress dict after each commit.
+
+    Invalid rows are skipped and reported; the last dict has done=True
+    and the row errors.
+    """
+    summary = {'processed': 0, 'inserted': 0, 'updated': 0, 'failed': 0}
+    errors = []
+    columns = None
+
+    def valid_rows():
+        nonlocal columns
+        for line_number, row in read_rows(stream, fmt):
+            summary['processed'] += 1
+            try:
+                if isinstance(row, ImportRowError):
+                    raise row
+                if columns is None:
+                    columns = update_columns(row)
+                yield validate_row(row, HOME_SECTIONS, columns)
+            except ImportRowError as e:
+                summary['failed'] += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append(f'Line {line_number}: {e}')
+
+    try:
+        for batch in batched(valid_rows(), IMPORT_BATCH_SIZE):
+            inserted, updated = upsert_items([row for row in batch if 'sku' in row], columns)
+            updated_by_id, missing = update_items_by_id([row for row in batch if 'sku' not in row], columns)
+            bump_catalog_revision()
+            db.session.commit()
+            summary['inserted'] += inserted
+            summary['updated'] += updated + updated_by_id
+            summary['failed'] += len(missing)
+            errors.extend(f'No product with id {item_id} to update' for item_id in missing[:IMPORT_MAX_ERRORS - len(errors)])
+            yield dict(summary)
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        catalog_imported()
+    yield dict(summary, done=True, errors=errors)
+
+def export_batches():
+    """Every product as EXPORT_COLUMNS dicts, EXPORT_BATCH_SIZE at a time.
+
+    Pages by id rather than using yield_per: mysql-connector has no
+    server-side cursors, so a single streamed query would still be
+    buffered whole by the driver.
+    """
+    columns = [Item.id, Item.sku, Item.title, Item.price_paise, Item.section, Item.image,
+               Item.description, Item.stock_quantity, Item.in_stock]
+    last_id = 0
+    while True:
+        rows = db.session.query(*columns).filter(Item.id > last_id).order_by(Item.id).limit(EXPORT_BATCH_SIZE).all()
+        if not rows:
+            return
+        yield [dict(zip(EXPORT_COLUMNS, (row.id, row.sku, row.title, f'{row.price_paise / 100:.2f}', row.section,
+                                         row.image, row.description, row.stock_quantity, row.in_stock)))
+               for row in rows]
+        last_id = rows[-1].id
+
 def add_sample_data():
     """Add sample products to database automatically"""
     print("Adding sample data to database...")
@@ -224,17 +1735,18 @@ def add_sample_data():
     ]
     
     try:
+        # One lookup for every sample title instead of one per product
+        existing_titles = {title for (title,) in db.session.query(Item.title).filter(
+            Item.title.in_([product_data['title'] for product_data in sample_products]))}
         for product_data in sample_products:
-            # Check if product already exists
-            existing_product = Item.query.filter_by(title=product_data['title']).first()
-            if not existing_product:
+            if product_data['title'] not in existing_titles:
                 product = Item(
                     title=product_data['title'],
-                    price=product_data['price'],
                     image=product_data['image'],
                     section=product_data['section'],
                     description=product_data['description']
                 )
+                product.set_price(parse_price(product_data['price']))
                 db.session.add(product)
         
         db.session.commit()
@@ -247,93 +1759,90 @@ def add_sample_data():
 def init_db():
     with app.app_context():
         db.create_all()
+        session_metadata.create_all(db.engine)
+        run_migrations(db.engine)
+        insert_if_absent(CatalogRevision, id=1, revision=0)
+        db.session.commit()
         # Add sample data if database is empty
         if Item.query.count() == 0:
             add_sample_data()
 
 # Routes
 @app.route('/')
+@read_replica
+@catalog_page
 def home():
-  
-    sections = [  
-        {
-            "title": "Popular Items", 
-            "cards": Item.query.filter_by(section="Popular Items").limit(6).all(),
-            "total_count": Item.query.filter_by(section="Popular Items").count()
-        },
-        {
-            "title": "New Arrivals", 
-            "cards": Item.query.filter_by(section="New Arrivals").limit(6).all(),
-            "total_count": Item.query.filter_by(section="New Arrivals").count()
-        },
-        {
-            "title": "Best Deals", 
-            "cards": Item.query.filter_by(section="Best Deals").limit(6).all(),
-            "total_count": Item.query.filter_by(section="Best Deals").count()
-        }
-    ]
+    sections = home_sections()
 
     empty_sections = all(len(section["cards"]) == 0 for section in sections)
-    
-    # Get cart count for logged in users
-    cart_count = 0
-    if 'user' in session:
-        cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
 
     return render_template('home.html', sections=sections, user=session.get('user'), 
-                         empty_sections=empty_sections, cart_count=cart_count)
+                         empty_sections=empty_sections)
 
 @app.route('/search')
+@read_replica
+@catalog_page
 def search():
-    query = request.args.get('q', '')
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
     if query:
-        items = Item.query.filter(Item.title.ilike(f'%{query}%') | Item.description.ilike(f'%{query}%')).all()
+        items, total_count = search_products(query, page)
     else:
-        items = []
+        items, total_count = [], 0
+    total_pages = (total_count + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE
     
-    cart_count = 0
-    if 'user' in session:
-        cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
-    
-    return render_template('search.html', items=items, query=query, user=session.get('user'), cart_count=cart_count)
+    return render_template('search.html', items=items, query=query, user=session.get('user'),
+                         total_count=total_count, page=page, total_pages=total_pages)
+
+@app.route('/search/suggest')
+@read_replica
+def search_suggest():
+    refresh_suggestions()
+    section_filters = {section: key for key, section in CATALOG_FILTERS.items()}
+
+    suggestions = suggestion_index.suggest(request.args.get('q', ''), SUGGESTION_LIMIT)
+    for suggestion in suggestions:
+        if suggestion['type'] == 'product':
+            suggestion['url'] = product_url(suggestion['id'], suggestion['text'])
+        elif suggestion['text'] in section_filters:
+            suggestion['url'] = url_for('collection', filter=section_filters[suggestion['text']])
+        else:
+            suggestion['url'] = url_for('search', q=suggestion['text'])
+    return jsonify({'success': True, 'suggestions': suggestions})
 
 @app.route('/about')
 def about():
-    cart_count = 0
-    if 'user' in session:
-        cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
-    return render_template('about.html', user=session.get('user'), cart_count=cart_count)
+    return render_template('about.html', user=session.get('user'))
     
 @app.route('/collection')
+@read_replica
+@catalog_page
 def collection():
-    filter_type = request.args.get('filter', '')
-    
-    if filter_type == 'popular':
-        items = Item.query.filter_by(section="Popular Items").all()
-        filter_title = "Popular Items"
-    elif filter_type == 'new':
-        items = Item.query.filter_by(section="New Arrivals").all()
-        filter_title = "New Arrivals"
-    elif filter_type == 'deals':
-        items = Item.query.filter_by(section="Best Deals").all()
-        filter_title = "Best Deals"
-    else:
-        items = Item.query.all()
-        filter_title = "All Products"
-    
-    cart_count = 0
-    if 'user' in session:
-        cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
+    params = catalog_params(request.args)
+    items, next_cursor = query_catalog(**params)
+    total_count = filtered_catalog(params['section'], params['min_price'],
+                                   params['max_price'], params['in_stock']).count()
+    filter_title = params['section'] or "All Products"
     
     return render_template('collection.html', items=items, user=session.get('user'), 
-                         cart_count=cart_count, filter_title=filter_title)
+                         filter_title=filter_title,
+                         total_count=total_count, next_cursor=next_cursor, params=params)
+
+@app.route('/collection/items')
+@read_replica
+@catalog_page
+def collection_items():
+    params = catalog_params(request.args)
+    items, next_cursor = query_catalog(**params)
+    return jsonify({
+        'success': True,
+        'items': [item_to_dict(item) for item in items],
+        'next_cursor': next_cursor
+    })
 
 @app.route('/contact')
 def contact():
-    cart_count = 0
-    if 'user' in session:
-        cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
-    return render_template('contact.html', user=session.get('user'), cart_count=cart_count)
+    return render_template('contact.html', user=session.get('user'))
 
 @app.route('/send_message', methods=['POST'])
 def send_message():
@@ -376,24 +1885,21 @@ def register():
             flash('Email already exists. Please use a different email.', 'error')
             return redirect(url_for('register'))
         
-        profile_image_path = None
-        if profile_image and allowed_file(profile_image.filename):
-            filename = secure_filename(profile_image.filename)
-            filename = f"user_{datetime.now().strftime('%Y%m%d%H%M%S')}_{filename}"
-            profile_image.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            profile_image_path = f'images/{filename}'
-        
         hashed_password = generate_password_hash(password)
         new_user = User(
             name=name,
             email=email,
             password=hashed_password,
-            profile_image=profile_image_path,
             is_admin=False
         )
         
         db.session.add(new_user)
+        job_queued = False
+        if profile_image and allowed_file(profile_image.filename):
+            job_queued = attach_image('user', new_user, save_upload(profile_image))
         db.session.commit()
+        if job_queued:
+            start_image_jobs()
         
         flash('Registration successful! Please sign in.', 'success')
         return redirect(url_for('signIn'))
@@ -417,13 +1923,7 @@ def signIn():
         user = User.query.filter_by(email=email, is_active=True).first()
         
         if user and check_password_hash(user.password, password):
-            session['user'] = {
-                'id': user.id,
-                'name': user.name,
-                'email': user.email,
-                'profile_image': user.profile_image,
-                'is_admin': user.is_admin
-            }
+            session['user'] = user_session_data(user)
             flash(f'Welcome back, {user.name}!', 'success')
             return redirect(url_for('home'))
         else:
@@ -443,12 +1943,9 @@ def signout():
 def profile():
     user_data = User.query.get(session['user']['id'])
     addresses = Address.query.filter_by(user_id=session['user']['id']).all()
-    cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
-    wishlist_count = Wishlist.query.filter_by(user_id=session['user']['id']).count()
     orders_count = Order.query.filter_by(user_id=session['user']['id']).count()
     
-    return render_template('profile.html', user=user_data, addresses=addresses,
-                         cart_count=cart_count, wishlist_count=wishlist_count, orders_count=orders_count)
+    return render_template('profile.html', user=user_data, addresses=addresses, orders_count=orders_count)
 
 @app.route('/profile/update', methods=['POST'])
 @login_required
@@ -460,13 +1957,17 @@ def update_profile():
     if name:
         user.name = name
     
+    previous_image = user.profile_image
+    job_queued = False
     if profile_image and allowed_file(profile_image.filename):
-        filename = secure_filename(profile_image.filename)
-        filename = f"user_{datetime.now().strftime('%Y%m%d%H%M%S')}_{filename}"
-        profile_image.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-        user.profile_image = f'images/{filename}'
+        job_queued = attach_image('user', user, save_upload(profile_image))
     
     db.session.commit()
+    if job_queued:
+        start_image_jobs()
+    if user.profile_image != previous_image:
+        release_image(previous_image)
+    user_changed(user.id)
     flash('Profile updated successfully!', 'success')
     return redirect(url_for('profile'))
 
@@ -526,12 +2027,14 @@ def delete_address(address_id):
 @app.route('/cart')
 @login_required
 def cart():
-    cart_items = Cart.query.filter_by(user_id=session['user']['id']).all()
-    total_amount = sum(float(cart.item.price.replace('₹', '').replace(',', '')) * cart.quantity for cart in cart_items)
+    cart_items = Cart.query.options(CART_WITH_ITEM).filter_by(user_id=session['user']['id']).all()
+    total_amount = paise_to_rupees(sum(cart.item.price_paise * cart.quantity for cart in cart_items))
     cart_count = len(cart_items)
+    set_header_counts(session['user']['id'], cart_count=cart_count)
+    recommended_items = cart_recommendations([cart.item_id for cart in cart_items])
     
     return render_template('cart.html', cart_items=cart_items, total_amount=total_amount, 
-                         user=session.get('user'), cart_count=cart_count)
+                         recommended_items=recommended_items, user=session.get('user'), cart_count=cart_count)
 
 @app.route('/cart/add/<int:item_id>')
 @login_required
@@ -540,15 +2043,15 @@ def add_to_cart(item_id):
     if not item:
         return jsonify({'success': False, 'message': 'Item not found!'})
     
-    # Check if item already in cart
-    existing_cart_item = Cart.query.filter_by(user_id=session['user']['id'], item_id=item_id).first()
-    if existing_cart_item:
+    # The (user_id, item_id) unique index turns a duplicate add into a no-op
+    added = insert_if_absent(Cart, user_id=session['user']['id'], item_id=item_id)
+    db.session.commit()
+    if not added:
         return jsonify({'success': False, 'message': 'Item already in cart!'})
     else:
-        new_cart_item = Cart(user_id=session['user']['id'], item_id=item_id)
-        db.session.add(new_cart_item)
-        db.session.commit()
-        return jsonify({'success': True, 'message': 'Item added to cart!'})
+        update_header_counts(session['user']['id'], cart_count=1)
+        return jsonify({'success': True, 'message': 'Item added to cart!',
+                        'cart_count': header_counts(session['user']['id'])['cart_count']})
 
 @app.route('/cart/update/<int:cart_id>', methods=['POST'])
 @login_required
@@ -563,6 +2066,7 @@ def update_cart(cart_id):
         else:
             db.session.delete(cart_item)
             db.session.commit()
+            update_header_counts(session['user']['id'], cart_count=-1)
             flash('Item removed from cart!', 'success')
     return redirect(url_for('cart'))
 
@@ -573,6 +2077,7 @@ def remove_from_cart(cart_id):
     if cart_item:
         db.session.delete(cart_item)
         db.session.commit()
+        update_header_counts(session['user']['id'], cart_count=-1)
         flash('Item removed from cart!', 'success')
     return redirect(url_for('cart'))
 
@@ -580,11 +2085,11 @@ def remove_from_cart(cart_id):
 @app.route('/wishlist')
 @login_required
 def wishlist():
-    wishlist_items = Wishlist.query.filter_by(user_id=session['user']['id']).all()
-    cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
+    wishlist_items = Wishlist.query.options(WISHLIST_WITH_ITEM).filter_by(user_id=session['user']['id']).all()
+    set_header_counts(session['user']['id'], wishlist_count=len(wishlist_items))
     
     return render_template('wishlist.html', wishlist_items=wishlist_items, 
-                         user=session.get('user'), cart_count=cart_count)
+                         user=session.get('user'))
 
 @app.route('/wishlist/add/<int:item_id>')
 @login_required
@@ -593,12 +2098,11 @@ def add_to_wishlist(item_id):
     if not item:
         return jsonify({'success': False, 'message': 'Item not found!'})
     
-    # Check if item already in wishlist
-    existing_wishlist_item = Wishlist.query.filter_by(user_id=session['user']['id'], item_id=item_id).first()
-    if not existing_wishlist_item:
-        new_wishlist_item = Wishlist(user_id=session['user']['id'], item_id=item_id)
-        db.session.add(new_wishlist_item)
-        db.session.commit()
+    # The (user_id, item_id) unique index turns a duplicate add into a no-op
+    added = insert_if_absent(Wishlist, user_id=session['user']['id'], item_id=item_id)
+    db.session.commit()
+    if added:
+        update_header_counts(session['user']['id'], wishlist_count=1)
         return jsonify({'success': True, 'message': 'Item added to wishlist!'})
     else:
         return jsonify({'success': False, 'message': 'Item already in wishlist!'})
@@ -610,105 +2114,208 @@ def remove_from_wishlist(wishlist_id):
     if wishlist_item:
         db.session.delete(wishlist_item)
         db.session.commit()
+        update_header_counts(session['user']['id'], wishlist_count=-1)
         flash('Item removed from wishlist!', 'success')
     return redirect(url_for('wishlist'))
 
 # Product Routes
+@app.route('/product/<int:item_id>', defaults={'slug': None})
+@app.route('/product/<int:item_id>/<slug>')
+@read_replica
+@catalog_page
+def product(item_id, slug):
+    detail = product_detail(item_id)
+    if not detail:
+        return "Item not found", 404
+    item = detail['item']
+    if slug != slugify(item['title']):
+        return redirect(product_url(item['id'], item['title']), 301)
+
+    # Check if item is in user's wishlist
+    in_wishlist = False
+    if 'user' in session:
+        in_wishlist = db.session.query(Wishlist.query.filter_by(
+            user_id=session['user']['id'], item_id=item_id).exists()).scalar()
+    
+    return render_template('product.html', item=item, similar_items=detail['similar_items'], 
+                         user=session.get('user'), in_wishlist=in_wishlist)
+
 @app.route('/product/<title>')
-def product(title):
-    item = Item.query.filter_by(title=title).first()
-    if item:
-        similar_items = Item.query.filter_by(section=item.section).filter(Item.id != item.id).limit(4).all()
-        
-        # Check if item is in user's wishlist
-        in_wishlist = False
-        if 'user' in session:
-            in_wishlist = Wishlist.query.filter_by(user_id=session['user']['id'], item_id=item.id).first() is not None
-        
-        cart_count = 0
-        if 'user' in session:
-            cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
-        
-        return render_template('product.html', item=item, similar_items=similar_items, 
-                             user=session.get('user'), in_wishlist=in_wishlist, cart_count=cart_count)
-    return "Item not found", 404
+def product_by_title(title):
+    """Old title-based links redirect to the id-based product page"""
+    item_id = db.session.query(Item.id).filter_by(title=title).order_by(Item.id).limit(1).scalar()
+    if not item_id:
+        return "Item not found", 404
+    return redirect(product_url(item_id, title), 301)
 
 # Checkout & Orders
+class CheckoutError(Exception):
+    """A checkout that cannot go ahead; the message is shown to the customer"""
+
+def parse_stock(value):
+    """Stock form field: '' -> None (not counted), '12' -> 12; raises ValueError otherwise"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValueError(value)
+    return int(value)
+
+def reserve_stock(quantities):
+    """Take {item_id: quantity} from stock with one guarded UPDATE.
+
+    The WHERE clause only matches rows that still have enough stock, and
+    the UPDATE holds their row locks until commit, so concurrent checkouts
+    can never take more than there is. Returns the ids that sold out.
+    """
+    wanted = db.case(quantities, value=Item.id)
+    result = db.session.execute(
+        db.update(Item)
+        .where(Item.id.in_(quantities), Item.in_stock.is_(True),
+               db.or_(Item.stock_quantity.is_(None), Item.stock_quantity >= wanted))
+        # Pinned, or every sale would count as a product edit (updated_at is the admin grid's 'updated' sort)
+        .values(stock_quantity=Item.stock_quantity - wanted, updated_at=Item.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(quantities):
+        for title, stock_quantity, in_stock in db.session.query(
+                Item.title, Item.stock_quantity, Item.in_stock).filter(Item.id.in_(quantities)):
+            if not in_stock or stock_quantity == 0:
+                raise CheckoutError(f'Sorry, {title} is out of stock.')
+        short = db.session.query(Item.title, Item.stock_quantity).filter(
+            Item.id.in_(quantities), Item.stock_quantity < wanted).first()
+        if short:
+            raise CheckoutError(f'Sorry, only {short.stock_quantity} left of {short.title}.')
+        raise CheckoutError('Some items in your cart are no longer available.')
+
+    sold_out = [item_id for item_id, in db.session.query(Item.id).filter(
+        Item.id.in_(quantities), Item.stock_quantity <= 0)]
+    if sold_out:
+        # Selling out changes what the catalog shows, so this one does count as a change
+        db.session.execute(
+            db.update(Item).where(Item.id.in_(sold_out)).values(in_stock=False)
+            .execution_options(synchronize_session=False)
+        )
+        bump_catalog_revision()
+    return sold_out
+
+def place_order(user_id, address_id, idempotency_key=None):
+    """Turn a user's cart into an order in a single transaction.
+
+    Returns (order_id, created). Resubmitting the same idempotency key
+    returns the order the first submit created instead of a new one.
+    Raises CheckoutError, with the transaction rolled back, when the
+    order cannot be placed.
+    """
+    try:
+        # Locks the cart so a concurrent submit waits here, then sees the order this one made
+        cart_rows = Cart.query.filter_by(user_id=user_id).order_by(Cart.item_id).with_for_update().all()
+        if idempotency_key:
+            existing = db.session.query(Order.id).filter_by(
+                user_id=user_id, idempotency_key=idempotency_key).scalar()
+            if existing:
+                db.session.rollback()
+                return existing, False
+        if not cart_rows:
+            raise CheckoutError('Your cart is empty!')
+        if not db.session.query(Address.query.filter_by(id=address_id, user_id=user_id).exists()).scalar():
+            raise CheckoutError('Please select a delivery address.')
+
+        order = Order(user_id=user_id, address_id=address_id, total_amount=0, status='confirmed',
+                      payment_status='paid',  # For demo purposes
+                      idempotency_key=idempotency_key)
+        db.session.add(order)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Same key committed by a submit that got past the cart lock first
+            db.session.rollback()
+            existing = db.session.query(Order.id).filter_by(
+                user_id=user_id, idempotency_key=idempotency_key).scalar()
+            if existing:
+                return existing, False
+            raise
+
+        quantities = {row.item_id: row.quantity for row in cart_rows}
+        sold_out = reserve_stock(quantities)
+        prices = dict(db.session.query(Item.id, Item.price_paise).filter(Item.id.in_(quantities)))
+        order.total_amount = paise_to_rupees(sum(prices[item_id] * quantity for item_id, quantity in quantities.items()))
+        db.session.execute(db.insert(OrderItem), [
+            {'order_id': order.id, 'item_id': item_id, 'quantity': quantity,
+             'price': paise_to_rupees(prices[item_id])}
+            for item_id, quantity in quantities.items()
+        ])
+        Cart.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        db.session.commit()
+    except CheckoutError:
+        db.session.rollback()
+        raise
+
+    if sold_out:
+        catalog_cache.invalidate()
+        invalidate_item_caches(sold_out)
+    return order.id, True
+
 @app.route('/checkout')
 @login_required
 def checkout():
-    cart_items = Cart.query.filter_by(user_id=session['user']['id']).all()
+    cart_items = Cart.query.options(CART_WITH_ITEM).filter_by(user_id=session['user']['id']).all()
     if not cart_items:
         flash('Your cart is empty!', 'error')
         return redirect(url_for('cart'))
     
     addresses = Address.query.filter_by(user_id=session['user']['id']).all()
-    total_amount = sum(float(cart.item.price.replace('₹', '').replace(',', '')) * cart.quantity for cart in cart_items)
+    total_amount = paise_to_rupees(sum(cart.item.price_paise * cart.quantity for cart in cart_items))
     cart_count = len(cart_items)
+    set_header_counts(session['user']['id'], cart_count=cart_count)
     
     return render_template('checkout.html', cart_items=cart_items, addresses=addresses,
-                         total_amount=total_amount, user=session.get('user'), cart_count=cart_count)
+                         total_amount=total_amount, user=session.get('user'), cart_count=cart_count,
+                         idempotency_key=uuid.uuid4().hex)
 
 @app.route('/order/create', methods=['POST'])
 @login_required
 def create_order():
-    address_id = request.form.get('address_id')
+    address_id = request.form.get('address_id', type=int)
     if not address_id:
         flash('Please select a delivery address.', 'error')
         return redirect(url_for('checkout'))
     
-    cart_items = Cart.query.filter_by(user_id=session['user']['id']).all()
-    if not cart_items:
-        flash('Your cart is empty!', 'error')
+    try:
+        order_id, created = place_order(session['user']['id'], address_id,
+                                        request.form.get('idempotency_key') or None)
+    except CheckoutError as e:
+        flash(str(e), 'error')
         return redirect(url_for('cart'))
     
-    # Calculate total amount
-    total_amount = sum(float(cart.item.price.replace('₹', '').replace(',', '')) * cart.quantity for cart in cart_items)
-    
-    # Create order
-    new_order = Order(
-        user_id=session['user']['id'],
-        address_id=address_id,
-        total_amount=total_amount,
-        status='confirmed',
-        payment_status='paid'  # For demo purposes
-    )
-    
-    db.session.add(new_order)
-    db.session.flush()  # Get the order ID
-    
-    # Create order items
-    for cart_item in cart_items:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            item_id=cart_item.item_id,
-            quantity=cart_item.quantity,
-            price=float(cart_item.item.price.replace('₹', '').replace(',', ''))
-        )
-        db.session.add(order_item)
-    
-    # Clear cart
-    Cart.query.filter_by(user_id=session['user']['id']).delete()
-    
-    db.session.commit()
-    flash('Order placed successfully!', 'success')
-    return redirect(url_for('order_confirmation', order_id=new_order.id))
+    set_header_counts(session['user']['id'], cart_count=0)
+    if created:
+        flash('Order placed successfully!', 'success')
+    return redirect(url_for('order_confirmation', order_id=order_id))
 
 @app.route('/order/confirmation/<int:order_id>')
 @login_required
 def order_confirmation(order_id):
-    order = Order.query.filter_by(id=order_id, user_id=session['user']['id']).first_or_404()
-    cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
+    order = Order.query.options(*ORDER_WITH_DETAILS).filter_by(id=order_id, user_id=session['user']['id']).first_or_404()
     
-    return render_template('order_confirmation.html', order=order, user=session.get('user'), cart_count=cart_count)
+    return render_template('order_confirmation.html', order=order, user=session.get('user'))
 
 @app.route('/orders')
 @login_required
+@read_replica
 def orders():
-    user_orders = Order.query.filter_by(user_id=session['user']['id']).order_by(Order.created_at.desc()).all()
-    cart_count = Cart.query.filter_by(user_id=session['user']['id']).count()
+    cursor = request.args.get('cursor')
+    user_orders, next_cursor = order_summaries(session['user']['id'], cursor)
     
-    return render_template('orders.html', orders=user_orders, user=session.get('user'), cart_count=cart_count)
+    return render_template('orders.html', orders=user_orders, user=session.get('user'),
+                         next_cursor=next_cursor, is_first_page=not cursor)
+
+@app.route('/orders/<int:order_id>/details')
+@login_required
+@read_replica
+def order_details(order_id):
+    order = Order.query.options(*ORDER_WITH_DETAILS).filter_by(id=order_id, user_id=session['user']['id']).first_or_404()
+    return render_template('order_details.html', order=order)
 
 # Admin Routes
 @app.route('/create_admin', methods=['GET', 'POST'])
@@ -768,8 +2375,134 @@ def create_admin():
 @app.route('/admin/products')
 @admin_required
 def admin_products():
-    products = Item.query.all()
-    return render_template('admin_products.html', products=products, user=session.get('user'))
+    # The grid loads its rows from admin_products_data
+    return render_template('admin_products.html', sections=HOME_SECTIONS, sorts=list(ADMIN_SORTS),
+                           page_size=ADMIN_PAGE_SIZE, user=session.get('user'))
+
+@app.route('/admin/products/data')
+@admin_required
+def admin_products_data():
+    params = admin_grid_params(request.args)
+    items, total = admin_grid_page(params)
+    # item id -> newest unfinished image job, for the processing badges
+    pending_jobs = {job.target_id: job.id for job in ImageJob.query.filter(
+        ImageJob.kind == 'item', ImageJob.target_id.in_([item.id for item in items]),
+        ImageJob.status.in_(('queued', 'running'))
+    ).order_by(ImageJob.id)} if items else {}
+    return jsonify({
+        'success': True,
+        'items': [admin_item_to_dict(item, pending_jobs.get(item.id)) for item in items],
+        'total': total,
+        'page': params['page'],
+        'pages': max((total + params['per_page'] - 1) // params['per_page'], 1)
+    })
+
+@app.route('/admin/products/bulk', methods=['POST'])
+@admin_required
+def admin_products_bulk():
+    """Apply one action to the selected products, or to every product matching the grid's filters"""
+    action = request.form.get('action')
+    try:
+        value = parse_bulk_value(action, request.form.get('value'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    if request.form.get('all') == '1':
+        condition = db.and_(db.true(), *admin_grid_conditions(**admin_grid_params(request.form)))
+    else:
+        try:
+            ids = {int(item_id) for item_id in request.form.getlist('ids')}
+        except ValueError:
+            ids = set()
+        if not ids or len(ids) > ADMIN_BULK_MAX_IDS:
+            return jsonify({'success': False,
+                            'message': f'Please select between 1 and {ADMIN_BULK_MAX_IDS} products.'}), 400
+        condition = Item.id.in_(ids)
+
+    changed, skipped = bulk_update_products(condition, action, value)
+    message = f'{changed} product{"s" if changed != 1 else ""} updated.'
+    if action == 'delete':
+        message = f'{changed} product{"s" if changed != 1 else ""} deleted.'
+        if skipped:
+            message += f' {skipped} kept because they appear on orders.'
+    elif skipped:
+        message += f' {skipped} left out of stock until restocked.'
+    return jsonify({'success': True, 'message': message, 'changed': changed, 'skipped': skipped})
+
+@app.route('/admin/products/import', methods=['GET', 'POST'])
+@admin_required
+def import_products_view():
+    if request.method == 'GET':
+        return render_template('import_products.html', user=session.get('user'))
+
+    file = request.files.get('file')
+    fmt = detect_format(file.filename) if file else None
+    if not fmt:
+        return jsonify({'success': False, 'message': 'Please upload a .csv or .jsonl file.'}), 400
+    # Flask closes uploaded files when the view returns, before the response
+    # is streamed, so the import takes the upload over and closes it itself
+    upload, file.stream = file.stream, io.BytesIO()
+
+    def events():
+        # One JSON line per committed batch, so the page can show progress as it goes
+        with upload:
+            for event in import_products(upload, fmt):
+                yield json.dumps(event) + '\n'
+    return app.response_class(stream_with_context(events()), mimetype='application/x-ndjson')
+
+@app.route('/admin/products/export.<fmt>')
+@admin_required
+def export_products(fmt):
+    if fmt not in FORMATS:
+        abort(404)
+    response = app.response_class(stream_with_context(export_chunks(export_batches(), fmt)), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=products-{datetime.utcnow():%Y%m%d}.{fmt}'
+    return response
+
+@app.route('/admin/analytics')
+@admin_required
+@read_replica
+def admin_analytics():
+    days = request.args.get('days', 30, type=int)
+    if days not in SALES_REPORT_DAYS:
+        days = 30
+    return render_template('admin_analytics.html', report=sales_report(days), day_choices=SALES_REPORT_DAYS,
+                           user=session.get('user'))
+
+@app.route('/admin/analytics/data')
+@admin_required
+@read_replica
+def admin_analytics_data():
+    days = request.args.get('days', 30, type=int)
+    if days not in SALES_REPORT_DAYS:
+        return jsonify({'success': False, 'message': f'days must be one of {SALES_REPORT_DAYS}'}), 400
+    return jsonify({'success': True, 'report': sales_report(days)})
+
+@app.route('/admin/profile')
+@admin_required
+def admin_profile():
+    recent = sorted(instrumentation.recent, key=lambda record: record['duration_ms'], reverse=True)
+    return render_template('admin_profile.html', enabled=app.config['INSTRUMENTATION'],
+                           routes=instrumentation.route_summaries(), slowest=recent[:50],
+                           slow_queries=list(reversed(instrumentation.slow_queries)),
+                           profiles=list(reversed(instrumentation.profiles)),
+                           slow_query_ms=app.config['SLOW_QUERY_MS'], user=session.get('user'))
+
+@app.route('/admin/profile/<int:profile_id>')
+@admin_required
+def admin_profile_report(profile_id):
+    profile = instrumentation.profile(profile_id)
+    if not profile:
+        abort(404)
+    return app.response_class(profile['report'], mimetype='text/plain')
+
+@app.route('/admin/image-jobs/<int:job_id>')
+@admin_required
+def image_job_status(job_id):
+    job = db.session.get(ImageJob, job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': image_job_to_dict(job)})
 
 @app.route('/admin/product/edit/<int:product_id>', methods=['GET', 'POST'])
 @admin_required
@@ -777,20 +2510,39 @@ def edit_product(product_id):
     product = Item.query.get_or_404(product_id)
     
     if request.method == 'POST':
+        price_paise = parse_price(request.form.get('price'))
+        if price_paise is None:
+            flash('Please enter a valid price.', 'error')
+            return redirect(url_for('edit_product', product_id=product_id))
+        try:
+            stock_quantity = parse_stock(request.form.get('stock_quantity'))
+        except ValueError:
+            flash('Please enter a valid stock quantity.', 'error')
+            return redirect(url_for('edit_product', product_id=product_id))
+
+        previous_section = product.section
+        previous_image = product.image
         product.title = request.form.get('title')
-        product.price = request.form.get('price')
+        product.set_price(price_paise)
+        product.set_stock(stock_quantity)
         product.section = request.form.get('section')
         product.description = request.form.get('description')
         
         file = request.files.get('image')
+        job_queued = False
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            filename = f"product_{datetime.now().strftime('%Y%m%d%H%M%S')}_{filename}"
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            product.image = f'images/{filename}'
+            job_queued = attach_image('item', product, save_upload(file))
         
+        bump_catalog_revision()
         db.session.commit()
-        flash('Product updated successfully!', 'success')
+        product_saved(product, previous_section)
+        if product.image != previous_image:
+            release_image(previous_image)
+        if job_queued:
+            start_image_jobs()
+            flash('Product updated successfully! The new image is being processed.', 'success')
+        else:
+            flash('Product updated successfully!', 'success')
         return redirect(url_for('admin_products'))
     
     return render_template('edit_product.html', product=product, user=session.get('user'))
@@ -799,8 +2551,13 @@ def edit_product(product_id):
 @admin_required
 def delete_product(product_id):
     product = Item.query.get_or_404(product_id)
+    section = product.section
+    image = product.image
     db.session.delete(product)
+    bump_catalog_revision()
     db.session.commit()
+    product_deleted(product_id, section)
+    release_image(image)
     flash('Product deleted successfully!', 'success')
     return redirect(url_for('admin_products'))
 
@@ -809,23 +2566,27 @@ def delete_product(product_id):
 def add_item():
     if request.method == 'POST':
         title = request.form.get('title')
-        price = request.form.get('price')
+        price_paise = parse_price(request.form.get('price'))
         section = request.form.get('section')
         description = request.form.get('description')
         file = request.files.get('image')
+        try:
+            stock_quantity = parse_stock(request.form.get('stock_quantity'))
+        except ValueError:
+            flash('Please enter a valid stock quantity.', 'error')
+            return render_template('add_item.html', user=session.get('user'))
 
-        print(f"DEBUG: Adding item - Title: {title}, Section: {section}")  # Debug line
-
-        if title and price and section and description and file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            filename = f"product_{datetime.now().strftime('%Y%m%d%H%M%S')}_{filename}"
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-
-            new_item = Item(title=title, price=price, image=f'images/{filename}', section=section, description=description)
+        if title and price_paise is not None and section and description and file and allowed_file(file.filename):
+            new_item = Item(title=title, section=section, description=description)
+            new_item.set_price(price_paise)
+            new_item.set_stock(stock_quantity)
             db.session.add(new_item)
+            job_queued = attach_image('item', new_item, save_upload(file))
+            bump_catalog_revision()
             db.session.commit()
-
-            print(f"DEBUG: Item added successfully - ID: {new_item.id}")  # Debug line
+            product_saved(new_item)
+            if job_queued:
+                start_image_jobs()
 
             flash('Item added successfully!', 'success')
             return redirect(url_for('add_item'))
@@ -838,7 +2599,373 @@ def add_item():
 
 
 
+@app.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Create missing tables and apply pending schema migrations"""
+    db.create_all()
+    session_metadata.create_all(db.engine)
+    applied = run_migrations(db.engine)
+    click.echo(f"Applied {len(applied)} migration(s)" if applied else "Database is up to date")
+
+@app.cli.command('sessions-prune')
+def sessions_prune_command():
+    """Delete expired sessions from the server_session table"""
+    store = app.session_interface.store
+    if not isinstance(store, DatabaseSessionStore):
+        raise click.ClickException('SESSION_STORE is not database; nothing to prune')
+    click.echo(f"Deleted {store.prune()} expired session(s)")
+
+@app.cli.command('db-status')
+def db_status_command():
+    """List schema migrations that have not been applied"""
+    pending = pending_migrations(db.engine)
+    for migration_id, _ in pending:
+        click.echo(f"pending  {migration_id}")
+    if not pending:
+        click.echo("Database is up to date")
+
+@app.cli.command('check-query-budgets')
+@click.option('--user-id', type=int, required=True, help='User whose pages are requested')
+@click.option('--verbose', is_flag=True, help='Print every statement issued')
+def check_query_budgets_command(user_id, verbose):
+    """Fail if a cart / wishlist / order page issues more SQL than its budget"""
+    user = db.session.get(User, user_id)
+    if not user:
+        raise click.ClickException(f'User {user_id} not found')
+
+    latest_order = Order.query.filter_by(user_id=user_id).order_by(Order.id.desc()).first()
+    with app.test_request_context():
+        routes = [(name, url_for(name), QUERY_BUDGETS[name])
+                  for name in ('cart', 'checkout', 'wishlist', 'orders')]
+        if latest_order:
+            routes.append(('order_confirmation', url_for('order_confirmation', order_id=latest_order.id),
+                           QUERY_BUDGETS['order_confirmation']))
+
+    results = run_query_budgets(app, db.engine, user_session_data(user), routes)
+    for result in results:
+        click.echo(f"{'ok  ' if result['ok'] else 'FAIL'} {result['path']:<32} {result['status']} "
+                   f"{result['count']:>3} queries (budget {result['budget']})")
+        if verbose or not result['ok']:
+            for statement in result['statements']:
+                click.echo('      ' + ' '.join(statement.split()))
+
+    if not all(result['ok'] for result in results):
+        raise SystemExit(1)
+
+@app.cli.command('images-backfill')
+@click.option('--force', is_flag=True, help='Regenerate variants that already exist on disk')
+@click.option('--batch-size', default=100, show_default=True)
+def images_backfill_command(force, batch_size):
+    """Create responsive image variants for existing products and profile pictures"""
+    if not images_supported():
+        raise click.ClickException('Pillow is not installed')
+
+    for model, image_column, variants_column in ((Item, Item.image, Item.image_variants),
+                                                 (User, User.profile_image, User.profile_image_variants)):
+        updated = 0
+        last_id = 0
+        while True:
+            query = model.query.filter(model.id > last_id, image_column.isnot(None))
+            if not force:
+                query = query.filter(variants_column.is_(None))
+            rows = query.order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                variants = image_variants(getattr(row, image_column.key), force=force)
+                if variants:
+                    setattr(row, variants_column.key, variants)
+                    updated += 1
+            if model is Item and db.session.dirty:
+                bump_catalog_revision()
+            db.session.commit()
+            last_id = rows[-1].id
+        click.echo(f"{model.__tablename__}: created variants for {updated} image(s)")
+
+    catalog_cache.invalidate()
+    card_cache.invalidate()
+    product_cache.invalidate()
+
+@app.cli.command('images-dedupe')
+@click.option('--dry-run', is_flag=True, help='Only report duplicate groups and reclaimable bytes')
+def images_dedupe_command(dry_run):
+    """Move uploads to content-addressed names, merging identical files and deleting orphans"""
+    folder = app.config['UPLOAD_FOLDER']
+    groups = {}
+    for entry in sorted(os.scandir(folder), key=lambda entry: entry.name):
+        if entry.is_file() and not entry.name.endswith('.part'):
+            groups.setdefault(file_digest(entry.path), []).append(entry.name)
+
+    merged = freed = queued = 0
+    for digest, filenames in groups.items():
+        uploads = [name for name in filenames if is_managed_upload(name)]
+        if not uploads:
+            continue
+        # Site artwork keeps its name since templates link to it; otherwise the hash name wins
+        artwork = [name for name in filenames if not is_managed_upload(name)]
+        canonical = artwork[0] if artwork else f'{digest}{os.path.splitext(uploads[0])[1].lower()}'
+        replaced = [f'images/{name}' for name in uploads if name != canonical]
+
+        if dry_run:
+            if replaced:
+                size = os.path.getsize(os.path.join(folder, filenames[0]))
+                click.echo(f"{canonical} <- {', '.join(replaced)}")
+                freed += size * (len(filenames) - 1)
+            continue
+
+        if canonical not in filenames:
+            # Link first, repoint rows, then drop the old name: references stay valid throughout
+            os.link(os.path.join(folder, uploads[0]), os.path.join(folder, canonical))
+        if replaced:
+            canonical_path = f'images/{canonical}'
+            # Identical files share variants; rows with none get a job for the canonical file
+            variants = next(filter(None, map(known_variants, [canonical_path] + replaced)), None)
+            for kind, (model, image_column, variants_column) in IMAGE_JOB_TARGETS.items():
+                column = getattr(model, image_column)
+                target_ids = db.session.execute(db.select(model.id).where(column.in_(replaced))).scalars().all()
+                if not target_ids:
+                    continue
+                model.query.filter(model.id.in_(target_ids)).update(
+                    {column: canonical_path, getattr(model, variants_column): variants},
+                    synchronize_session=False)
+                if variants is None:
+                    for target_id in target_ids:
+                        enqueue_image_job(kind, target_id, canonical_path)
+                        queued += 1
+                if model is Item:
+                    bump_catalog_revision()
+            db.session.commit()
+            merged += len(replaced)
+
+        for image_path in replaced + [f'images/{canonical}']:
+            freed += release_image(image_path)
+
+    if dry_run:
+        click.echo(f"{freed / 1024:.0f} KB could be reclaimed from duplicates")
+        return
+
+    catalog_cache.invalidate()
+    card_cache.invalidate()
+    product_cache.invalidate()
+    click.echo(f"Merged {merged} file(s) into content-addressed names; freed {freed / 1024:.0f} KB")
+    if queued:
+        click.echo(f"Queued {queued} image job(s) for rows without variants; run flask image-worker")
+
+@app.cli.command('assets-build')
+@click.option('--clean', is_flag=True, help='Delete built files the new manifest no longer uses')
+def assets_build_command(clean):
+    """Minify, bundle, fingerprint and precompress static/css and static/js"""
+    if not brotli_supported():
+        raise click.ClickException('brotli is not installed; the build would ship without .br files')
+    manifest = build_assets(app.static_folder)
+    set_asset_manifest(manifest)
+    click.echo(f"Built {len(manifest)} asset(s) into {app.static_folder}/dist; restart the app to serve them")
+    if clean:
+        removed = list(stale_files(app.static_folder, manifest))
+        for path in removed:
+            os.remove(path)
+        click.echo(f"Removed {len(removed)} stale file(s)")
+
+@app.cli.command('image-worker')
+@click.option('--workers', type=int, default=None, help='Worker processes (default IMAGE_JOB_WORKERS)')
+def image_worker_command(workers):
+    """Process queued image jobs until interrupted"""
+    runner = JobRunner(claim_image_jobs, process_image, complete_image_job, recover_image_jobs,
+                       workers=workers or max(app.config['IMAGE_JOB_WORKERS'], 1))
+    runner.start()
+    click.echo(f"Processing image jobs with {runner.workers} worker(s); Ctrl+C to stop")
+    try:
+        while runner.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        runner.stop()
+
+@app.cli.command('checkout-stress')
+@click.option('--buyers', type=int, default=20, help='Concurrent buyers')
+@click.option('--stock', type=int, default=5, help='Units of the test item in stock')
+@click.option('--quantity', type=int, default=1, help='Units each buyer has in their cart')
+def checkout_stress_command(buyers, stock, quantity):
+    """Race buyers for a scarce item; fail if stock oversells or a double submit makes two orders"""
+    item = Item(title='Checkout stress test item', image='images/stress-test.jpg',
+                section='Popular Items', description='Temporary item for checkout-stress')
+    item.set_price(100)
+    item.set_stock(stock)
+    db.session.add(item)
+    users = [User(name=f'Stress Buyer {n}', email=f'stress-{uuid.uuid4().hex}@example.invalid',
+                  password=generate_password_hash(uuid.uuid4().hex)) for n in range(buyers)]
+    db.session.add_all(users)
+    db.session.flush()
+    addresses = [Address(user_id=user.id, name=user.name, phone='0000000000', address_line1='Test',
+                         city='Test', state='Test', pincode='000000') for user in users]
+    db.session.add_all(addresses)
+    db.session.add_all(Cart(user_id=user.id, item_id=item.id, quantity=quantity) for user in users)
+    bump_catalog_revision()
+    db.session.commit()
+    item_id, user_ids = item.id, [user.id for user in users]
+    sessions = [user_session_data(user) for user in users]
+
+    # Every buyer submits the same checkout form twice, all released at once
+    submits = [(session_data, address.id, uuid.uuid4().hex) for session_data, address in zip(sessions, addresses)]
+    submits = submits + submits
+    barrier = threading.Barrier(len(submits))
+    statuses = []
+
+    def submit(session_data, address_id, key):
+        client = app.test_client()
+        with client.session_transaction() as client_session:
+            client_session['user'] = session_data
+        barrier.wait()
+        try:
+            response = client.post('/order/create', data={'address_id': address_id, 'idempotency_key': key})
+            statuses.append(response.status_code)
+        except Exception as e:
+            statuses.append(type(e).__name__)
+
+    try:
+        threads = [threading.Thread(target=submit, args=args) for args in submits]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        db.session.expire_all()
+        orders_per_user = dict(db.session.query(Order.user_id, db.func.count(Order.id))
+                               .filter(Order.user_id.in_(user_ids)).group_by(Order.user_id))
+        sold = db.session.query(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)) \
+            .filter(OrderItem.item_id == item_id).scalar()
+        remaining = db.session.get(Item, item_id).stock_quantity
+        failures = [status for status in statuses if status != 302]
+
+        click.echo(f"{len(submits)} submits from {buyers} buyers for {stock} unit(s), {quantity} each")
+        click.echo(f"orders: {sum(orders_per_user.values())}  units sold: {sold}  stock left: {remaining}")
+        if failures:
+            click.echo(f"unexpected responses: {failures}")
+
+        problems = []
+        if sold > stock:
+            problems.append(f'oversold: {sold} units sold from {stock}')
+        if remaining != stock - sold:
+            problems.append(f'stock left is {remaining}, expected {stock - sold}')
+        if any(count > 1 for count in orders_per_user.values()):
+            problems.append('a double submit created two orders')
+        if sold < min(stock, buyers * quantity) - quantity + 1:
+            problems.append(f'only {sold} units sold while stock was available')
+        for problem in problems:
+            click.echo(f"FAIL {problem}")
+        if not problems:
+            click.echo("ok")
+    finally:
+        order_ids = [order_id for order_id, in db.session.query(Order.id).filter(Order.user_id.in_(user_ids))]
+        OrderItem.query.filter(OrderItem.order_id.in_(order_ids)).delete(synchronize_session=False)
+        Order.query.filter(Order.id.in_(order_ids)).delete(synchronize_session=False)
+        Cart.query.filter(Cart.user_id.in_(user_ids)).delete(synchronize_session=False)
+        Address.query.filter(Address.user_id.in_(user_ids)).delete(synchronize_session=False)
+        User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        Item.query.filter_by(id=item_id).delete(synchronize_session=False)
+        bump_catalog_revision()
+        db.session.commit()
+        product_deleted(item_id, 'Popular Items')
+
+    if problems:
+        raise SystemExit(1)
+
+@app.cli.command('products-import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def products_import_command(path):
+    """Insert or update products by sku from a .csv or .jsonl file"""
+    fmt = detect_format(path)
+    if not fmt:
+        raise click.ClickException('The file must end in .csv or .jsonl')
+    with open(path, 'rb') as f:
+        for progress in import_products(f, fmt):
+            if progress.get('done'):
+                break
+            click.echo(f"{progress['processed']} rows read...")
+    click.echo(f"{progress['processed']} rows read, {progress['inserted']} added, "
+               f"{progress['updated']} updated, {progress['failed']} rejected")
+    for error in progress['errors']:
+        click.echo(f"  {error}")
+    if progress['failed'] > len(progress['errors']):
+        click.echo(f"  ... and {progress['failed'] - len(progress['errors'])} more")
+
+@app.cli.command('products-export')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+def products_export_command(path):
+    """Write every product to a .csv or .jsonl file"""
+    fmt = detect_format(path)
+    if not fmt:
+        raise click.ClickException('The file must end in .csv or .jsonl')
+    with open(path, 'wb') as f:
+        for chunk in export_chunks(export_batches(), fmt):
+            f.write(chunk)
+    click.echo(f"Exported products to {path}")
+
+@app.cli.command('analytics-rollup')
+@click.option('--rebuild', is_flag=True, help='Empty the rollups and add every order again.')
+def analytics_rollup_command(rebuild):
+    """Add new orders to the daily sales rollups; run from cron, e.g. every minute"""
+    added = roll_up_sales(rebuild=rebuild)
+    click.echo(f"Added {added} order(s) to the sales rollups")
+
+@app.cli.command('recommendations-build')
+@click.option('--full', is_flag=True, help='Recompute every item, not just those on orders since the last build.')
+def recommendations_build_command(full):
+    """Refresh the "customers also bought" lists; run from cron, e.g. every few minutes and --full nightly"""
+    build = build_recommendations(full=full)
+    click.echo(f"{'Full' if build.full else 'Incremental'} build: {build.items_updated} items updated "
+               f"through order {build.last_order_id} in {build.duration_ms} ms "
+               f"({'NumPy/SciPy' if build.vectorized else 'pure Python'})")
+
+# Application Factory
+def session_store():
+    """The SessionStore named by SESSION_STORE, which may also be a store instance"""
+    store = app.config['SESSION_STORE']
+    if isinstance(store, SessionStore):
+        return store
+    if store == 'database':
+        return DatabaseSessionStore(lambda: db.engine)
+    if store == 'memory':
+        if app.config['WEB_CONCURRENCY'] > 1:
+            # Each worker would only know its own sessions, signing users out at random
+            raise RuntimeError('SESSION_STORE=memory cannot be shared by several workers; use database')
+        return MemorySessionStore()
+    raise RuntimeError(f'Unknown SESSION_STORE {store!r}; use database or memory')
+
+def create_app(config=None):
+    """Configure the app from the environment, overridden by config, and connect the database.
+
+    Runs once when this module is imported. Calling it again with other
+    settings (another database, replicas, pool sizes) reconnects with
+    those; it must happen before the app serves its first request.
+    """
+    global image_jobs
+    app.config.from_mapping(load_config())
+    app.config.from_mapping(config or {})
+    if 'sqlalchemy' in app.extensions:
+        # init_app disposes the engines it made last time before building new ones
+        del app.extensions['sqlalchemy']
+    db.init_app(app)
+    app.session_interface = ServerSideSessionInterface(session_store(), load_principal)
+
+    template_cache = app.config['TEMPLATE_CACHE_DIR']
+    if template_cache is None:
+        template_cache = os.path.join(app.instance_path, 'jinja_cache')
+    if template_cache:
+        # Compiled templates survive restarts, so new workers skip compiling them
+        os.makedirs(template_cache, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(template_cache)
+
+    if app.config['INSTRUMENTATION']:
+        install_instrumentation()
+    if image_jobs is None or not image_jobs.running:
+        image_jobs = new_image_job_runner()
+    return app
+
+create_app()
 
 if __name__ == '__main__':
     init_db()
+    # With the reloader, only the child process that serves requests runs the workers
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_image_jobs()
     app.run(host='0.0.0.0', debug=True)
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""Build step for the CSS / JS under static/: minify, bundle, fingerprint, precompress.
+
+`flask --app app assets-build` writes content-hashed copies to static/dist/
+with .gz and .br siblings, plus a manifest mapping each source path, as
+passed to url_for('static', ...), to its hashed copy. Without a manifest
+the source files are served as is.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli missing: the app still serves built assets, but cannot build them
+    brotli = None
+
+DIST_FOLDER = 'dist'
+MANIFEST_NAME = 'manifest.json'
+SOURCE_FOLDERS = ('css', 'js')
+HASH_LENGTH = 12
+
+# bundle name -> member sources, in load order
+BUNDLES = {
+    'css/site.css': ['css/header.css', 'css/home.css']
+}
+
+# (Accept-Encoding token, file suffix), in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+def brotli_supported():
+    return brotli is not None
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    # Spaces before ':' are kept: '.card :hover' and '.card:hover' differ
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}').strip() + '\n'
+
+def minify_js(text):
+    """Conservative: drops indentation, blank lines and whole-line // comments.
+
+    Line breaks are kept so automatic semicolon insertion still applies.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js
+}
+
+def source_files(static_folder):
+    """Paths relative to static_folder of every CSS / JS source"""
+    for folder in SOURCE_FOLDERS:
+        for root, _, filenames in os.walk(os.path.join(static_folder, folder)):
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1] in MINIFIERS:
+                    yield os.path.relpath(os.path.join(root, filename), static_folder).replace(os.sep, '/')
+
+def write_fingerprinted(static_folder, source_path, content):
+    """Write content as dist/<path>.<hash><ext> with compressed siblings; returns that path"""
+    data = content.encode('utf-8')
+    stem, extension = os.path.splitext(source_path)
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    output_path = f'{DIST_FOLDER}/{stem}.{digest}{extension}'
+    target = os.path.join(static_folder, output_path)
+    if os.path.exists(target):
+        return output_path
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+    with open(target + '.gz', 'wb') as f:
+        # mtime=0 keeps the .gz byte-identical between builds
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    with open(target + '.br', 'wb') as f:
+        f.write(brotli.compress(data, quality=11))
+    return output_path
+
+def build_assets(static_folder):
+    """Fingerprint every source and bundle, then write the manifest. Returns the manifest."""
+    if not brotli_supported():
+        raise RuntimeError('brotli is not installed')
+    minified = {}
+    for source_path in source_files(static_folder):
+        with open(os.path.join(static_folder, source_path), encoding='utf-8') as f:
+            minified[source_path] = MINIFIERS[os.path.splitext(source_path)[1]](f.read())
+
+    manifest = {path: write_fingerprinted(static_folder, path, content) for path, content in minified.items()}
+    for bundle, members in BUNDLES.items():
+        manifest[bundle] = write_fingerprinted(static_folder, bundle, ''.join(minified[member] for member in members))
+
+    # Replaced atomically so a running server never reads half a manifest
+    manifest_path = os.path.join(static_folder, DIST_FOLDER, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST_FOLDER, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def stale_files(static_folder, manifest):
+    """Files in dist/ that the manifest no longer points to"""
+    current = {MANIFEST_NAME}
+    for output_path in manifest.values():
+        relative = output_path[len(DIST_FOLDER) + 1:]
+        current.update(relative + suffix for suffix in ('', '.gz', '.br'))
+    dist = os.path.join(static_folder, DIST_FOLDER)
+    for root, _, filenames in os.walk(dist):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            if os.path.relpath(path, dist).replace(os.sep, '/') not in current:
+                yield path
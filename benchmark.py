@@ -0,0 +1,351 @@
+"""Reproducible load benchmark for the storefront routes.
+
+    python benchmark.py --items 1000 --output before.json
+    python benchmark.py --items 1000 --compare before.json
+
+Boots the app in-process against its own database (a SQLite file by
+default, or any URL given with --database), seeds it with a synthetic
+catalog, users, addresses, carts and orders, then drives each route
+from concurrent clients. Per route it reports p50 / p95 / p99 latency,
+throughput and SQL statements per request, and saves the run as JSON so
+results can be compared between commits.
+
+Requests go through the WSGI test client, so the numbers cover the app
+and the database but not an HTTP server or the network.
+"""
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from pricing import format_price, paise_to_rupees
+
+SEED = 1309
+SEED_BATCH_SIZE = 2000
+PASSWORD = 'benchmark'
+
+ADJECTIVES = ['Elegant', 'Classic', 'Modern', 'Royal', 'Luxury', 'Casual', 'Designer', 'Traditional',
+              'Premium', 'Everyday', 'Festive', 'Minimal', 'Layered', 'Flowing', 'Tailored']
+COLORS = ['Black', 'Navy', 'Maroon', 'Beige', 'Olive', 'Grey', 'Emerald', 'Plum', 'Ivory', 'Teal']
+FABRICS = ['Nida', 'Crepe', 'Chiffon', 'Linen', 'Silk', 'Jersey', 'Satin', 'Georgette']
+STYLES = ['Abaya', 'Open Abaya', 'Kimono Abaya', 'Butterfly Abaya', 'Embroidered Abaya', 'Kaftan']
+SECTIONS = ['Popular Items', 'New Arrivals', 'Best Deals']
+IMAGES = ['images/img1.jpg', 'images/img2.jpg', 'images/img3.jpeg', 'images/img5.jpg',
+          'images/img6.jpg', 'images/img7.jpg', 'images/img8.jpg']
+SEARCH_TERMS = ['abaya', 'black abaya', 'silk', 'embroidered', 'navy crepe', 'kimono', 'elegant',
+                'festive satin', 'linen open abaya', 'teal']
+
+# name -> (method, needs a signed in user), in the order they are run
+ROUTES = {
+    'home': ('GET', False),
+    'collection': ('GET', False),
+    'search': ('GET', False),
+    'product': ('GET', False),
+    'cart': ('GET', True),
+    'checkout': ('GET', True),
+    'order_create': ('POST', True)
+}
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def insert_batches(db, table, rows):
+    for start in range(0, len(rows), SEED_BATCH_SIZE):
+        db.session.execute(db.insert(table), rows[start:start + SEED_BATCH_SIZE])
+
+def seed(app_module, items, users, orders_per_user, cart_items):
+    """Fill an empty database with a synthetic catalog and customer history"""
+    db = app_module.db
+    rng = random.Random(SEED)
+    now = datetime.utcnow()
+
+    item_rows = []
+    for item_id in range(1, items + 1):
+        title = f'{rng.choice(ADJECTIVES)} {rng.choice(COLORS)} {rng.choice(FABRICS)} {rng.choice(STYLES)}'
+        price_paise = rng.randrange(499, 4999) * 100
+        created_at = now - timedelta(minutes=rng.randrange(0, 60 * 24 * 365))
+        item_rows.append({
+            'id': item_id, 'title': title, 'price': format_price(price_paise), 'price_paise': price_paise,
+            'image': rng.choice(IMAGES), 'section': rng.choice(SECTIONS),
+            'description': f'{title} in soft {title.split()[2].lower()} with a relaxed fit for every occasion.',
+            'in_stock': True, 'created_at': created_at, 'updated_at': created_at
+        })
+    insert_batches(db, app_module.Item, item_rows)
+    prices = {row['id']: row['price_paise'] for row in item_rows}
+
+    # Hashing is deliberately slow; every seeded user shares one password
+    password = generate_password_hash(PASSWORD)
+    insert_batches(db, app_module.User, [
+        {'id': user_id, 'name': f'Benchmark User {user_id}', 'email': f'user{user_id}@benchmark.invalid',
+         'password': password, 'is_active': True, 'is_admin': False, 'created_at': now}
+        for user_id in range(1, users + 1)
+    ])
+    insert_batches(db, app_module.Address, [
+        {'id': user_id, 'user_id': user_id, 'name': f'Benchmark User {user_id}', 'phone': '9000000000',
+         'address_line1': f'{user_id} Market Road', 'city': 'Hyderabad', 'state': 'Telangana',
+         'pincode': '500001', 'address_type': 'home', 'is_default': True, 'created_at': now}
+        for user_id in range(1, users + 1)
+    ])
+
+    cart_rows, order_rows, order_item_rows = [], [], []
+    for user_id in range(1, users + 1):
+        for item_id in rng.sample(range(1, items + 1), min(cart_items, items)):
+            cart_rows.append({'user_id': user_id, 'item_id': item_id, 'quantity': rng.randint(1, 3),
+                              'created_at': now})
+        for _ in range(orders_per_user):
+            order_id = len(order_rows) + 1
+            lines = [(item_id, rng.randint(1, 2)) for item_id in rng.sample(range(1, items + 1), min(3, items))]
+            order_rows.append({
+                'id': order_id, 'user_id': user_id, 'address_id': user_id, 'status': 'confirmed',
+                'payment_status': 'paid', 'created_at': now - timedelta(days=rng.randrange(0, 365)),
+                'total_amount': paise_to_rupees(sum(prices[item_id] * quantity for item_id, quantity in lines))
+            })
+            order_item_rows.extend({'order_id': order_id, 'item_id': item_id, 'quantity': quantity,
+                                    'price': paise_to_rupees(prices[item_id])} for item_id, quantity in lines)
+    insert_batches(db, app_module.Cart, cart_rows)
+    insert_batches(db, app_module.Order, order_rows)
+    insert_batches(db, app_module.OrderItem, order_item_rows)
+    db.session.commit()
+
+class RequestQueryCounter:
+    """Counts SQL statements per thread, so concurrent requests are counted separately"""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, *args):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+class BenchmarkClient:
+    """One simulated shopper: a test client, optionally signed in, and its own random stream"""
+
+    def __init__(self, app_module, user_id, product_paths, rng):
+        self.app_module = app_module
+        self.user_id = user_id
+        self.product_paths = product_paths
+        self.items = len(product_paths)
+        self.rng = rng
+        self.client = app_module.app.test_client()
+        if user_id:
+            with app_module.app.app_context():
+                user = app_module.db.session.get(app_module.User, user_id)
+                session_user = app_module.user_session_data(user)
+            with self.client.session_transaction() as session:
+                session['user'] = session_user
+
+    def refill_cart(self):
+        """Put items back in the cart before an order is placed; not part of the timing"""
+        app_module = self.app_module
+        with app_module.app.app_context():
+            if not app_module.Cart.query.filter_by(user_id=self.user_id).count():
+                app_module.db.session.add_all(
+                    app_module.Cart(user_id=self.user_id, item_id=item_id, quantity=1)
+                    for item_id in self.rng.sample(range(1, self.items + 1), min(2, self.items)))
+                app_module.db.session.commit()
+
+    def request(self, route):
+        """(method, path, form data) for one request to route"""
+        rng = self.rng
+        if route == 'home':
+            return 'GET', '/', None
+        if route == 'collection':
+            section = rng.choice(['', 'popular', 'new', 'deals'])
+            sort = rng.choice(['newest', 'price-low', 'price-high', 'name'])
+            return 'GET', f'/collection?filter={section}&sort={sort}', None
+        if route == 'search':
+            return 'GET', f'/search?q={rng.choice(SEARCH_TERMS).replace(" ", "+")}', None
+        if route == 'product':
+            return 'GET', rng.choice(self.product_paths), None
+        if route == 'cart':
+            return 'GET', '/cart', None
+        if route == 'checkout':
+            return 'GET', '/checkout', None
+        if route == 'order_create':
+            self.refill_cart()
+            return 'POST', '/order/create', {'address_id': self.user_id, 'idempotency_key': uuid.uuid4().hex}
+        raise ValueError(route)
+
+def run_route(app_module, counter, route, requests, concurrency, users, product_paths, warmup):
+    """Drive one route from concurrency clients; returns its summary dict"""
+    method, signed_in = ROUTES[route]
+    clients = [BenchmarkClient(app_module, (n % users) + 1 if signed_in else None, product_paths,
+                               random.Random(f'{SEED}-{route}-{n}'))
+               for n in range(concurrency)]
+    samples = []
+    samples_lock = threading.Lock()
+
+    def drive(client, count, record):
+        for _ in range(count):
+            method, path, data = client.request(route)
+            counter.reset()
+            started = time.perf_counter()
+            response = client.client.open(path, method=method, data=data)
+            elapsed = time.perf_counter() - started
+            if record:
+                with samples_lock:
+                    samples.append((elapsed, counter.count, response.status_code))
+
+    shares = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+    for client in clients:
+        drive(client, warmup, record=False)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(drive, client, share, True) for client, share in zip(clients, shares)]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+    queries = [count for _, count, _ in samples]
+    errors = sum(1 for _, _, status in samples if status >= 400)
+    return {
+        'route': route,
+        'method': method,
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / wall, 2) if wall else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'max': round(latencies[-1], 3)
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2),
+            'max': max(queries)
+        },
+        'statuses': sorted({status for _, _, status in samples})
+    }
+
+def compare(results, baseline, max_regression):
+    """Print p95 / query count changes against a baseline run; returns the routes that regressed"""
+    previous = {route['route']: route for route in baseline['routes']}
+    regressed = []
+    click.echo(f"\nAgainst {baseline.get('revision') or 'baseline'} ({baseline.get('started_at')}):")
+    for route in results['routes']:
+        before = previous.get(route['route'])
+        if not before:
+            continue
+        old_p95, new_p95 = before['latency_ms']['p95'], route['latency_ms']['p95']
+        change = (new_p95 - old_p95) / old_p95 * 100 if old_p95 else 0
+        query_change = route['queries']['max'] - before['queries']['max']
+        flag = ''
+        if change > max_regression or query_change > 0:
+            regressed.append(route['route'])
+            flag = '  REGRESSION'
+        click.echo(f"  {route['route']:<14} p95 {old_p95:>9.2f} -> {new_p95:>9.2f} ms ({change:+.1f}%)  "
+                   f"queries {before['queries']['max']} -> {route['queries']['max']}{flag}")
+    return regressed
+
+@click.command()
+@click.option('--items', type=int, default=1000, show_default=True, help='Catalog size (e.g. 1000 or 100000)')
+@click.option('--users', type=int, default=200, show_default=True)
+@click.option('--orders-per-user', type=int, default=5, show_default=True)
+@click.option('--cart-items', type=int, default=4, show_default=True, help='Seeded cart rows per user')
+@click.option('--requests', 'request_count', type=int, default=200, show_default=True, help='Timed requests per route')
+@click.option('--concurrency', type=int, default=8, show_default=True, help='Concurrent clients per route')
+@click.option('--warmup', type=int, default=3, show_default=True, help='Untimed requests per client first')
+@click.option('--route', 'routes', multiple=True, type=click.Choice(list(ROUTES)), help='Only these routes')
+@click.option('--database', default=None, help='SQLAlchemy URL (default: a SQLite file per catalog size)')
+@click.option('--reseed', is_flag=True, help='Drop and re-create the benchmark database first')
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='Write results as JSON')
+@click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Earlier results JSON to compare against')
+@click.option('--max-regression', type=float, default=20.0, show_default=True,
+              help='Allowed p95 slowdown (%) before --compare fails')
+def main(items, users, orders_per_user, cart_items, request_count, concurrency, warmup, routes,
+         database, reseed, output, baseline_path, max_regression):
+    """Seed a benchmark database and load-test the storefront routes"""
+    if database is None:
+        database = 'sqlite:///' + os.path.join(tempfile.gettempdir(),
+                                               f'elegant-store-benchmark-{items}-{users}.db')
+    import app as app_module
+    # Its own database, and no image workers competing for CPU
+    app_module.create_app({'SQLALCHEMY_DATABASE_URI': database, 'IMAGE_JOB_WORKERS': 0})
+    from migrations import run_migrations
+
+    app, db = app_module.app, app_module.db
+    with app.app_context():
+        if reseed:
+            db.drop_all()
+        db.create_all()
+        run_migrations(db.engine)
+        if app_module.Item.query.count() == 0:
+            click.echo(f"Seeding {items} items, {users} users ...")
+            started = time.perf_counter()
+            seed(app_module, items, users, orders_per_user, cart_items)
+            click.echo(f"Seeded in {time.perf_counter() - started:.1f}s")
+        # Canonical URLs, so product requests are not answered by the slug redirect
+        product_paths = [f'/product/{item_id}/{app_module.slugify(title)}'
+                         for item_id, title in db.session.query(app_module.Item.id, app_module.Item.title)]
+        items = len(product_paths)
+        users = app_module.User.query.count()
+        counter = RequestQueryCounter(db.engine)
+        database = db.engine.url.render_as_string(hide_password=True)
+
+    results = {
+        'revision': git_revision(),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'database': database,
+        'parameters': {'items': items, 'users': users, 'orders_per_user': orders_per_user,
+                       'cart_items': cart_items, 'requests': request_count,
+                       'concurrency': concurrency, 'warmup': warmup},
+        'routes': []
+    }
+    click.echo(f"{'route':<14}{'reqs':>6}{'err':>5}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}"
+               f"{'p99 ms':>10}{'queries':>9}")
+    for route in routes or ROUTES:
+        summary = run_route(app_module, counter, route, request_count, concurrency, users, product_paths, warmup)
+        results['routes'].append(summary)
+        latency = summary['latency_ms']
+        click.echo(f"{route:<14}{summary['requests']:>6}{summary['errors']:>5}{summary['throughput_rps']:>9}"
+                   f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}"
+                   f"{summary['queries']['mean']:>9}")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        click.echo(f"Results written to {output}")
+
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            regressed = compare(results, json.load(f), max_regression)
+        if regressed:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry expiry and LRU eviction.
+
+    version is bumped by invalidate() so callers can fold it into keys
+    (or ETags) and tell cached data from before and after a change.
+    Entries can also carry tags, e.g. the ids of the items they show, so
+    a single change only drops the entries that depend on it.
+    """
+
+    def __init__(self, default_ttl=300, max_entries=1024):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._key_tags = {}             # key -> tags of that entry
+        self._tagged = {}               # tag -> keys carrying it
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._discard(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (expires_at, value)
+            if tags:
+                self._key_tags[key] = set(tags)
+                for tag in tags:
+                    self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        """Remove key and its tag links; caller holds the lock"""
+        self._entries.pop(key, None)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def get_or_set(self, key, factory, ttl=None, tags=()):
+        """Return the cached value for key, computing and storing it on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value, ttl, tags)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def invalidate_tags(self, *tags):
+        """Drop every entry carrying any of tags"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tagged.get(tag, ())):
+                    self._discard(key)
+
+    def invalidate(self):
+        """Drop every entry and move to a new version"""
+        with self._lock:
+            self._entries.clear()
+            self._key_tags.clear()
+            self._tagged.clear()
+            self.version += 1
@@ -0,0 +1,144 @@
+"""Streaming product import / export in CSV or JSON Lines.
+
+Imports are read one row at a time from the uploaded file and handed on
+in batches, so a supplier catalog of any size is never held in memory;
+exports are written the same way from batches of rows.
+
+A product is identified by its sku. Columns:
+
+    sku, title, price, section, image   required
+    description, stock_quantity         optional; a blank stock_quantity means stock is not counted
+    id                                  only read when sku is blank, to update that existing product
+
+Products created before skus existed are exported with a blank sku and
+their id, so an export always imports back onto the same products.
+
+Only the optional columns present in the file are written on update, so
+a price list with no description column leaves descriptions alone.
+"""
+import csv
+import io
+import json
+import re
+
+from pricing import parse_price, format_price
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson'
+}
+REQUIRED_COLUMNS = ('sku', 'title', 'price', 'section', 'image')
+OPTIONAL_COLUMNS = ('description', 'stock_quantity')
+EXPORT_COLUMNS = ('id', 'sku', 'title', 'price', 'section', 'image', 'description', 'stock_quantity', 'in_stock')
+MAX_SKU_LENGTH = 64
+MAX_TITLE_LENGTH = 100
+MAX_IMAGE_LENGTH = 100
+
+_IMAGE_PATH = re.compile(r'^images/[\w\-./]+\.(jpg|jpeg|png|webp)$', re.I)
+
+class ImportRowError(ValueError):
+    pass
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if filename and '.' in filename else ''
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension == 'csv':
+        return 'csv'
+    return None
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or ImportRowError) from a binary stream"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {key.strip(): value for key, value in row.items() if key}
+        return
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, ImportRowError('not valid JSON')
+            continue
+        yield line_number, row if isinstance(row, dict) else ImportRowError('not a JSON object')
+
+def update_columns(first_row):
+    """Optional columns to write on update, as given by the file's first row"""
+    return [column for column in OPTIONAL_COLUMNS if column in first_row]
+
+def _text(row, column, max_length=None, required=False):
+    value = row.get(column)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise ImportRowError(f'{column} is required')
+    if max_length and len(value) > max_length:
+        raise ImportRowError(f'{column} is longer than {max_length} characters')
+    return value
+
+def validate_row(row, sections, columns):
+    """Item column values for a raw row; raises ImportRowError"""
+    price_paise = parse_price(row.get('price'))
+    if price_paise is None:
+        raise ImportRowError(f'invalid price {row.get("price")!r}')
+    section = _text(row, 'section', required=True)
+    if section not in sections:
+        raise ImportRowError(f'unknown section {section!r}')
+    image = _text(row, 'image', MAX_IMAGE_LENGTH, required=True)
+    if not _IMAGE_PATH.match(image) or '..' in image:
+        raise ImportRowError(f'image must be a path under images/, got {image!r}')
+
+    values = {
+        'title': _text(row, 'title', MAX_TITLE_LENGTH, required=True),
+        'price_paise': price_paise,
+        'price': format_price(price_paise),
+        'section': section,
+        'image': image
+    }
+    sku = _text(row, 'sku', MAX_SKU_LENGTH)
+    if sku:
+        values['sku'] = sku
+    else:
+        item_id = _text(row, 'id')
+        if not item_id.isdigit():
+            raise ImportRowError('sku is required, or the id of an existing product')
+        values['id'] = int(item_id)
+    if 'description' in columns:
+        values['description'] = _text(row, 'description') or None
+    if 'stock_quantity' in columns:
+        quantity = _text(row, 'stock_quantity')
+        if quantity and not quantity.isdigit():
+            raise ImportRowError(f'invalid stock_quantity {quantity!r}')
+        values['stock_quantity'] = int(quantity) if quantity else None
+        values['in_stock'] = not quantity or int(quantity) > 0
+    return values
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def export_chunks(batches, fmt):
+    """Encode batches of EXPORT_COLUMNS dicts, yielding one bytes chunk per batch"""
+    first = True
+    for batch in batches:
+        output = io.StringIO()
+        if fmt == 'csv':
+            writer = csv.DictWriter(output, fieldnames=EXPORT_COLUMNS, lineterminator='\n')
+            if first:
+                writer.writeheader()
+            writer.writerows(batch)
+        else:
+            for row in batch:
+                output.write(json.dumps(row, ensure_ascii=False) + '\n')
+        first = False
+        yield output.getvalue().encode('utf-8')
+    if first and fmt == 'csv':
+        yield (','.join(EXPORT_COLUMNS) + '\n').encode('utf-8')
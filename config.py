@@ -0,0 +1,76 @@
+"""Application settings read from the environment by create_app().
+
+Database:
+    DATABASE_URL            primary database (default: the local MySQL database)
+    DATABASE_REPLICA_URLS   comma-separated read replicas, used by read-only views
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT
+                            connection pool sizing; SQLAlchemy's defaults when unset
+    DB_POOL_RECYCLE         seconds before a pooled connection is replaced (default 280,
+                            under MySQL's usual wait_timeout)
+    DB_POOL_PRE_PING        '0' to skip the liveness check on checkout (default on)
+    REPLICA_STICKY_SECONDS  after a user writes, read their pages from the primary for
+                            this long so replica lag cannot hide the change (default 5)
+
+Sessions:
+    SESSION_STORE           'database' (default) keeps sessions in the server_session table,
+                            shared by every process and kept across restarts; 'memory' keeps
+                            them in this process only, and refuses to start when WEB_CONCURRENCY
+                            says there are several
+    WEB_CONCURRENCY         web server worker processes, as read by gunicorn (default 1)
+
+Templates:
+    TEMPLATE_CACHE_DIR      where compiled templates are kept between restarts (default
+                            instance/jinja_cache); empty to compile in memory only
+
+Analytics:
+    ANALYTICS_UTC_OFFSET_MINUTES
+                            the shop's time zone for daily sales figures (default 330, IST)
+"""
+import os
+
+DEFAULT_DATABASE_URL = 'mysql+mysqlconnector://root:@localhost/shaheen_atier'
+REPLICA_BIND_PREFIX = 'replica_'
+
+def _int(environ, name, default=None):
+    value = environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+def engine_options(environ):
+    """Pool settings applied to the primary and every replica"""
+    options = {
+        'pool_pre_ping': environ.get('DB_POOL_PRE_PING', '1') != '0',
+        'pool_recycle': _int(environ, 'DB_POOL_RECYCLE', 280)
+    }
+    for option, name in (('pool_size', 'DB_POOL_SIZE'), ('max_overflow', 'DB_MAX_OVERFLOW'),
+                         ('pool_timeout', 'DB_POOL_TIMEOUT')):
+        value = _int(environ, name)
+        if value is not None:
+            options[option] = value
+    return options
+
+def replica_binds(urls, options):
+    """SQLALCHEMY_BINDS entries for read replicas: replica_0, replica_1, ..."""
+    return {f'{REPLICA_BIND_PREFIX}{n}': dict(options, url=url) for n, url in enumerate(urls)}
+
+def load_config(environ=None):
+    environ = os.environ if environ is None else environ
+    options = engine_options(environ)
+    replicas = [url.strip() for url in environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    return {
+        'SECRET_KEY': environ.get('SECRET_KEY', 'yoursecretkey'),
+        'SQLALCHEMY_DATABASE_URI': environ.get('DATABASE_URL', DEFAULT_DATABASE_URL),
+        'SQLALCHEMY_ENGINE_OPTIONS': options,
+        'SQLALCHEMY_BINDS': replica_binds(replicas, options),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'REPLICA_STICKY_SECONDS': _int(environ, 'REPLICA_STICKY_SECONDS', 5),
+        'SESSION_STORE': environ.get('SESSION_STORE') or 'database',
+        'WEB_CONCURRENCY': _int(environ, 'WEB_CONCURRENCY', 1),
+        'TEMPLATE_CACHE_DIR': environ.get('TEMPLATE_CACHE_DIR'),
+        'ANALYTICS_UTC_OFFSET_MINUTES': _int(environ, 'ANALYTICS_UTC_OFFSET_MINUTES', 330),
+        'IMAGE_JOB_WORKERS': _int(environ, 'IMAGE_JOB_WORKERS', 2),  # 0: run `flask image-worker` instead
+        # Request timing, SQL and template metrics at /metrics and /admin/profile; off unless INSTRUMENTATION=1
+        'INSTRUMENTATION': environ.get('INSTRUMENTATION') == '1',
+        'INSTRUMENTATION_TOKEN': environ.get('INSTRUMENTATION_TOKEN'),  # for scrapers and X-Profile
+        'SLOW_QUERY_MS': _int(environ, 'SLOW_QUERY_MS', 100),
+        'PROFILE_SAMPLE_RATE': float(environ.get('PROFILE_SAMPLE_RATE') or 0)  # share of requests profiled
+    }
@@ -0,0 +1,200 @@
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow missing: pages fall back to the original uploads
+    Image = None
+
+# Width buckets for srcset; images narrower than a bucket stop at their own width
+VARIANT_WIDTHS = (320, 640, 1024)
+VARIANT_FOLDER = 'derived'
+HASH_CHUNK_SIZE = 1024 * 1024
+EXIF_ORIENTATION = 0x0112
+
+# Uploads are stored as <sha256><ext>; files named the older product_/user_<timestamp>_<name>
+# way are uploads too. Anything else in the folder (site artwork) is never touched.
+CONTENT_ADDRESSED_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+LEGACY_UPLOAD_NAME = re.compile(r'^(product|user)_\d{14,20}_')
+
+# mkstemp() creates files readable by their owner only; stored uploads are served as static
+# files, so they are made world-readable. A fixed mode, since the umask can only be read by
+# changing it for every thread in the process.
+UPLOAD_FILE_MODE = 0o644
+
+# A just-deduplicated upload may not be committed yet, so recently written files are kept
+ORPHAN_GRACE_SECONDS = 60
+
+# format -> (file extension, Pillow save options)
+VARIANT_FORMATS = {
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', {'quality': 80, 'method': 6}),
+    'avif': ('avif', {'quality': 60})
+}
+
+def images_supported():
+    return Image is not None
+
+def available_formats():
+    """Variant formats this Pillow build can encode"""
+    if Image is None:
+        return []
+    return [fmt for fmt in VARIANT_FORMATS if fmt == 'jpeg' or features.check(fmt)]
+
+def variant_widths(width):
+    widths = [bucket for bucket in VARIANT_WIDTHS if bucket < width]
+    widths.append(min(width, VARIANT_WIDTHS[-1]))
+    return sorted(set(widths))
+
+def file_digest(path):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def store_upload(stream, folder, extension):
+    """Copy an upload stream into folder under the SHA-256 of its bytes.
+
+    Returns (filename, duplicate). When a file with the same content is
+    already stored the copy is discarded and the existing file reused.
+    """
+    digest = hashlib.sha256()
+    descriptor, partial = tempfile.mkstemp(dir=folder, suffix='.part')
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                f.write(chunk)
+        filename = f'{digest.hexdigest()}{extension.lower()}'
+        target = os.path.join(folder, filename)
+        if os.path.exists(target):
+            os.utime(target)  # restart the orphan grace period
+            return filename, True
+        os.chmod(partial, UPLOAD_FILE_MODE)
+        os.replace(partial, target)
+        return filename, False
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+def is_managed_upload(image_path):
+    """True for uploaded files that may be deleted once nothing references them"""
+    filename = os.path.basename(image_path)
+    return bool(CONTENT_ADDRESSED_NAME.match(filename) or LEGACY_UPLOAD_NAME.match(filename))
+
+def variant_prefix(image_path):
+    """'images/<sha256>.jpg' -> 'images/derived/<hash>-', the start of its variant paths.
+
+    None for legacy uploads, whose names do not give away their content.
+    """
+    filename = os.path.basename(image_path)
+    if not CONTENT_ADDRESSED_NAME.match(filename):
+        return None
+    return f'{os.path.dirname(image_path)}/{VARIANT_FOLDER}/{filename[:32]}-'
+
+def delete_image_files(static_folder, image_path, grace_seconds=None, keep_variants=False):
+    """Delete an unreferenced upload and, for content-addressed files, its variants.
+
+    Variants of legacy uploads are left alone: an identical legacy file
+    elsewhere in the folder may still use them. Pass keep_variants when
+    another image with the same content still uses them. Returns bytes freed.
+    """
+    source = os.path.join(static_folder, image_path)
+    if not is_managed_upload(image_path) or not os.path.exists(source):
+        return 0
+    if grace_seconds is None:
+        grace_seconds = ORPHAN_GRACE_SECONDS
+    if time.time() - os.path.getmtime(source) < grace_seconds:
+        return 0
+
+    paths = [source]
+    prefix = variant_prefix(image_path)
+    if prefix and not keep_variants:
+        paths += glob.glob(os.path.join(static_folder, f'{prefix}*'))
+
+    freed = 0
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            freed += size
+        except FileNotFoundError:
+            pass
+    return freed
+
+def variant_path(image_path, content_hash, width, fmt):
+    """'images/a.jpg' -> 'images/derived/<hash>-320.webp' (paths relative to the static folder).
+
+    Variants are named by the content of the original, so identical
+    uploads share one set of files.
+    """
+    folder = os.path.dirname(image_path)
+    return f'{folder}/{VARIANT_FOLDER}/{content_hash[:32]}-{width}.{VARIANT_FORMATS[fmt][0]}'
+
+def save_atomically(image, target, fmt):
+    """Write through a temporary file so readers never see a half-written variant"""
+    partial = f'{target}.{os.getpid()}.part'
+    try:
+        image.save(partial, format=fmt.upper(), **VARIANT_FORMATS[fmt][1])
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+def generate_variants(static_folder, image_path, force=False):
+    """Write resized copies of static/<image_path> in every available format.
+
+    Returns {format: [[width, path], ...]} with paths relative to the static
+    folder, or None if Pillow is missing. Raises OSError for unreadable files.
+    """
+    return process_image(static_folder, image_path, force)['variants']
+
+def process_image(static_folder, image_path, force=False):
+    """Hash an uploaded image and make its variants, unless an identical
+    image already has them.
+
+    Returns {'content_hash', 'variants', 'duplicate'}. Runs in job worker
+    processes, so it only touches the filesystem.
+    """
+    source = os.path.join(static_folder, image_path)
+    content_hash = file_digest(source)
+    formats = available_formats()
+    if not formats:
+        return {'content_hash': content_hash, 'variants': None, 'duplicate': False}
+
+    with Image.open(source) as original:
+        # Only the header has been read so far; EXIF orientations 5-8 swap the axes
+        rotated = original.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8)
+        widths = variant_widths(original.height if rotated else original.width)
+        variants = {fmt: [[width, variant_path(image_path, content_hash, width, fmt)] for width in widths]
+                    for fmt in formats}
+        duplicate = all(os.path.exists(os.path.join(static_folder, path))
+                        for entries in variants.values() for _, path in entries)
+        if duplicate and not force:
+            return {'content_hash': content_hash, 'variants': variants, 'duplicate': True}
+
+        image = ImageOps.exif_transpose(original)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        os.makedirs(os.path.join(static_folder, os.path.dirname(image_path), VARIANT_FOLDER), exist_ok=True)
+        for index, width in enumerate(widths):
+            height = max(round(image.height * width / image.width), 1)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                target = os.path.join(static_folder, variants[fmt][index][1])
+                if force or not os.path.exists(target):
+                    save_atomically(resized, target, fmt)
+    return {'content_hash': content_hash, 'variants': variants, 'duplicate': False}
+
+def smallest_variant(variants, fmt='jpeg'):
+    """Path of the narrowest variant in fmt, e.g. for avatars, or None"""
+    if not variants or not variants.get(fmt):
+        return None
+    return min(variants[fmt])[1]
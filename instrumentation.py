@@ -0,0 +1,252 @@
+"""Opt-in per-request timing, SQL and template instrumentation.
+
+Each request gets a RequestRecord in a thread local; engine and template
+hooks add to it while the request runs, and when it finishes the record
+is folded into per-route totals (exported in Prometheus text format) and
+kept in a short list of recent requests for the admin profile view.
+"""
+import cProfile
+import io
+import itertools
+import pstats
+import threading
+import time
+from collections import defaultdict, deque
+
+try:
+    import pyinstrument
+except ImportError:  # pyinstrument missing: profiles are always taken with cProfile
+    pyinstrument = None
+
+# Upper bounds, in seconds, of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_REQUESTS = 200
+RECENT_PROFILES = 20
+SLOW_QUERY_SAMPLES = 50
+PROFILE_STATS_LINES = 40
+PARAMETERS_MAX_LENGTH = 500
+
+# (metric name, help, RouteTotals attribute) exported per route
+COUNTERS = (
+    ('sql_statements_total', 'SQL statements executed.', 'sql_count'),
+    ('sql_duration_seconds_total', 'Time spent in SQL statements.', 'sql_duration'),
+    ('template_render_seconds_total', 'Time spent rendering templates.', 'template_duration'),
+    ('slow_queries_total', 'SQL statements slower than the slow query threshold.', 'slow_queries')
+)
+
+_current = threading.local()
+
+class RequestRecord:
+    """Timings collected while one request runs"""
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.endpoint = None
+        self.status = None
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.sql_count = 0
+        self.sql_duration = 0.0
+        self.template_duration = 0.0
+        self.slow_queries = []
+        self.profile_id = None
+
+    def to_dict(self):
+        return {
+            'method': self.method,
+            'path': self.path,
+            'endpoint': self.endpoint,
+            'status': self.status,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 2),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_duration * 1000, 2),
+            'template_ms': round(self.template_duration * 1000, 2),
+            'slow_queries': self.slow_queries,
+            'profile_id': self.profile_id
+        }
+
+class RouteTotals:
+    def __init__(self):
+        self.statuses = defaultdict(int)  # (method, status) -> requests
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.sql_count = 0
+        self.sql_duration = 0.0
+        self.template_duration = 0.0
+        self.slow_queries = 0
+
+    def add(self, record):
+        self.statuses[(record.method, record.status)] += 1
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if record.duration <= bound:
+                self.buckets[index] += 1
+        self.count += 1
+        self.duration += record.duration
+        self.sql_count += record.sql_count
+        self.sql_duration += record.sql_duration
+        self.template_duration += record.template_duration
+        self.slow_queries += len(record.slow_queries)
+
+class Profiler:
+    """cProfile, or pyinstrument when asked for and installed, around one request"""
+
+    def __init__(self, kind='cprofile'):
+        self.kind = 'pyinstrument' if kind == 'pyinstrument' and pyinstrument is not None else 'cprofile'
+        self._profiler = pyinstrument.Profiler() if self.kind == 'pyinstrument' else cProfile.Profile()
+
+    def start(self):
+        if self.kind == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        """Stop profiling and return the report as text"""
+        if self.kind == 'pyinstrument':
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True, color=False)
+        self._profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(self._profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_STATS_LINES)
+        return output.getvalue()
+
+class Instrumentation:
+    """Per-route totals, recent requests, slow query samples and captured profiles"""
+
+    def __init__(self, slow_query_seconds=0.1):
+        self.slow_query_seconds = slow_query_seconds
+        self.routes = defaultdict(RouteTotals)
+        self.recent = deque(maxlen=RECENT_REQUESTS)
+        self.slow_queries = deque(maxlen=SLOW_QUERY_SAMPLES)
+        self.profiles = deque(maxlen=RECENT_PROFILES)
+        self._profile_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # Request lifecycle
+    def begin(self, method, path):
+        _current.template_started = []
+        record = _current.record = RequestRecord(method, path)
+        return record
+
+    def finish(self, endpoint, status):
+        """Close the current request's record and add it to the totals; returns it"""
+        record = getattr(_current, 'record', None)
+        if record is None:
+            return None
+        _current.record = None
+        record.duration = time.perf_counter() - record.started
+        record.endpoint = endpoint or 'unmatched'
+        record.status = status
+        with self._lock:
+            self.routes[record.endpoint].add(record)
+            self.recent.append(record.to_dict())
+            for sample in record.slow_queries:
+                self.slow_queries.append(dict(sample, endpoint=record.endpoint, path=record.path))
+        return record
+
+    def add_profile(self, record, kind, report):
+        with self._lock:
+            record.profile_id = next(self._profile_ids)
+            self.profiles.append({'id': record.profile_id, 'kind': kind, 'method': record.method,
+                                  'path': record.path, 'started_at': record.started_at, 'report': report})
+
+    def profile(self, profile_id):
+        with self._lock:
+            return next((profile for profile in self.profiles if profile['id'] == profile_id), None)
+
+    # SQLAlchemy engine events: listen on Engine so every engine is covered
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if getattr(_current, 'record', None) is not None:
+            conn.info.setdefault('instrumentation_started', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        record = getattr(_current, 'record', None)
+        started = conn.info.get('instrumentation_started')
+        if record is None or not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        record.sql_count += 1
+        record.sql_duration += elapsed
+        if elapsed >= self.slow_query_seconds:
+            record.slow_queries.append({
+                'statement': ' '.join(statement.split()),
+                'parameters': repr(parameters)[:PARAMETERS_MAX_LENGTH],
+                'duration_ms': round(elapsed * 1000, 2)
+            })
+
+    def handle_error(self, context):
+        # The statement failed, so after_cursor_execute will not pop its start time
+        started = context.connection.info.get('instrumentation_started') if context.connection is not None else None
+        if started:
+            started.pop()
+
+    # Flask template signals
+    def before_render_template(self, sender, template, context, **extra):
+        if getattr(_current, 'record', None) is not None:
+            _current.template_started.append(time.perf_counter())
+
+    def template_rendered(self, sender, template, context, **extra):
+        record = getattr(_current, 'record', None)
+        started = getattr(_current, 'template_started', None)
+        if record is not None and started:
+            elapsed = time.perf_counter() - started.pop()
+            # Only the outermost render counts, so included templates are not added twice
+            if not started:
+                record.template_duration += elapsed
+
+    # Prometheus text exposition format
+    def prometheus(self, prefix='elegant_store'):
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                f'# HELP {prefix}_http_requests_total Requests handled, by route, method and status.',
+                f'# TYPE {prefix}_http_requests_total counter'
+            ]
+            for endpoint, totals in routes:
+                for (method, status), count in sorted(totals.statuses.items()):
+                    lines.append(f'{prefix}_http_requests_total'
+                                 f'{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+            lines += [f'# HELP {prefix}_http_request_duration_seconds Wall time per request, by route.',
+                      f'# TYPE {prefix}_http_request_duration_seconds histogram']
+            for endpoint, totals in routes:
+                for bound, count in zip(DURATION_BUCKETS, totals.buckets):
+                    lines.append(f'{prefix}_http_request_duration_seconds_bucket'
+                                 f'{_labels(endpoint=endpoint, le=bound)} {count}')
+                lines.append(f'{prefix}_http_request_duration_seconds_bucket'
+                             f'{_labels(endpoint=endpoint, le="+Inf")} {totals.count}')
+                lines.append(f'{prefix}_http_request_duration_seconds_sum{_labels(endpoint=endpoint)} '
+                             f'{totals.duration:.6f}')
+                lines.append(f'{prefix}_http_request_duration_seconds_count{_labels(endpoint=endpoint)} '
+                             f'{totals.count}')
+
+            for name, help_text, attribute in COUNTERS:
+                lines += [f'# HELP {prefix}_{name} {help_text}', f'# TYPE {prefix}_{name} counter']
+                for endpoint, totals in routes:
+                    value = getattr(totals, attribute)
+                    value = f'{value:.6f}' if isinstance(value, float) else value
+                    lines.append(f'{prefix}_{name}{_labels(endpoint=endpoint)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def route_summaries(self):
+        """Per-route averages for the admin view, slowest first"""
+        with self._lock:
+            summaries = [{
+                'endpoint': endpoint,
+                'count': totals.count,
+                'mean_ms': round(totals.duration / totals.count * 1000, 2),
+                'sql_per_request': round(totals.sql_count / totals.count, 2),
+                'sql_ms': round(totals.sql_duration / totals.count * 1000, 2),
+                'template_ms': round(totals.template_duration / totals.count * 1000, 2),
+                'slow_queries': totals.slow_queries
+            } for endpoint, totals in self.routes.items() if totals.count]
+        return sorted(summaries, key=lambda summary: summary['mean_ms'], reverse=True)
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
@@ -0,0 +1,121 @@
+"""Database-backed job queue drained by a process pool.
+
+Jobs are rows in a table, so queued work survives restarts. The
+dispatcher thread claims rows with a conditional UPDATE, which lets any
+number of web or worker processes share one queue without running a job
+twice. The CPU-heavy part of each job runs in a worker process; the
+calling process only does the bookkeeping.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+class JobRunner:
+    """Feeds claimed jobs to a process pool and reports their results.
+
+    claim(limit) returns up to limit (job_id, args) pairs it has marked as
+    running; work(*args) runs in a worker process and must be a picklable
+    module-level function; complete(job_id, result, error) records the
+    outcome. recover(), if given, runs once at start to requeue jobs left
+    running by a process that died.
+    """
+
+    def __init__(self, claim, work, complete, recover=None, workers=2, poll_interval=2.0):
+        self.claim = claim
+        self.work = work
+        self.complete = complete
+        self.recover = recover
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._pool = None
+        self._pool_broken = False
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._slots = threading.Semaphore(workers)
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._pool = self._new_pool()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=True):
+        with self._lock:
+            if not self.running:
+                return
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._pool.shutdown(wait=wait)
+            self._thread = None
+            self._pool = None
+
+    def _new_pool(self):
+        # spawn: forking a threaded web server can copy held locks into the children
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def wake(self):
+        """Check the queue now instead of at the next poll"""
+        self._wake.set()
+
+    def _dispatch(self):
+        if self.recover:
+            self._report_errors(self.recover)
+        while not self._stop.is_set():
+            if self._pool_broken:
+                # A worker died (e.g. killed for memory); its jobs were reported
+                # as failed and requeued, so carry on with a fresh pool
+                self._pool.shutdown(wait=False)
+                self._pool = self._new_pool()
+                self._pool_broken = False
+
+            # Only claim as many jobs as there are idle workers, so the rest
+            # stay queued for other processes sharing the table
+            free = 0
+            while self._slots.acquire(blocking=False):
+                free += 1
+            jobs = (self._report_errors(self.claim, free) or []) if free else []
+            for _ in range(free - len(jobs)):
+                self._slots.release()
+
+            for job_id, args in jobs:
+                try:
+                    future = self._pool.submit(self.work, *args)
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        self._pool_broken = True
+                    self._slots.release()
+                    self._report_errors(self.complete, job_id, None, e)
+                    continue
+                future.add_done_callback(lambda future, job_id=job_id: self._finished(job_id, future))
+
+            if len(jobs) < free or not free:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _finished(self, job_id, future):
+        self._slots.release()
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._pool_broken = True
+        result = None if error else future.result()
+        self._report_errors(self.complete, job_id, result, error)
+        self._wake.set()
+
+    def _report_errors(self, callback, *args):
+        try:
+            return callback(*args)
+        except Exception as e:
+            # The database being briefly unavailable must not kill the dispatcher
+            print(f"Job queue error in {callback.__name__}: {e}")
+            return None
@@ -0,0 +1,174 @@
+"""Versioned schema migrations for databases created before a model change.
+
+db.create_all() builds new tables from the models but never alters
+existing ones. Each migration below brings an older table up to the
+current models and is written to be a no-op on a freshly created schema.
+Applied migration ids are recorded in the schema_migrations table; run
+pending ones with init_db() or `flask --app app db-upgrade`.
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table, inspect, text
+from pricing import parse_price
+
+BACKFILL_BATCH_SIZE = 1000
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations', migration_metadata,
+    Column('id', String(100), primary_key=True),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+def index_names(conn, table_name):
+    inspector = inspect(conn)
+    names = {index['name'] for index in inspector.get_indexes(table_name)}
+    names.update(constraint['name'] for constraint in inspector.get_unique_constraints(table_name))
+    return names
+
+def create_index(conn, table_name, name, columns, unique=False):
+    """Create an index on an existing table unless one with that name exists"""
+    if name in index_names(conn, table_name):
+        return
+    print(f"Creating index {name} on {table_name}...")
+    table = Table(table_name, MetaData(), autoload_with=conn)
+    Index(name, *(table.c[column] for column in columns), unique=unique).create(conn)
+
+def delete_duplicate_pairs(conn, table_name, columns):
+    """Keep only the oldest row for each combination of columns"""
+    group = ', '.join(columns)
+    # The derived table lets MySQL delete from the table it is reading
+    result = conn.execute(text(
+        f'DELETE FROM {table_name} WHERE id NOT IN '
+        f'(SELECT id FROM (SELECT MIN(id) AS id FROM {table_name} GROUP BY {group}) AS keep)'
+    ))
+    if result.rowcount:
+        print(f"Removed {result.rowcount} duplicate rows from {table_name}")
+
+def backfill_item_prices(conn):
+    """Fill price_paise from the legacy '₹1,499' price strings, in id order batches"""
+    updated = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text('SELECT id, price FROM item WHERE id > :last_id AND price_paise = 0 '
+                 'ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            return updated
+
+        params = []
+        for item_id, price in rows:
+            paise = parse_price(price)
+            if paise:
+                params.append({'id': item_id, 'paise': paise})
+        if params:
+            conn.execute(text('UPDATE item SET price_paise = :paise WHERE id = :id'), params)
+        updated += len(params)
+        last_id = rows[-1][0]
+
+def add_item_price_paise(conn):
+    """Numeric price column, backfilled from the display strings"""
+    columns = {column['name'] for column in inspect(conn).get_columns('item')}
+    if 'price_paise' not in columns:
+        print("Adding item.price_paise column...")
+        conn.execute(text('ALTER TABLE item ADD COLUMN price_paise INTEGER NOT NULL DEFAULT 0'))
+
+    updated = backfill_item_prices(conn)
+    if updated:
+        print(f"Backfilled price_paise for {updated} items")
+
+def add_item_fulltext_index(conn):
+    """MySQL FULLTEXT index used by product search"""
+    if conn.dialect.name != 'mysql' or 'ft_item_search' in index_names(conn, 'item'):
+        return
+    print("Creating FULLTEXT index on item...")
+    conn.execute(text('ALTER TABLE item ADD FULLTEXT INDEX ft_item_search (title, description, section)'))
+
+def add_catalog_and_order_indexes(conn):
+    """Catalog listing sort / filter indexes and order history indexes"""
+    create_index(conn, 'item', 'ix_item_created_id', ['created_at', 'id'])
+    create_index(conn, 'item', 'ix_item_section_created_id', ['section', 'created_at', 'id'])
+    create_index(conn, 'item', 'ix_item_title_id', ['title', 'id'])
+    create_index(conn, 'item', 'ix_item_price_paise_id', ['price_paise', 'id'])
+    create_index(conn, 'item', 'ix_item_section_price_paise_id', ['section', 'price_paise', 'id'])
+    create_index(conn, 'order', 'ix_order_user_created_id', ['user_id', 'created_at', 'id'])
+    create_index(conn, 'order_item', 'ix_order_item_order_id', ['order_id'])
+
+def add_lookup_indexes_and_unique_pairs(conn):
+    """Per-user lookup indexes, and one cart / wishlist row per (user, item)"""
+    create_index(conn, 'address', 'ix_address_user_id', ['user_id'])
+    for table_name in ('cart', 'wishlist'):
+        name = f'uq_{table_name}_user_item'
+        if name not in index_names(conn, table_name):
+            delete_duplicate_pairs(conn, table_name, ['user_id', 'item_id'])
+            create_index(conn, table_name, name, ['user_id', 'item_id'], unique=True)
+
+def add_image_variant_columns(conn):
+    """Responsive image variant paths; fill them with `flask --app app images-backfill`"""
+    for table_name, column in (('item', 'image_variants'), ('user', 'profile_image_variants')):
+        columns = {existing['name'] for existing in inspect(conn).get_columns(table_name)}
+        if column not in columns:
+            print(f"Adding {table_name}.{column} column...")
+            table = conn.dialect.identifier_preparer.quote(table_name)
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} JSON NULL'))
+
+def add_item_updated_at(conn):
+    """Last change stamp used for catalog ETag / Last-Modified headers"""
+    columns = {column['name'] for column in inspect(conn).get_columns('item')}
+    if 'updated_at' not in columns:
+        print("Adding item.updated_at column...")
+        conn.execute(text('ALTER TABLE item ADD COLUMN updated_at DATETIME NULL'))
+    conn.execute(text('UPDATE item SET updated_at = created_at WHERE updated_at IS NULL'))
+    create_index(conn, 'item', 'ix_item_updated_at', ['updated_at'])
+
+def add_stock_and_idempotency_key(conn):
+    """Counted stock per item (NULL: not counted) and one order per checkout submit"""
+    if 'stock_quantity' not in {column['name'] for column in inspect(conn).get_columns('item')}:
+        print("Adding item.stock_quantity column...")
+        conn.execute(text('ALTER TABLE item ADD COLUMN stock_quantity INTEGER NULL'))
+    if 'idempotency_key' not in {column['name'] for column in inspect(conn).get_columns('order')}:
+        print("Adding order.idempotency_key column...")
+        table = conn.dialect.identifier_preparer.quote('order')
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN idempotency_key VARCHAR(64) NULL'))
+    create_index(conn, 'order', 'uq_order_user_idempotency_key', ['user_id', 'idempotency_key'], unique=True)
+
+def add_item_sku(conn):
+    """Supplier SKU that bulk imports match products on"""
+    if 'sku' not in {column['name'] for column in inspect(conn).get_columns('item')}:
+        print("Adding item.sku column...")
+        conn.execute(text('ALTER TABLE item ADD COLUMN sku VARCHAR(64) NULL'))
+    create_index(conn, 'item', 'uq_item_sku', ['sku'], unique=True)
+
+# Applied in order; never rename or reorder an entry once it has shipped
+MIGRATIONS = [
+    ('0001_item_price_paise', add_item_price_paise),
+    ('0002_item_fulltext_index', add_item_fulltext_index),
+    ('0003_catalog_and_order_indexes', add_catalog_and_order_indexes),
+    ('0004_lookup_indexes_and_unique_pairs', add_lookup_indexes_and_unique_pairs),
+    ('0005_image_variant_columns', add_image_variant_columns),
+    ('0006_item_updated_at', add_item_updated_at),
+    ('0007_stock_and_idempotency_key', add_stock_and_idempotency_key),
+    ('0008_item_sku', add_item_sku)
+]
+
+def applied_migrations(engine):
+    migration_metadata.create_all(engine)
+    with engine.connect() as conn:
+        return {row.id for row in conn.execute(schema_migrations.select())}
+
+def pending_migrations(engine):
+    applied = applied_migrations(engine)
+    return [(migration_id, migration) for migration_id, migration in MIGRATIONS if migration_id not in applied]
+
+def run_migrations(engine):
+    """Apply pending migrations, each in its own transaction. Returns the ids applied."""
+    applied = []
+    for migration_id, migration in pending_migrations(engine):
+        print(f"Applying migration {migration_id}...")
+        with engine.begin() as conn:
+            migration(conn)
+            conn.execute(schema_migrations.insert().values(id=migration_id, applied_at=datetime.utcnow()))
+        applied.append(migration_id)
+    return applied
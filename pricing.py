@@ -0,0 +1,47 @@
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CURRENCY_SYMBOL = '₹'
+
+_PRICE_CHARS = re.compile(r'[^0-9.\-]')
+
+def parse_price(value):
+    """Convert a price such as '₹1,499', '1499.50' or 1499 to integer paise.
+
+    Returns None if the value cannot be read as a non-negative amount.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, Decimal)) and not isinstance(value, bool):
+        amount = Decimal(value)
+    else:
+        text = _PRICE_CHARS.sub('', str(value))
+        if not text:
+            return None
+        try:
+            amount = Decimal(text)
+        except InvalidOperation:
+            return None
+    if amount < 0:
+        return None
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+def format_price(paise):
+    """Format integer paise for display: 149900 -> '₹1,499', 149950 -> '₹1,499.50'"""
+    if paise is None:
+        return ''
+    rupees, cents = divmod(int(paise), 100)
+    if cents:
+        return f'{CURRENCY_SYMBOL}{rupees:,}.{cents:02d}'
+    return f'{CURRENCY_SYMBOL}{rupees:,}'
+
+def format_amount(paise):
+    """Plain rupee amount for form fields, which parse_price reads back: 100000 -> '1000', 149950 -> '1499.50'"""
+    if paise is None:
+        return ''
+    rupees, cents = divmod(int(paise), 100)
+    return f'{rupees}.{cents:02d}' if cents else str(rupees)
+
+def paise_to_rupees(paise):
+    """Float rupees for the legacy Float columns on Order and OrderItem"""
+    return (paise or 0) / 100
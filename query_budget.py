@@ -0,0 +1,60 @@
+from sqlalchemy import event
+
+# Maximum SQL statements a single request may issue, whatever the size of the
+# user's cart, wishlist or order history. Includes the header count lookup and
+# the server-side session lookup (none with SESSION_STORE=memory).
+QUERY_BUDGETS = {
+    'cart': 4,
+    'checkout': 5,
+    'wishlist': 4,
+    'orders': 5,
+    'order_confirmation': 5
+}
+
+class QueryCounter:
+    """Context manager recording every SQL statement executed on an engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+def run_query_budgets(app, engine, session_user, routes, expected_status=200):
+    """Request each (name, path, budget) route as session_user and count its SQL.
+
+    Returns one dict per route with status, count, budget, statements and
+    ok. A route only passes if it also answered with expected_status: a
+    redirect away from the page (say, checkout with an empty cart) says
+    nothing about what the page itself costs.
+    """
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user'] = session_user
+
+    results = []
+    for name, path, budget in routes:
+        with QueryCounter(engine) as counter:
+            response = client.get(path)
+        results.append({
+            'name': name,
+            'path': path,
+            'status': response.status_code,
+            'count': counter.count,
+            'budget': budget,
+            'statements': counter.statements,
+            'ok': response.status_code == expected_status and counter.count <= budget
+        })
+    return results
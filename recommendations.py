@@ -0,0 +1,126 @@
+"""Item-to-item recommendations from what customers buy, save and carry together.
+
+History comes in as (signal, basket, item id) rows: the items of one
+order, or one user's wishlist or cart, form a basket. Two items score by
+the weighted number of baskets holding both, divided by the geometric
+mean of each item's own weighted basket count (cosine similarity), so
+bestsellers do not crowd out every list.
+
+NumPy and SciPy are required in production, where this is one sparse
+matrix product. The pure-Python fallback counts the same scores pair by
+pair and is only meant for development checkouts without them.
+"""
+import math
+from collections import defaultdict
+from itertools import combinations
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # development without NumPy / SciPy: co-occurrence is counted in pure Python
+    np = sparse = None
+
+TOP_K = 12
+
+# signal -> weight of one basket; a shared order says more than a shared wishlist
+SIGNAL_WEIGHTS = {
+    'order': 3.0,
+    'wishlist': 1.0,
+    'cart': 1.0
+}
+
+def vectorized():
+    return sparse is not None
+
+def top_neighbours(history, items=None, k=TOP_K):
+    """Best k neighbours of each item, as {item id: [(neighbour id, score), ...]} best first.
+
+    items limits the lists computed (every item in history when None),
+    which is what makes refreshing after a few new orders cheap: scores
+    still count the whole history.
+    """
+    if vectorized():
+        return _top_neighbours_sparse(history, items, k)
+    return _top_neighbours_python(history, items, k)
+
+def cooccurring(history, items):
+    """items plus every item sharing a basket with one of them.
+
+    A new order changes its items' basket counts, and with them the score of
+    every pair they are part of, so these are the lists it can change.
+    """
+    baskets = defaultdict(set)
+    for signal, basket, item_id in history:
+        baskets[(signal, basket)].add(item_id)
+    affected = set(items)
+    for members in baskets.values():
+        if not members.isdisjoint(items):
+            affected |= members
+    return affected
+
+def _top_neighbours_sparse(history, items, k):
+    signals, baskets, item_ids = [], [], []
+    for signal, basket, item_id in history:
+        signals.append(signal)
+        baskets.append(f'{signal}:{basket}')
+        item_ids.append(item_id)
+    if not item_ids:
+        return {}
+
+    basket_keys, basket_index = np.unique(np.array(baskets), return_inverse=True)
+    columns, item_index = np.unique(np.array(item_ids, dtype=np.int64), return_inverse=True)
+    # basket x item incidence, each row scaled by the square root of its weight so that
+    # B.T @ B sums the weights of the baskets shared by each pair of items
+    incidence = sparse.csr_matrix((np.ones(len(item_ids)), (basket_index, item_index)),
+                                  shape=(len(basket_keys), len(columns)))
+    incidence.data[:] = 1.0  # an item twice in one basket still counts once
+    weights = np.zeros(len(basket_keys))
+    weights[basket_index] = [SIGNAL_WEIGHTS[signal] for signal in signals]
+    incidence = (sparse.diags(np.sqrt(weights)) @ incidence).tocsc()
+
+    norms = np.sqrt(np.asarray(incidence.multiply(incidence).sum(axis=0)).ravel())
+    if items is None:
+        rows = np.arange(len(columns))
+    else:
+        rows = np.flatnonzero(np.isin(columns, np.fromiter(items, dtype=np.int64)))
+    cooccurrence = (incidence[:, rows].T @ incidence).tocsr()
+
+    neighbours = {}
+    for position, row in enumerate(rows):
+        start, end = cooccurrence.indptr[position], cooccurrence.indptr[position + 1]
+        others = cooccurrence.indices[start:end]
+        keep = others != row
+        others = others[keep]
+        if not len(others):
+            continue
+        scores = cooccurrence.data[start:end][keep] / (norms[row] * norms[others])
+        if len(others) > k:
+            best = np.argpartition(-scores, k)[:k]
+            others, scores = others[best], scores[best]
+        order = np.lexsort((columns[others], -scores))
+        neighbours[int(columns[row])] = [(int(columns[others[i]]), float(scores[i])) for i in order]
+    return neighbours
+
+def _top_neighbours_python(history, items, k):
+    baskets = defaultdict(set)
+    for signal, basket, item_id in history:
+        baskets[(signal, basket)].add(item_id)
+
+    counts = defaultdict(float)
+    pairs = defaultdict(lambda: defaultdict(float))
+    for (signal, _), members in baskets.items():
+        weight = SIGNAL_WEIGHTS[signal]
+        for item_id in members:
+            counts[item_id] += weight
+        for first, second in combinations(members, 2):
+            if items is None or first in items:
+                pairs[first][second] += weight
+            if items is None or second in items:
+                pairs[second][first] += weight
+
+    neighbours = {}
+    for item_id, shared in pairs.items():
+        scored = [(other, weight / math.sqrt(counts[item_id] * counts[other])) for other, weight in shared.items()]
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        neighbours[item_id] = scored[:k]
+    return neighbours
@@ -0,0 +1,26 @@
+"""Read replica routing for the Flask-SQLAlchemy session.
+
+Binds named replica_<n> in SQLALCHEMY_BINDS are read-only copies of the
+primary. A view opts in by setting session.info['replica_bind']; from
+then on plain SELECTs go to that replica, while writes, locking reads
+and anything after the session's first write go to the primary, so a
+request always reads what it has just written.
+"""
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+from config import REPLICA_BIND_PREFIX
+
+def replica_keys(binds):
+    return sorted(key for key in binds if key and key.startswith(REPLICA_BIND_PREFIX))
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica_bind')
+        if bind is None and replica is not None and not self.info.get('wrote'):
+            if isinstance(clause, Select) and clause._for_update_arg is None and not self._flushing:
+                return self._db.engines[replica]
+        if self._flushing or (clause is not None and not isinstance(clause, Select)):
+            # Read back by app.py to keep this user on the primary for a few seconds
+            self.info['wrote'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
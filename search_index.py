@@ -0,0 +1,213 @@
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Field weights used when counting term frequency for a product
+FIELD_WEIGHTS = {
+    'title': 3,
+    'section': 2,
+    'description': 1
+}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'with'
+}
+
+# Ranking penalty for terms matched only by prefix (e.g. 'embro' -> 'embroidery')
+PREFIX_MATCH_WEIGHT = 0.8
+MAX_PREFIX_EXPANSIONS = 50
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+_SUFFIXES = (
+    ('sses', 'ss'),
+    ('ches', 'ch'),
+    ('shes', 'sh'),
+    ('xes', 'x'),
+    ('ies', 'y'),
+    ('ing', ''),
+    ('ed', ''),
+    ('ly', ''),
+    ('s', '')
+)
+
+def stem(word):
+    """Light suffix-stripping stemmer: 'abayas' -> 'abaya', 'designed' -> 'design'"""
+    if len(word) <= 3 or word.endswith('ss'):
+        return word
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    return word
+
+def tokenize(text):
+    """Lowercased, stemmed terms of text without stopwords"""
+    if not text:
+        return []
+    return [stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+class SearchIndex:
+    """In-process inverted index over product title, section and description.
+
+    Documents are scored with BM25 using field-weighted term frequencies.
+    Every query term must match, either exactly or as a prefix of an
+    indexed term, so partially typed words still find products.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}      # term -> {doc_id: weighted tf}
+            self._doc_terms = {}     # doc_id -> set of terms, for removal
+            self._doc_lengths = {}   # doc_id -> weighted length
+            self._total_length = 0
+            self._terms = []         # sorted terms, for prefix lookups
+            self.built = False
+            self.catalog_version = None  # the catalog state it was built from, set by the caller
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_lengths
+
+    def add(self, doc_id, title='', description='', section=''):
+        """Index a product, replacing any previous version of it"""
+        frequencies = Counter()
+        for field, text in (('title', title), ('description', description), ('section', section)):
+            for term in tokenize(text):
+                frequencies[term] += FIELD_WEIGHTS[field]
+
+        with self._lock:
+            self.remove(doc_id)
+            for term, frequency in frequencies.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    insort(self._terms, term)
+                postings[doc_id] = frequency
+            length = sum(frequencies.values())
+            self._doc_terms[doc_id] = set(frequencies)
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            self._total_length -= self._doc_lengths.pop(doc_id)
+            for term in terms:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+                    del self._terms[bisect_left(self._terms, term)]
+
+    def _expand(self, token):
+        """Indexed terms matching token exactly or by prefix, with their weight"""
+        matches = []
+        start = bisect_left(self._terms, token)
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            matches.append((term, 1.0 if term == token else PREFIX_MATCH_WEIGHT))
+        return matches
+
+    def search(self, query, limit=20, offset=0):
+        """Return (doc_ids, total) for one page of results, best match first"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not doc_count:
+                return [], 0
+            average_length = self._total_length / doc_count
+
+            scores = None
+            for token in tokens:
+                token_scores = {}
+                for term, weight in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, frequency in postings.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / average_length)
+                        score = weight * idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                        if score > token_scores.get(doc_id, 0):
+                            token_scores[doc_id] = score
+
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {doc_id: score + token_scores[doc_id]
+                              for doc_id, score in scores.items() if doc_id in token_scores}
+                if not scores:
+                    return [], 0
+
+        ranked = sorted(scores.items(), key=lambda entry: (-entry[1], -entry[0]))
+        return [doc_id for doc_id, _ in ranked[offset:offset + limit]], len(ranked)
+
+def mysql_boolean_query(query):
+    """Build a MySQL FULLTEXT boolean-mode query requiring every stemmed term as a prefix"""
+    return ' '.join(f'+{term}*' for term in dict.fromkeys(tokenize(query)))
+
+class SuggestionIndex:
+    """Sorted-array prefix index of product titles and sections for autocomplete.
+
+    Every word position of a phrase is stored as a key, so 'bla' matches
+    'Elegant Black Abaya' as well as phrases that start with it. Lookups
+    are two bisects plus a short scan and never touch the database.
+    """
+
+    def __init__(self):
+        # (sorted normalized keys, parallel (phrase, kind, rank, id) entries), swapped atomically
+        self._index = ([], [])
+        self.stale = True
+        self.catalog_version = None  # the catalog state it was built from, set by the caller
+
+    def __len__(self):
+        return len(self._index[0])
+
+    def rebuild(self, products, sections):
+        """Index (id, title) product pairs and section names"""
+        phrases = [(section, 'section', None) for section in set(sections)]
+        phrases += [(title, 'product', item_id) for item_id, title in products]
+        pairs = []
+        for phrase, kind, ref in phrases:
+            words = _WORD.findall(phrase.lower())
+            for position in range(len(words)):
+                # rank: matches at the start of a phrase first, then section names
+                rank = (0 if position == 0 else 1, 0 if kind == 'section' else 1)
+                pairs.append((' '.join(words[position:]), (phrase, kind, rank, ref)))
+        pairs.sort(key=lambda pair: pair[0])
+        self._index = ([key for key, _ in pairs], [entry for _, entry in pairs])
+        self.stale = False
+
+    def suggest(self, prefix, limit=8):
+        """Up to limit {'text', 'type', 'id'} suggestions whose words start with prefix"""
+        prefix = ' '.join(_WORD.findall(prefix.lower()))
+        if not prefix:
+            return []
+        keys, entries = self._index
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + '\uffff', start)
+
+        best = {}
+        for index in range(start, min(end, start + limit * 20)):
+            phrase, kind, rank, ref = entries[index]
+            if phrase not in best or rank < best[phrase][1]:
+                best[phrase] = (kind, rank, ref)
+
+        ranked = sorted(best.items(), key=lambda entry: (entry[1][1], len(entry[0]), entry[0]))
+        return [{'text': phrase, 'type': kind, 'id': ref} for phrase, (kind, _, ref) in ranked[:limit]]
@@ -0,0 +1,187 @@
+"""Server-side sessions: the cookie carries only a signed session id.
+
+Session data lives in a SessionStore. DatabaseSessionStore keeps it in
+the server_session table, shared by every process and kept across
+restarts. MemorySessionStore keeps it in this process (LRU with TTL) and
+only suits a single server process. Other shared stores (Redis,
+memcached) implement the same three methods.
+
+The signed-in user is stored as an id only. Each request the interface
+fills session['user'] from load_principal(user_id), which the app backs
+with a cache it invalidates when a user changes, so the user dict is
+never stale and authorization needs no query.
+"""
+import copy
+import secrets
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SecureCookieSession
+from itsdangerous import BadSignature, Signer
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, delete, insert, select, update
+
+from cache import TTLCache
+
+SESSION_ID_BYTES = 32
+PRINCIPAL_KEY = 'user'
+USER_ID_KEY = 'user_id'
+
+session_metadata = MetaData()
+
+server_sessions = Table(
+    'server_session', session_metadata,
+    Column('sid', String(64), primary_key=True),
+    Column('data', Text, nullable=False),
+    Column('expires_at', DateTime, nullable=False, index=True)
+)
+
+class SessionStore(ABC):
+    """Where session data is kept between requests, keyed by session id"""
+
+    @abstractmethod
+    def get(self, sid):
+        """The session's data dict, or None if it is unknown or expired"""
+
+    @abstractmethod
+    def set(self, sid, data, ttl):
+        """Store data for ttl seconds, replacing anything kept under sid"""
+
+    @abstractmethod
+    def delete(self, sid):
+        """Forget sid; unknown ids are ignored"""
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, max_entries=100000):
+        self._cache = TTLCache(max_entries=max_entries)
+
+    # Copies, as a shared store would serialize: a request mutating its
+    # session must not change what other requests read until it is saved
+    def get(self, sid):
+        return copy.deepcopy(self._cache.get(sid))
+
+    def set(self, sid, data, ttl):
+        self._cache.set(sid, copy.deepcopy(data), ttl=ttl)
+
+    def delete(self, sid):
+        self._cache.delete(sid)
+
+class DatabaseSessionStore(SessionStore):
+    """Sessions in the server_session table, shared by every process.
+
+    get_engine is called for each operation, so the store can be created
+    before the app's engine exists. Statements run in their own short
+    transactions, outside the request's session. Expired rows are never
+    read; `flask sessions-prune` deletes them.
+    """
+
+    def __init__(self, get_engine):
+        self.get_engine = get_engine
+        self.serializer = TaggedJSONSerializer()  # what Flask's cookie sessions use: keeps tuples, datetimes
+
+    def get(self, sid):
+        with self.get_engine().connect() as conn:
+            data = conn.execute(
+                select(server_sessions.c.data)
+                .where(server_sessions.c.sid == sid, server_sessions.c.expires_at > datetime.utcnow())
+            ).scalar()
+        return None if data is None else self.serializer.loads(data)
+
+    def set(self, sid, data, ttl):
+        values = {'data': self.serializer.dumps(data), 'expires_at': datetime.utcnow() + timedelta(seconds=ttl)}
+        with self.get_engine().begin() as conn:
+            # A new id is only known to the request that made it, so only one request inserts it
+            if not conn.execute(update(server_sessions).where(server_sessions.c.sid == sid).values(**values)).rowcount:
+                conn.execute(insert(server_sessions).values(sid=sid, **values))
+
+    def delete(self, sid):
+        with self.get_engine().begin() as conn:
+            conn.execute(delete(server_sessions).where(server_sessions.c.sid == sid))
+
+    def prune(self):
+        """Delete expired sessions; returns how many"""
+        with self.get_engine().begin() as conn:
+            return conn.execute(delete(server_sessions).where(server_sessions.c.expires_at <= datetime.utcnow())).rowcount
+
+class ServerSession(SecureCookieSession):
+    def __init__(self, initial=None, sid=None, user_id=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.loaded_user_id = user_id  # to issue a new id when someone signs in or out
+
+class ServerSideSessionInterface(SessionInterface):
+    session_class = ServerSession
+    salt = 'server-side-session'
+
+    def __init__(self, store, load_principal):
+        self.store = store
+        self.load_principal = load_principal
+
+    def _signer(self, app):
+        if not app.secret_key:
+            return None
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request):
+        signer = self._signer(app)
+        if signer is None:
+            return None
+        sid = None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = signer.unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+        data = self.store.get(sid) if sid else None
+        if data is None:
+            return self.session_class()
+
+        data = dict(data)
+        user_id = data.get(USER_ID_KEY)
+        if user_id is not None:
+            principal = self.load_principal(user_id)
+            if principal is None:
+                # Deleted or deactivated since: the session is signed out
+                data.pop(USER_ID_KEY)
+                session = self.session_class(data, sid=sid, user_id=user_id)
+                session.modified = True
+                return session
+            data[PRINCIPAL_KEY] = principal
+        return self.session_class(data, sid=sid, user_id=user_id)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        data = dict(session)
+        principal = data.pop(PRINCIPAL_KEY, None)
+        data.pop(USER_ID_KEY, None)
+        if principal:
+            data[USER_ID_KEY] = principal['id']
+
+        if not data:
+            if session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app), httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+        if not session.modified and not self.should_set_cookie(app, session):
+            return
+
+        sid = session.sid
+        if sid is None or data.get(USER_ID_KEY) != session.loaded_user_id:
+            # A new id on sign in / out, so an id seen before sign in is worthless after
+            if sid:
+                self.store.delete(sid)
+            sid = secrets.token_urlsafe(SESSION_ID_BYTES)
+        ttl = int(app.permanent_session_lifetime.total_seconds())
+        self.store.set(sid, data, ttl)
+        response.set_cookie(name, self._signer(app).sign(sid).decode(), expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                            secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app),
+                            partitioned=self.get_cookie_partitioned(app))
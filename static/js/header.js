@@ -105,6 +105,114 @@ document.addEventListener('keydown', function(e) {
     }
 });
 
+// Update the header cart badge with the count returned by /cart/add
+function updateCartCount(count) {
+    const badge = document.querySelector('.cart-count');
+    if (badge && count !== undefined) {
+        badge.textContent = count;
+    }
+}
+
+// Search suggestions
+function setupSearchSuggestions(searchForm) {
+    const searchInput = searchForm.querySelector('input[name="q"]');
+    if (!searchInput) {
+        return;
+    }
+    searchInput.setAttribute('autocomplete', 'off');
+
+    const list = document.createElement('ul');
+    list.className = 'search-suggestions';
+    searchForm.insertAdjacentElement('afterend', list);
+
+    let debounceTimer = null;
+    let lastQuery = '';
+    let highlighted = -1;
+
+    function closeSuggestions() {
+        list.classList.remove('active');
+        highlighted = -1;
+    }
+
+    function renderSuggestions(suggestions) {
+        list.innerHTML = '';
+        highlighted = -1;
+        suggestions.forEach(suggestion => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.className = 'suggestion-link';
+            link.href = suggestion.url;
+
+            const text = document.createElement('span');
+            text.textContent = suggestion.text;
+            const type = document.createElement('span');
+            type.className = 'suggestion-type';
+            type.textContent = suggestion.type === 'section' ? 'Category' : 'Product';
+
+            link.appendChild(text);
+            link.appendChild(type);
+            item.appendChild(link);
+            list.appendChild(item);
+        });
+        list.classList.toggle('active', suggestions.length > 0);
+    }
+
+    function fetchSuggestions() {
+        const query = searchInput.value.trim();
+        if (query === lastQuery) {
+            return;
+        }
+        lastQuery = query;
+        if (!query) {
+            closeSuggestions();
+            return;
+        }
+        fetch(`/search/suggest?q=${encodeURIComponent(query)}`)
+            .then(response => response.json())
+            .then(data => {
+                // Ignore responses for queries the user has already typed past
+                if (query === searchInput.value.trim()) {
+                    renderSuggestions(data.suggestions || []);
+                }
+            })
+            .catch(error => console.error('Error:', error));
+    }
+
+    searchInput.addEventListener('input', function() {
+        clearTimeout(debounceTimer);
+        debounceTimer = setTimeout(fetchSuggestions, 120);
+    });
+
+    searchInput.addEventListener('keydown', function(e) {
+        const links = list.querySelectorAll('.suggestion-link');
+        if (!list.classList.contains('active') || links.length === 0) {
+            return;
+        }
+        if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+            e.preventDefault();
+            highlighted = e.key === 'ArrowDown'
+                ? (highlighted + 1) % links.length
+                : (highlighted - 1 + links.length) % links.length;
+            links.forEach((link, index) => link.classList.toggle('highlighted', index === highlighted));
+        } else if (e.key === 'Enter' && highlighted >= 0) {
+            e.preventDefault();
+            window.location.href = links[highlighted].href;
+        } else if (e.key === 'Escape') {
+            closeSuggestions();
+        }
+    });
+
+    document.addEventListener('click', function(event) {
+        if (!searchForm.contains(event.target) && !list.contains(event.target)) {
+            closeSuggestions();
+        }
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.search-form').forEach(setupSearchSuggestions);
+});
+
 // Search functionality
 document.addEventListener('DOMContentLoaded', function() {
     const searchForm = document.querySelector('.search-form');
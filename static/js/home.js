@@ -52,7 +52,7 @@ function addToCart(itemId) {
         .then(data => {
             if (data.success) {
                 showNotification(data.message, 'success');
-                updateCartCount();
+                updateCartCount(data.cart_count);
             } else {
                 showNotification(data.message, 'error');
             }
@@ -152,14 +152,6 @@ function showNotification(message, type) {
     }, 3000);
 }
 
-// Update cart count
-function updateCartCount() {
-    // Reload the page to get updated cart count
-    setTimeout(() => {
-        window.location.reload();
-    }, 1000);
-}
-
 // Mobile menu functionality
 function initMobileMenu() {
     const mobileMenuBtn = document.querySelector('.mobile-menu-btn');
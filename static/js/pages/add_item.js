@@ -0,0 +1,21 @@
+function updateFileName(input) {
+    const fileName = input.files[0] ? input.files[0].name : 'No file chosen';
+    document.getElementById('fileName').textContent = fileName;
+}
+
+// Section selection
+document.addEventListener('DOMContentLoaded', function() {
+    const sectionSelect = document.getElementById('section');
+    const sectionOptions = document.querySelectorAll('.section-option');
+
+    sectionOptions.forEach(option => {
+        option.addEventListener('click', function() {
+            const value = this.getAttribute('data-value');
+            sectionSelect.value = value;
+
+            // Update visual selection
+            sectionOptions.forEach(opt => opt.classList.remove('selected'));
+            this.classList.add('selected');
+        });
+    });
+});
@@ -0,0 +1,227 @@
+// Product grid: rows, sorting, filtering and paging come from the JSON endpoint
+const grid = document.getElementById('productsGrid');
+const filters = document.getElementById('gridFilters');
+const state = { sort: 'id', order: 'desc', page: 1, pages: 1, total: 0 };
+const selected = new Set();
+
+// Poll unfinished image jobs until their variants are ready
+function pollImageJob(badge) {
+    fetch(`/admin/image-jobs/${badge.dataset.jobId}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                badge.remove();
+            } else if (data.job.status === 'done') {
+                badge.textContent = 'Image ready';
+            } else if (data.job.status === 'failed') {
+                badge.textContent = 'Image processing failed';
+                badge.classList.add('failed');
+            } else if (badge.isConnected) {
+                setTimeout(() => pollImageJob(badge), 2000);
+            }
+        })
+        .catch(() => setTimeout(() => pollImageJob(badge), 5000));
+}
+
+function filterParams() {
+    const params = new URLSearchParams(new FormData(filters));
+    params.set('sort', state.sort);
+    params.set('order', state.order);
+    return params;
+}
+
+function renderRow(item) {
+    const row = document.createElement('div');
+    row.className = 'table-row';
+
+    const checkbox = document.createElement('input');
+    checkbox.type = 'checkbox';
+    checkbox.className = 'row-select';
+    checkbox.value = item.id;
+    checkbox.checked = selected.has(item.id);
+    checkbox.addEventListener('change', () => {
+        checkbox.checked ? selected.add(item.id) : selected.delete(item.id);
+        updateSelection();
+    });
+
+    const image = document.createElement('img');
+    image.src = item.image;
+    image.alt = item.title;
+    image.className = 'product-image';
+    image.loading = 'lazy';
+
+    const title = document.createElement('a');
+    title.href = item.url;
+    title.textContent = item.title;
+    const sku = document.createElement('span');
+    sku.className = 'product-sku';
+    sku.textContent = item.sku || '';
+
+    const stock = document.createElement('div');
+    stock.textContent = item.in_stock ? (item.stock_quantity === null ? 'In stock' : `${item.stock_quantity} left`) : 'Out of stock';
+    stock.classList.toggle('out-of-stock', !item.in_stock);
+
+    const actions = document.createElement('div');
+    actions.innerHTML = `<a class="action-btn edit-btn">Edit</a><a class="action-btn delete-btn">Delete</a>`;
+    actions.children[0].href = item.edit_url;
+    actions.children[1].href = item.delete_url;
+    actions.children[1].addEventListener('click', e => {
+        if (!confirm('Are you sure?')) e.preventDefault();
+    });
+
+    const cells = [checkbox, image, title, item.price, item.section];
+    cells.forEach((content, index) => {
+        const cell = document.createElement('div');
+        if (typeof content === 'string') {
+            cell.textContent = content;
+        } else {
+            cell.appendChild(content);
+        }
+        if (index === 1 && item.image_job_id) {
+            const badge = document.createElement('span');
+            badge.className = 'image-job-status';
+            badge.dataset.jobId = item.image_job_id;
+            badge.textContent = 'Processing image…';
+            cell.appendChild(badge);
+            pollImageJob(badge);
+        }
+        if (index === 2) cell.appendChild(sku);
+        row.appendChild(cell);
+    });
+    row.appendChild(stock);
+    row.appendChild(actions);
+    return row;
+}
+
+function loadPage(page) {
+    const params = filterParams();
+    params.set('page', page);
+    params.set('per_page', grid.dataset.pageSize);
+    fetch(`${grid.dataset.url}?${params.toString()}`)
+        .then(response => response.json())
+        .then(data => {
+            const rows = document.getElementById('gridRows');
+            rows.innerHTML = '';
+            if (!data.items.length) {
+                rows.innerHTML = '<div class="grid-empty">No products match these filters.</div>';
+            }
+            data.items.forEach(item => rows.appendChild(renderRow(item)));
+
+            Object.assign(state, { page: data.page, pages: data.pages, total: data.total });
+            document.getElementById('pageInfo').textContent = `Page ${data.page} of ${data.pages} (${data.total} products)`;
+            document.getElementById('prevPage').disabled = data.page <= 1;
+            document.getElementById('nextPage').disabled = data.page >= data.pages;
+            document.getElementById('matchingCount').textContent = data.total;
+            document.querySelectorAll('.sortable').forEach(header => {
+                header.classList.toggle('asc', header.dataset.sort === state.sort && state.order === 'asc');
+                header.classList.toggle('desc', header.dataset.sort === state.sort && state.order === 'desc');
+            });
+            updateSelection();
+        })
+        .catch(() => showNotification('Could not load products', 'error'));
+}
+
+function updateSelection() {
+    const allMatching = document.getElementById('allMatching').checked;
+    const count = allMatching ? state.total : selected.size;
+    document.getElementById('selectionCount').textContent =
+        count ? `${count} product${count === 1 ? '' : 's'} selected` : 'No products selected';
+    document.getElementById('applyBulk').disabled = !count || !document.getElementById('bulkAction').value;
+
+    const boxes = [...document.querySelectorAll('.row-select')];
+    document.getElementById('selectPage').checked = boxes.length > 0 && boxes.every(box => box.checked);
+}
+
+function applyBulkAction() {
+    const action = document.getElementById('bulkAction').value;
+    const allMatching = document.getElementById('allMatching').checked;
+    const count = allMatching ? state.total : selected.size;
+    if (action === 'delete' && !confirm(`Delete ${count} product${count === 1 ? '' : 's'}?`)) return;
+
+    // All matching: the server applies the action to the current filters, not to ids
+    const body = allMatching ? filterParams() : new URLSearchParams();
+    body.set('action', action);
+    const input = document.querySelector(`.bulk-value[data-action="${action}"]`);
+    if (input) body.set('value', input.value);
+    if (allMatching) {
+        body.set('all', '1');
+    } else {
+        selected.forEach(id => body.append('ids', id));
+    }
+
+    const button = document.getElementById('applyBulk');
+    button.disabled = true;
+    fetch(grid.dataset.bulkUrl, { method: 'POST', body })
+        .then(response => response.json())
+        .then(data => {
+            showNotification(data.message, data.success ? 'success' : 'error');
+            if (data.success) {
+                selected.clear();
+                document.getElementById('allMatching').checked = false;
+                loadPage(action === 'delete' ? 1 : state.page);
+            }
+        })
+        .catch(() => showNotification('The bulk action failed', 'error'))
+        .finally(updateSelection);
+}
+
+function showNotification(message, type) {
+    const notification = document.createElement('div');
+    notification.className = `notification ${type}`;
+    notification.textContent = message;
+    notification.style.cssText = `
+        position: fixed;
+        top: 100px;
+        right: 20px;
+        background: ${type === 'success' ? '#27ae60' : '#e74c3c'};
+        color: white;
+        padding: 15px 20px;
+        border-radius: 8px;
+        box-shadow: 0 5px 15px rgba(0,0,0,0.2);
+        z-index: 10000;
+    `;
+    document.body.appendChild(notification);
+    setTimeout(() => notification.remove(), 3000);
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    let searchTimer;
+    filters.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => loadPage(1), 300);
+    });
+    filters.addEventListener('submit', e => {
+        e.preventDefault();
+        loadPage(1);
+    });
+
+    document.querySelectorAll('.sortable').forEach(header => {
+        header.addEventListener('click', () => {
+            state.order = state.sort === header.dataset.sort && state.order === 'asc' ? 'desc' : 'asc';
+            state.sort = header.dataset.sort;
+            loadPage(1);
+        });
+    });
+
+    document.getElementById('selectPage').addEventListener('change', e => {
+        document.querySelectorAll('.row-select').forEach(box => {
+            box.checked = e.target.checked;
+            const id = Number(box.value);
+            e.target.checked ? selected.add(id) : selected.delete(id);
+        });
+        updateSelection();
+    });
+
+    document.getElementById('bulkAction').addEventListener('change', e => {
+        document.querySelectorAll('.bulk-value').forEach(input => {
+            input.hidden = input.dataset.action !== e.target.value;
+        });
+        updateSelection();
+    });
+    document.getElementById('allMatching').addEventListener('change', updateSelection);
+    document.getElementById('applyBulk').addEventListener('click', applyBulkAction);
+    document.getElementById('prevPage').addEventListener('click', () => loadPage(state.page - 1));
+    document.getElementById('nextPage').addEventListener('click', () => loadPage(state.page + 1));
+
+    loadPage(1);
+});
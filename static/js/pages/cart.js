@@ -0,0 +1,24 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Quantity controls
+    const quantityForms = document.querySelectorAll('.quantity-form');
+
+    quantityForms.forEach(form => {
+        const decreaseBtn = form.querySelector('.decrease');
+        const increaseBtn = form.querySelector('.increase');
+        const quantityInput = form.querySelector('.quantity-input');
+
+        decreaseBtn.addEventListener('click', function() {
+            if (quantityInput.value > 1) {
+                quantityInput.value = parseInt(quantityInput.value) - 1;
+                form.submit();
+            }
+        });
+
+        increaseBtn.addEventListener('click', function() {
+            if (quantityInput.value < 10) {
+                quantityInput.value = parseInt(quantityInput.value) + 1;
+                form.submit();
+            }
+        });
+    });
+});
@@ -0,0 +1,36 @@
+let selectedAddressId = null;
+
+function selectAddress(addressId) {
+    // Remove selected class from all addresses
+    document.querySelectorAll('.address-option').forEach(addr => {
+        addr.classList.remove('selected');
+    });
+
+    // Add selected class to clicked address
+    document.getElementById(`address-${addressId}`).classList.add('selected');
+
+    // Update selected address
+    selectedAddressId = addressId;
+    document.getElementById('selectedAddress').value = addressId;
+
+    // Enable place order button
+    document.getElementById('placeOrderBtn').disabled = false;
+}
+
+// Auto-select default address if exists
+document.addEventListener('DOMContentLoaded', function() {
+    const defaultAddress = document.querySelector('.address-default');
+    if (defaultAddress) {
+        const addressId = defaultAddress.closest('.address-option').id.split('-')[1];
+        selectAddress(parseInt(addressId));
+    }
+});
+
+// Form submission handling
+document.getElementById('orderForm').addEventListener('submit', function(e) {
+    if (!selectedAddressId) {
+        e.preventDefault();
+        alert('Please select a shipping address');
+        return false;
+    }
+});
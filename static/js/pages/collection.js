@@ -0,0 +1,183 @@
+const sectionBadges = {
+    'New Arrivals': ['badge-new', 'New'],
+    'Best Deals': ['badge-sale', 'Sale']
+};
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : text;
+    return div.innerHTML;
+}
+
+function renderPicture(item) {
+    const sources = ['avif', 'webp']
+        .filter(fmt => item.image_srcset[fmt])
+        .map(fmt => `<source type="image/${fmt}" srcset="${escapeHtml(item.image_srcset[fmt])}" sizes="${cardImageSizes}">`)
+        .join('');
+    const srcset = item.image_srcset.jpeg
+        ? ` srcset="${escapeHtml(item.image_srcset.jpeg)}" sizes="${cardImageSizes}"`
+        : '';
+    return `<picture>${sources}<img src="${escapeHtml(item.image)}"${srcset} alt="${escapeHtml(item.title)}" class="product-image" loading="lazy" decoding="async"></picture>`;
+}
+
+// Same markup as templates/product_card.html
+function renderProductCard(item) {
+    const badge = sectionBadges[item.section] || ['badge-popular', 'Popular'];
+    const actions = isLoggedIn
+        ? `<button class="wishlist-btn" onclick="addToWishlist(${item.id}, this)">♥</button>
+           <button class="cart-btn" onclick="addToCart(${item.id})">🛒</button>`
+        : `<button class="wishlist-btn" onclick="showLoginAlert()">♥</button>
+           <button class="cart-btn" onclick="showLoginAlert()">🛒</button>`;
+
+    const card = document.createElement('div');
+    card.className = 'product-card';
+    card.innerHTML = `
+        <div class="product-badge ${badge[0]}">${badge[1]}</div>
+        ${renderPicture(item)}
+        <div class="product-info">
+            <h3 class="product-title">${escapeHtml(item.title)}</h3>
+            <p class="product-category">${escapeHtml(item.section)}</p>
+            <p class="product-description">${escapeHtml(item.description)}</p>
+            <div class="product-price">${escapeHtml(item.price)}</div>
+            <div class="product-actions">
+                <a href="${escapeHtml(item.url)}" class="view-btn">View Details</a>
+                <div class="action-buttons">${actions}</div>
+            </div>
+        </div>`;
+    return card;
+}
+
+let loadingMore = false;
+
+function loadMoreProducts() {
+    const button = document.getElementById('loadMoreBtn');
+    if (!button || loadingMore || !button.dataset.cursor) {
+        return;
+    }
+    loadingMore = true;
+    button.disabled = true;
+
+    const params = new URLSearchParams(window.location.search);
+    params.set('cursor', button.dataset.cursor);
+
+    fetch(`${collectionItemsUrl}?${params.toString()}`)
+        .then(response => response.json())
+        .then(data => {
+            const grid = document.getElementById('productsGrid');
+            data.items.forEach(item => grid.appendChild(renderProductCard(item)));
+
+            if (data.next_cursor) {
+                button.dataset.cursor = data.next_cursor;
+                button.disabled = false;
+            } else {
+                button.parentElement.remove();
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            button.disabled = false;
+            showNotification('Error loading products', 'error');
+        })
+        .finally(() => {
+            loadingMore = false;
+        });
+}
+
+// Load the next page automatically when the button scrolls into view
+document.addEventListener('DOMContentLoaded', function() {
+    const button = document.getElementById('loadMoreBtn');
+    if (button && 'IntersectionObserver' in window) {
+        const observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadMoreProducts();
+            }
+        }, { rootMargin: '400px' });
+        observer.observe(button);
+    }
+});
+
+function addToCart(itemId) {
+    fetch(`/cart/add/${itemId}`)
+        .then(response => {
+            if (response.redirected) {
+                window.location.href = response.url;
+                return;
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data && data.success) {
+                showNotification('Item added to cart!', 'success');
+                updateCartCount(data.cart_count);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showNotification('Error adding to cart', 'error');
+        });
+}
+
+function addToWishlist(itemId) {
+    fetch(`/wishlist/add/${itemId}`)
+        .then(response => {
+            if (response.redirected) {
+                window.location.href = response.url;
+                return;
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data && data.success) {
+                showNotification('Item added to wishlist!', 'success');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showNotification('Error adding to wishlist', 'error');
+        });
+}
+
+function showLoginAlert() {
+    showNotification('Please login to add items to cart or wishlist', 'warning');
+}
+
+function showNotification(message, type) {
+    const notification = document.createElement('div');
+    notification.className = `notification ${type}`;
+    notification.textContent = message;
+    notification.style.cssText = `
+        position: fixed;
+        top: 100px;
+        right: 20px;
+        background: ${type === 'success' ? '#27ae60' : type === 'error' ? '#e74c3c' : '#f39c12'};
+        color: white;
+        padding: 15px 20px;
+        border-radius: 8px;
+        box-shadow: 0 5px 15px rgba(0,0,0,0.2);
+        z-index: 10000;
+        animation: slideIn 0.3s ease;
+    `;
+
+    document.body.appendChild(notification);
+
+    setTimeout(() => {
+        notification.style.animation = 'slideOut 0.3s ease';
+        setTimeout(() => {
+            document.body.removeChild(notification);
+        }, 300);
+    }, 3000);
+}
+
+// Add CSS for notifications
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes slideIn {
+        from { transform: translateX(100%); opacity: 0; }
+        to { transform: translateX(0); opacity: 1; }
+    }
+    @keyframes slideOut {
+        from { transform: translateX(0); opacity: 1; }
+        to { transform: translateX(100%); opacity: 0; }
+    }
+`;
+document.head.appendChild(style);
@@ -0,0 +1,68 @@
+function updateFileName(input) {
+    const fileName = input.files[0] ? input.files[0].name : 'No file chosen';
+    document.getElementById('fileName').textContent = fileName;
+}
+
+// Progress arrives as one JSON object per line, after each committed batch
+function showProgress(event) {
+    const summary = document.getElementById('importSummary');
+    const prefix = event.done ? 'Import finished' : 'Importing';
+    summary.textContent = `${prefix}: ${event.processed} rows read, ${event.inserted} added, ` +
+        `${event.updated} updated, ${event.failed} rejected`;
+
+    if (event.done && event.errors) {
+        const list = document.getElementById('importErrors');
+        list.innerHTML = '';
+        event.errors.forEach(error => {
+            const li = document.createElement('li');
+            li.textContent = error;
+            list.appendChild(li);
+        });
+    }
+}
+
+function showFailure(message) {
+    const summary = document.getElementById('importSummary');
+    summary.textContent = message;
+    summary.classList.add('failed');
+}
+
+async function readProgress(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => showProgress(JSON.parse(line)));
+    }
+    if (buffer.trim()) {
+        showProgress(JSON.parse(buffer));
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.getElementById('importForm');
+    const button = document.getElementById('importBtn');
+
+    form.addEventListener('submit', function(e) {
+        e.preventDefault();
+        button.disabled = true;
+        document.getElementById('importProgress').hidden = false;
+        document.getElementById('importErrors').innerHTML = '';
+        showProgress({ processed: 0, inserted: 0, updated: 0, failed: 0 });
+
+        fetch(form.action, { method: 'POST', body: new FormData(form) })
+            .then(response => {
+                if (!response.ok) {
+                    return response.json().then(data => showFailure(data.message));
+                }
+                return readProgress(response);
+            })
+            .catch(() => showFailure('The import was interrupted. Rows already imported have been saved.'))
+            .finally(() => { button.disabled = false; });
+    });
+});
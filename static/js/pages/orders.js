@@ -0,0 +1,27 @@
+function toggleOrderDetails(orderId, button) {
+    const details = document.getElementById(`order-details-${orderId}`);
+    if (!details.hidden) {
+        details.hidden = true;
+        button.textContent = 'View Details';
+        return;
+    }
+    if (details.dataset.loaded) {
+        details.hidden = false;
+        button.textContent = 'Hide Details';
+        return;
+    }
+
+    button.disabled = true;
+    fetch(`/orders/${orderId}/details`)
+        .then(response => response.text())
+        .then(html => {
+            details.innerHTML = html;
+            details.dataset.loaded = 'true';
+            details.hidden = false;
+            button.textContent = 'Hide Details';
+        })
+        .catch(error => console.error('Error:', error))
+        .finally(() => {
+            button.disabled = false;
+        });
+}
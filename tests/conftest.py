@@ -0,0 +1,45 @@
+"""Runs the app against a throwaway SQLite database.
+
+The environment is set before app.py is imported, because importing it
+calls create_app(), which connects the configured database.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATABASE_DIR = tempfile.mkdtemp(prefix='elegant-store-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(DATABASE_DIR, 'store.db')}"
+os.environ['IMAGE_JOB_WORKERS'] = '0'
+os.environ['TEMPLATE_CACHE_DIR'] = ''
+os.environ.pop('DATABASE_REPLICA_URLS', None)
+
+@pytest.fixture(scope='session')
+def store():
+    """The app module, with tables and sample products created"""
+    import app as store_module
+    store_module.init_db()
+    return store_module
+
+@pytest.fixture
+def app_context(store):
+    with store.app.app_context():
+        yield
+        store.db.session.remove()
+
+@pytest.fixture
+def make_user(store, app_context):
+    counter = iter(range(1, 1000000))
+
+    def make_user(is_admin=False):
+        number = next(counter)
+        email = f'user{number}-{os.urandom(4).hex()}@example.com'
+        user = store.User(name=f'User {number}', email=email, password='x', is_admin=is_admin)
+        store.db.session.add(user)
+        store.db.session.commit()
+        return user
+    return make_user
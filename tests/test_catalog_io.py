@@ -0,0 +1,41 @@
+import io
+
+import pytest
+
+def export(client, fmt):
+    response = client.get(f'/admin/products/export.{fmt}')
+    assert response.status_code == 200
+    return response.get_data()
+
+def catalog(store):
+    columns = (store.Item.id, store.Item.sku, store.Item.title, store.Item.price_paise, store.Item.section,
+               store.Item.image, store.Item.description, store.Item.stock_quantity, store.Item.in_stock)
+    return store.db.session.query(*columns).order_by(store.Item.id).all()
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl'])
+def test_export_imports_back_onto_the_same_products(store, make_user, fmt):
+    with_sku = store.Item(title='Supplier Abaya', image='images/img1.jpg', section='Best Deals', sku=f'SUP-{fmt}')
+    with_sku.set_price(99950)
+    with_sku.set_stock(4)
+    store.db.session.add(with_sku)
+    store.db.session.commit()
+    assert store.db.session.query(store.Item).filter(store.Item.sku.is_(None)).count()  # sample data predates skus
+
+    client = store.app.test_client()
+    with client.session_transaction() as client_session:
+        client_session['user'] = store.user_session_data(make_user(is_admin=True))
+    before = catalog(store)
+
+    *_, summary = store.import_products(io.BytesIO(export(client, fmt)), fmt)
+
+    assert summary['errors'] == []
+    assert (summary['inserted'], summary['updated'], summary['failed']) == (0, len(before), 0)
+    store.db.session.expire_all()
+    assert catalog(store) == before
+
+def test_blank_sku_with_unknown_id_is_reported(store, app_context):
+    rows = b'sku,id,title,price,section,image\n,999999,Ghost,10,Best Deals,images/img1.jpg\n,,Nobody,10,Best Deals,images/img1.jpg\n'
+    *_, summary = store.import_products(io.BytesIO(rows), 'csv')
+    assert (summary['inserted'], summary['updated'], summary['failed']) == (0, 0, 2)
+    assert summary['errors'] == ['Line 3: sku is required, or the id of an existing product',
+                                 'No product with id 999999 to update']
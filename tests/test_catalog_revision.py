@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+def etag(client, path='/'):
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+def test_edits_within_one_second_each_change_the_etag(store, app_context):
+    client = store.app.test_client()
+    item_ids = [item_id for (item_id,) in store.db.session.query(store.Item.id).order_by(store.Item.id).limit(2)]
+    seen = {etag(client)}
+    # Neither is the newest product and both land in the same second
+    for item_id in item_ids:
+        store.bulk_update_products(store.Item.id == item_id, 'price', Decimal(10))
+        seen.add(etag(client))
+    assert len(seen) == 3
+
+def test_stale_etag_is_not_answered_with_304(store, app_context):
+    client = store.app.test_client()
+    old = etag(client)
+    store.bulk_update_products(store.Item.section == 'Best Deals', 'in_stock', True)
+    assert client.get('/', headers={'If-None-Match': old}).status_code == 200
+
+def test_change_committed_by_another_process_is_seen_on_the_next_request(store, app_context):
+    client = store.app.test_client()
+    old = etag(client)
+    assert client.get('/', headers={'If-None-Match': old}).status_code == 304
+    with store.db.engine.begin() as conn:
+        conn.execute(store.db.update(store.CatalogRevision).values(revision=store.CatalogRevision.revision + 1))
+    assert etag(client) != old
@@ -0,0 +1,76 @@
+import threading
+
+SHOPPERS = 8
+STOCK = 3
+
+def add_shopper(store, make_user, item):
+    """A user with a delivery address and one of item in the cart"""
+    user = make_user()
+    address = store.Address(user_id=user.id, name=user.name, phone='9999999999', address_line1='1 Test Street',
+                            city='Mumbai', state='Maharashtra', pincode='400001', is_default=True)
+    store.db.session.add(address)
+    store.db.session.add(store.Cart(user_id=user.id, item_id=item.id, quantity=1))
+    store.db.session.commit()
+    return user.id, address.id
+
+def add_item(store, stock):
+    item = store.Item(title='Last Few Abayas', image='images/img1.jpg', section='Popular Items')
+    item.set_price(149900)
+    item.set_stock(stock)
+    store.db.session.add(item)
+    store.db.session.commit()
+    return item
+
+def catalog_revision(store):
+    return store.db.session.query(store.CatalogRevision.revision).scalar()
+
+def test_concurrent_checkouts_never_oversell(store, make_user):
+    item = add_item(store, STOCK)
+    shoppers = [add_shopper(store, make_user, item) for _ in range(SHOPPERS)]
+
+    start = threading.Barrier(SHOPPERS)
+    placed, refused, failed = [], [], []
+
+    def checkout(user_id, address_id):
+        with store.app.app_context():
+            start.wait()
+            try:
+                placed.append(store.place_order(user_id, address_id)[0])
+            except store.CheckoutError as e:
+                refused.append(str(e))
+            except Exception as e:  # e.g. a lock timeout; reported below rather than lost with the thread
+                failed.append(repr(e))
+            finally:
+                store.db.session.remove()
+
+    threads = [threading.Thread(target=checkout, args=shopper) for shopper in shoppers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store.db.session.expire_all()
+    item = store.db.session.get(store.Item, item.id)
+    sold = store.db.session.query(store.db.func.coalesce(store.db.func.sum(store.OrderItem.quantity), 0)) \
+        .filter_by(item_id=item.id).scalar()
+    assert not failed
+    assert len(placed) + len(refused) == SHOPPERS
+    assert len(placed) == sold == STOCK
+    assert item.stock_quantity == 0
+    assert item.in_stock is False
+
+def test_only_selling_out_counts_as_a_catalog_change(store, make_user):
+    item = add_item(store, 2)
+    edited_at = item.updated_at
+    first, second = (add_shopper(store, make_user, item) for _ in range(2))
+    revision = catalog_revision(store)
+
+    store.place_order(*first)
+    store.db.session.expire_all()
+    assert (item.stock_quantity, item.updated_at) == (1, edited_at)
+    assert catalog_revision(store) == revision
+
+    store.place_order(*second)
+    store.db.session.expire_all()
+    assert (item.stock_quantity, item.in_stock) == (0, False)
+    assert catalog_revision(store) == revision + 1
@@ -0,0 +1,12 @@
+def test_saving_a_product_drops_only_its_cards(store, app_context):
+    first, second = store.db.session.query(store.Item).order_by(store.Item.id).limit(2).all()
+    store.card_cache.invalidate()
+    with store.app.test_request_context():
+        store.product_card(first)
+        store.product_card(first, compact=True)
+        store.product_card(second)
+        assert len(store.card_cache) == 3
+
+        store.product_saved(first)
+
+        assert len(store.card_cache) == 1
@@ -0,0 +1,51 @@
+from flask import url_for
+
+from query_budget import QUERY_BUDGETS, run_query_budgets
+
+CART_ITEMS = 3
+ORDERS = 3
+
+def seed_shopper(store, user):
+    """A user with a default address, a full cart and wishlist, and some orders"""
+    db = store.db
+    address = store.Address(user_id=user.id, name=user.name, phone='9999999999', address_line1='1 Test Street',
+                            city='Mumbai', state='Maharashtra', pincode='400001', is_default=True)
+    db.session.add(address)
+    db.session.flush()
+    items = store.Item.query.order_by(store.Item.id).limit(CART_ITEMS).all()
+    for item in items:
+        db.session.add(store.Cart(user_id=user.id, item_id=item.id, quantity=1))
+        db.session.add(store.Wishlist(user_id=user.id, item_id=item.id))
+    for _ in range(ORDERS):
+        order = store.Order(user_id=user.id, address_id=address.id, total_amount=0)
+        db.session.add(order)
+        db.session.flush()
+        for item in items:
+            db.session.add(store.OrderItem(order_id=order.id, item_id=item.id, quantity=1,
+                                           price=item.price_paise / 100))
+    db.session.commit()
+    return order
+
+def test_pages_stay_within_query_budgets(store, make_user):
+    user = make_user()
+    order = seed_shopper(store, user)
+    with store.app.test_request_context():
+        routes = [(name, url_for(name), QUERY_BUDGETS[name]) for name in ('cart', 'checkout', 'wishlist', 'orders')]
+        routes.append(('order_confirmation', url_for('order_confirmation', order_id=order.id),
+                       QUERY_BUDGETS['order_confirmation']))
+
+    results = run_query_budgets(store.app, store.db.engine, store.user_session_data(user), routes)
+
+    failures = [f"{result['path']}: status {result['status']}, {result['count']} queries "
+                f"(budget {result['budget']})" for result in results if not result['ok']]
+    assert not failures
+
+def test_redirect_does_not_pass_the_budget(store, make_user):
+    user = make_user()  # empty cart: checkout redirects to the cart page
+    with store.app.test_request_context():
+        routes = [('checkout', url_for('checkout'), QUERY_BUDGETS['checkout'])]
+
+    result, = run_query_budgets(store.app, store.db.engine, store.user_session_data(user), routes)
+
+    assert result['status'] == 302
+    assert not result['ok']
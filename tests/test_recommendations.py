@@ -0,0 +1,41 @@
+def add_items(store, count):
+    items = []
+    for number in range(count):
+        item = store.Item(title=f'Recommended Abaya {number}', image='images/img1.jpg', section='Popular Items')
+        item.set_price(99900)
+        item.set_stock(10)
+        items.append(item)
+    store.db.session.add_all(items)
+    store.db.session.commit()
+    return items
+
+def place_order(store, user, *items):
+    address = store.Address(user_id=user.id, name=user.name, phone='9999999999', address_line1='1 Test Street',
+                            city='Mumbai', state='Maharashtra', pincode='400001')
+    store.db.session.add(address)
+    store.db.session.flush()
+    order = store.Order(user_id=user.id, address_id=address.id, total_amount=999.0 * len(items))
+    order.order_items = [store.OrderItem(item_id=item.id, quantity=1, price=999.0) for item in items]
+    store.db.session.add(order)
+    store.db.session.commit()
+
+def stored_recommendations(store):
+    rows = store.db.session.query(store.ItemRecommendation.item_id, store.ItemRecommendation.position,
+                                  store.ItemRecommendation.recommended_item_id, store.ItemRecommendation.score)
+    return {(item_id, position, other): round(score, 9) for item_id, position, other, score in rows}
+
+def test_incremental_build_matches_a_full_build_after_new_orders(store, make_user):
+    first, second, third, fourth = add_items(store, 4)
+    user = make_user()
+    place_order(store, user, first, second)
+    place_order(store, user, first, third)
+    store.build_recommendations(full=True)
+
+    # first is on no new order, but its score against second moves with second's basket count
+    place_order(store, user, second, fourth)
+    build = store.build_recommendations()
+    assert not build.full
+    incremental = stored_recommendations(store)
+
+    store.build_recommendations(full=True)
+    assert incremental == stored_recommendations(store)
@@ -0,0 +1,76 @@
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from replicas import RoutingSession, replica_keys
+
+@pytest.fixture
+def routed(tmp_path):
+    """A Flask-SQLAlchemy app on a primary and one replica, two separate SQLite files.
+
+    Nothing copies rows between them, so every read shows which database
+    answered it.
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'primary.db'}"
+    app.config['SQLALCHEMY_BINDS'] = {'replica_0': f"sqlite:///{tmp_path / 'replica.db'}"}
+    db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+    class Note(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        text = db.Column(db.String(50), nullable=False)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            db.metadata.create_all(engine)
+        with db.engines['replica_0'].begin() as conn:
+            conn.execute(db.insert(Note).values(id=1, text='replica'))
+        db.session.add(Note(id=1, text='primary'))
+        db.session.commit()
+        db.session.remove()
+        yield db, Note
+        db.session.remove()
+
+def read_text(db, Note):
+    return db.session.execute(db.select(Note.text).filter_by(id=1)).scalar()
+
+def test_replica_keys():
+    assert replica_keys({None: 'x', 'replica_1': 'y', 'replica_0': 'z', 'other': 'w'}) == ['replica_0', 'replica_1']
+
+def test_reads_go_to_the_primary_unless_a_replica_is_chosen(routed):
+    db, Note = routed
+    assert read_text(db, Note) == 'primary'
+
+def test_plain_reads_go_to_the_chosen_replica(routed):
+    db, Note = routed
+    db.session.info['replica_bind'] = 'replica_0'
+    assert read_text(db, Note) == 'replica'
+    assert not db.session.info.get('wrote')
+
+def test_locking_reads_go_to_the_primary(routed):
+    db, Note = routed
+    db.session.info['replica_bind'] = 'replica_0'
+    locked = db.session.execute(db.select(Note.text).filter_by(id=1).with_for_update()).scalar()
+    assert locked == 'primary'
+
+def test_reads_stick_to_the_primary_after_a_write(routed):
+    db, Note = routed
+    db.session.info['replica_bind'] = 'replica_0'
+    assert read_text(db, Note) == 'replica'
+
+    db.session.execute(db.update(Note).filter_by(id=1).values(text='edited'))
+    assert db.session.info['wrote']
+    assert read_text(db, Note) == 'edited'
+
+    db.session.commit()
+    assert read_text(db, Note) == 'edited'
+    with db.engines['replica_0'].connect() as conn:
+        assert conn.execute(db.select(Note.text).filter_by(id=1)).scalar() == 'replica'
+
+def test_flushed_objects_stick_to_the_primary(routed):
+    db, Note = routed
+    db.session.info['replica_bind'] = 'replica_0'
+    db.session.add(Note(id=2, text='new'))
+    db.session.flush()
+    assert db.session.info['wrote']
+    assert db.session.execute(db.select(Note.text).filter_by(id=2)).scalar() == 'new'
@@ -0,0 +1,42 @@
+import threading
+
+SEARCHERS = 8
+
+def test_rebuild_swaps_in_a_complete_index_once(store, app_context, monkeypatch):
+    expected = store.search_products('abaya')[1]
+    assert expected
+    old = store.search_index
+    old_size = len(old)
+    old.built = False  # as after a bulk change
+
+    builds = []
+
+    class CountedIndex(store.SearchIndex):
+        def __init__(self):
+            super().__init__()
+            builds.append(self)
+    monkeypatch.setattr(store, 'SearchIndex', CountedIndex)
+
+    start = threading.Barrier(SEARCHERS)
+    totals, failed = [], []
+
+    def search():
+        with store.app.app_context():
+            start.wait()
+            try:
+                totals.append(store.search_products('abaya')[1])
+            except Exception as e:
+                failed.append(repr(e))
+            finally:
+                store.db.session.remove()
+
+    threads = [threading.Thread(target=search) for _ in range(SEARCHERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not failed
+    assert totals == [expected] * SEARCHERS
+    assert len(builds) == 1 and store.search_index is builds[0]
+    assert len(old) == old_size  # never emptied while searches could still be reading it
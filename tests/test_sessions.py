@@ -0,0 +1,40 @@
+import pytest
+
+from sessions import DatabaseSessionStore, SessionStore
+
+def test_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+def test_database_store_round_trip(store, app_context):
+    sessions = DatabaseSessionStore(lambda: store.db.engine)
+    data = {'user_id': 7, '_flashes': [('success', 'Saved')]}
+    sessions.set('round-trip', data, ttl=60)
+    assert DatabaseSessionStore(lambda: store.db.engine).get('round-trip') == data
+
+    sessions.set('round-trip', {'user_id': 8}, ttl=60)
+    assert sessions.get('round-trip') == {'user_id': 8}
+    sessions.delete('round-trip')
+    assert sessions.get('round-trip') is None
+
+def test_expired_sessions_are_not_read_and_are_pruned(store, app_context):
+    sessions = DatabaseSessionStore(lambda: store.db.engine)
+    sessions.set('expired', {'user_id': 1}, ttl=-1)
+    assert sessions.get('expired') is None
+    assert sessions.prune() >= 1
+
+def test_signed_in_session_survives_a_new_worker(store, make_user, monkeypatch):
+    client = store.app.test_client()
+    with client.session_transaction() as client_session:
+        client_session['user'] = store.user_session_data(make_user())
+    # Another process, or this one after a restart, knows nothing but the database
+    monkeypatch.setattr(store.app.session_interface, 'store', DatabaseSessionStore(lambda: store.db.engine))
+    assert client.get('/cart').status_code == 200
+
+def test_memory_store_refuses_several_workers(store, monkeypatch):
+    monkeypatch.setitem(store.app.config, 'SESSION_STORE', 'memory')
+    monkeypatch.setitem(store.app.config, 'WEB_CONCURRENCY', 2)
+    with pytest.raises(RuntimeError):
+        store.session_store()
+    monkeypatch.setitem(store.app.config, 'WEB_CONCURRENCY', 1)
+    assert store.session_store() is not None